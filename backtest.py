@@ -0,0 +1,318 @@
+# backtest.py
+# -*- coding: utf-8 -*-
+"""
+📈 Backtesting vectorizado multi-ticker sobre data_cache/
+Ejecuta cada estrategia sobre todo el histórico con `generate_signals(df)`,
+simula entradas/salidas con TP/SL y ventana de mantenimiento, y calcula
+estadísticas por estrategia y por ticker. Incluye también el voto por
+mayoría de consensus.py (consensus) y las acciones del recommender.
+
+Uso:
+    python backtest.py --days 365 --write-stats
+"""
+
+import argparse
+import math
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import config
+import consensus
+import indicators as ind
+from data import load_cache, cached_tickers, derive_many
+from recommender import decide_actions
+import registry
+from strategy_performance import log_results
+
+TRADE_COLUMNS = [
+    "ticker", "strategy", "direction", "entry_time", "exit_time", "entry",
+    "tp", "sl", "exit", "exit_reason", "bars_held", "pnl", "success",
+]
+
+
+# ============================================================
+# Utilidades
+# ============================================================
+
+def bar_spacing(df) -> pd.Timedelta:
+    """Separación típica entre velas (mediana)."""
+    diffs = df["timestamp"].diff().dropna()
+    return diffs.median() if not diffs.empty else pd.Timedelta(days=1)
+
+
+def hold_window(df, max_hold=config.MAX_HOLD, min_hold_hours=config.MIN_HOLD_HOURS):
+    """
+    Traduce la ventana temporal de la operación a nº de velas:
+    (mínimo de velas antes de poder cerrar, máximo de velas en posición).
+    """
+    spacing = bar_spacing(df)
+    max_bars = max(1, int(max_hold // spacing))
+    min_bars = max(1, math.ceil(pd.Timedelta(hours=min_hold_hours) / spacing))
+    return min(min_bars, max_bars), max_bars
+
+
+def fallback_levels(df, idx, entry, direction):
+    """TP/SL por ATR (config.ATR_MULT_SL y config.RR) para señales que no los traen."""
+    atr = ind.atr(df, config.ATR_LEN).to_numpy()[idx]
+    sl_dist = config.ATR_MULT_SL * atr
+    return entry + direction * config.RR * sl_dist, entry - direction * sl_dist
+
+
+def _future_windows(values, width):
+    """Matriz (n, width) con los valores de las `width` velas siguientes a cada vela."""
+    padded = np.concatenate([values[1:], np.full(width, np.nan)])
+    return sliding_window_view(padded, width)
+
+
+def _first_hit(mask):
+    """Índice de la primera columna True por fila (o el ancho si no hay ninguna)."""
+    width = mask.shape[1]
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), width)
+
+
+# ============================================================
+# Simulación
+# ============================================================
+
+def simulate_trades(df, idx, direction, entry, tp, sl, ticker="", strategy="",
+                    max_bars=None, min_bars=None) -> pd.DataFrame:
+    """
+    Simula de forma vectorizada las operaciones abiertas en las velas `idx`.
+    - direction: +1 largo, -1 corto
+    - Sale por SL o TP (si ambos caen en la misma vela se asume el SL)
+      o por tiempo al cumplirse `max_bars` velas.
+    - No se permite salir antes de `min_bars` velas.
+    Las operaciones que siguen abiertas al final del histórico se descartan.
+    """
+    if len(idx) == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    if max_bars is None or min_bars is None:
+        min_bars, max_bars = hold_window(df)
+
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+    close = df["close"].to_numpy(dtype=float)
+    ts = df["timestamp"].to_numpy()
+    n = len(df)
+
+    wh = _future_windows(high, max_bars)[idx]
+    wl = _future_windows(low, max_bars)[idx]
+    long_ = direction > 0
+    tp_, sl_ = tp[:, None], sl[:, None]
+    tp_hit = np.where(long_[:, None], wh >= tp_, wl <= tp_)
+    sl_hit = np.where(long_[:, None], wl <= sl_, wh >= sl_)
+    early = np.arange(max_bars) < (min_bars - 1)
+    tp_hit[:, early] = False
+    sl_hit[:, early] = False
+
+    first_tp, first_sl = _first_hit(tp_hit), _first_hit(sl_hit)
+    by_sl = (first_sl < max_bars) & (first_sl <= first_tp)
+    by_tp = ~by_sl & (first_tp < max_bars)
+
+    offset = np.where(by_sl, first_sl, np.where(by_tp, first_tp, max_bars - 1))
+    exit_idx = idx + 1 + offset
+    closed = exit_idx < n
+    exit_idx = np.minimum(exit_idx, n - 1)
+    exit_price = np.where(by_sl, sl, np.where(by_tp, tp, close[exit_idx]))
+    pnl = direction * (exit_price - entry) / entry
+
+    trades = pd.DataFrame({
+        "ticker": ticker,
+        "strategy": strategy,
+        "direction": np.where(long_, "long", "short"),
+        "entry_time": ts[idx],
+        "exit_time": ts[exit_idx],
+        "entry": entry,
+        "tp": tp,
+        "sl": sl,
+        "exit": exit_price,
+        "exit_reason": np.select([by_sl, by_tp], ["sl", "tp"], "time"),
+        "bars_held": offset + 1,
+        "pnl": pnl,
+        "success": pnl > 0,
+    })
+    return trades[closed].reset_index(drop=True)
+
+
+def _trades_from_signals(df, sig, ticker, name, start, hold):
+    """Convierte el resultado de `generate_signals` en operaciones simuladas."""
+    side = sig["signal"].to_numpy()
+    direction = np.select([side == "BUY", side == "SELL"], [1, -1], 0)
+    active = (direction != 0) & start
+    idx = np.flatnonzero(active)
+    direction = direction[idx].astype(float)
+
+    entry = sig["entry"].to_numpy(dtype=float)[idx]
+    tp = sig["tp"].to_numpy(dtype=float)[idx]
+    sl = sig["sl"].to_numpy(dtype=float)[idx]
+    fb_tp, fb_sl = fallback_levels(df, idx, entry, direction)
+    missing = ~np.isfinite(tp) | ~np.isfinite(sl)
+    tp = np.where(missing, fb_tp, tp)
+    sl = np.where(missing, fb_sl, sl)
+
+    ok = np.isfinite(entry) & np.isfinite(tp) & np.isfinite(sl)
+    return simulate_trades(df, idx[ok], direction[ok], entry[ok], tp[ok], sl[ok],
+                           ticker=ticker, strategy=name, min_bars=hold[0], max_bars=hold[1])
+
+
+def consensus_colors(frames) -> np.ndarray:
+    """
+    Color final por vela con las reglas de consensus.vote (umbrales de config):
+    verde si ≥2 verdes, amarillo si 1 verde o algún amarillo, rojo si no.
+    Un voto por estrategia: las puntuaciones históricas mirarían al futuro.
+    """
+    colors = np.vstack([f["color"].to_numpy(dtype=object) for f in frames]).T
+    codes = np.select([colors == c for c in consensus.CODES], list(consensus.CODES.values()), consensus.NONE)
+    return consensus.COLOR_NAMES[consensus.vote(codes)].astype(object)
+
+
+def _source_levels(frames, direction):
+    """
+    TP/SL de la primera estrategia (en orden de registro) que dio señal en
+    cada vela con el mismo sentido y niveles definidos; NaN si ninguna.
+    """
+    n = len(frames[0])
+    tp = np.full(n, np.nan)
+    sl = np.full(n, np.nan)
+    side = np.where(direction > 0, "BUY", np.where(direction < 0, "SELL", ""))
+    for f in reversed(frames):
+        usable = (f["signal"].to_numpy() == side) & np.isfinite(f["tp"].to_numpy(dtype=float)) \
+            & np.isfinite(f["sl"].to_numpy(dtype=float))
+        tp = np.where(usable, f["tp"].to_numpy(dtype=float), tp)
+        sl = np.where(usable, f["sl"].to_numpy(dtype=float), sl)
+    return tp, sl
+
+
+def _actions_to_signals(df, frames, direction):
+    """Empaqueta una serie de direcciones (+1/-1/0) como resultado tipo `generate_signals`."""
+    close = df["close"].to_numpy(dtype=float)
+    tp, sl = _source_levels(frames, direction)
+    return pd.DataFrame({
+        "timestamp": df["timestamp"].to_numpy(),
+        "signal": np.select([direction > 0, direction < 0], ["BUY", "SELL"], None),
+        "entry": np.where(direction != 0, close, np.nan),
+        "tp": tp,
+        "sl": sl,
+    }, index=df.index)
+
+
+def backtest_ticker(df, modules, ticker="", days=365, consensus=True, recommender=True):
+    """Backtest de todas las estrategias (y del consenso/recommender) sobre un ticker."""
+    if df is None or len(df) < 3:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    df = df.reset_index(drop=True)
+    ts = df["timestamp"]
+    start = (ts >= ts.iloc[-1] - pd.Timedelta(days=days)).to_numpy() if days else np.ones(len(df), bool)
+    hold = hold_window(df)
+
+    trades, frames = [], []
+    for name, module in modules:
+        try:
+            sig = module.generate_signals(df)
+        except Exception as e:
+            print(f"[Error] {ticker} - {name}: {e}")
+            continue
+        if sig is None:
+            continue
+        frames.append(sig)
+        trades.append(_trades_from_signals(df, sig, ticker, name, start, hold))
+
+    if frames and (consensus or recommender):
+        colors = consensus_colors(frames)
+        if consensus:
+            direction = np.where(colors == "green", 1, 0)
+            sig = _actions_to_signals(df, frames, direction)
+            trades.append(_trades_from_signals(df, sig, ticker, "consensus", start, hold))
+        if recommender:
+            actions = decide_actions(colors, df)
+            direction = np.select([actions == "BUY", actions == "SHORT"], [1, -1], 0)
+            sig = _actions_to_signals(df, frames, direction)
+            trades.append(_trades_from_signals(df, sig, ticker, "recommender", start, hold))
+
+    trades = [t for t in trades if not t.empty]
+    if not trades:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    return pd.concat(trades, ignore_index=True)
+
+
+def load_universe(tickers=None, timeframe=config.STRATEGY_TIMEFRAME) -> dict:
+    """
+    Carga desde data_cache/ el OHLCV de los tickers indicados (o de todos los cacheados)
+    en `timeframe`, derivado de la serie base igual que en los escaneos (data.derive_many).
+    """
+    tickers = tickers or cached_tickers()
+    frames = {}
+    for t in tickers:
+        df = load_cache(t)
+        if df is not None and not df.empty:
+            frames[t] = df
+    return {t: df for t, df in derive_many(frames, timeframe).items() if df is not None and not df.empty}
+
+
+def run_backtest(tickers=None, strategies=None, days=365, consensus=True, recommender=True,
+                 frames=None) -> pd.DataFrame:
+    """
+    Backtest del universo completo. Devuelve una fila por operación simulada.
+    """
+    frames = frames if frames is not None else load_universe(tickers)
+    modules = [(s.name, s) for s in registry.get_strategies(strategies) if s.generate_signals is not None]
+    results = [backtest_ticker(df, modules, ticker, days, consensus, recommender) for ticker, df in frames.items()]
+    results = [r for r in results if not r.empty]
+    if not results:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    return pd.concat(results, ignore_index=True)
+
+
+def summarize(trades: pd.DataFrame, by="strategy") -> pd.DataFrame:
+    """Estadísticas agregadas (nº de operaciones, acierto, PnL medio/total, mejor/peor)."""
+    if trades.empty:
+        return pd.DataFrame()
+    trades = trades.astype({"pnl": float, "success": float, "bars_held": float})
+    return trades.groupby(by).agg(
+        n_trades=("pnl", "size"),
+        win_rate=("success", "mean"),
+        avg_pnl=("pnl", "mean"),
+        total_pnl=("pnl", "sum"),
+        best=("pnl", "max"),
+        worst=("pnl", "min"),
+        avg_bars=("bars_held", "mean"),
+    ).sort_values("avg_pnl", ascending=False)
+
+
+def write_stats(trades: pd.DataFrame) -> None:
+    """Vuelca las operaciones a logs/strategy_stats.csv (timestamp = hora de salida)."""
+    if trades.empty:
+        return
+    log_results(trades.rename(columns={"exit_time": "timestamp"}))
+    print(f"[Backtest] {len(trades)} operaciones registradas en logs/strategy_stats.csv ✅")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest vectorizado sobre data_cache/")
+    parser.add_argument("--tickers", nargs="*", help="Tickers a evaluar (por defecto, todos los cacheados)")
+    parser.add_argument("--days", type=int, default=365, help="Ventana de señales en días (0 = todo)")
+    parser.add_argument("--write-stats", action="store_true", help="Registrar resultados en logs/strategy_stats.csv")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    frames = load_universe(args.tickers)
+    trades = run_backtest(days=args.days, frames=frames)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 60)
+    print(f" 📈 Backtest: {len(frames)} tickers, {len(trades)} operaciones en {elapsed:.2f}s")
+    print("=" * 60)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(summarize(trades, "strategy").round(4))
+        print()
+        print(summarize(trades, "ticker").round(4))
+
+    if args.write_stats:
+        write_stats(trades)
+    return trades
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# benchmark.py
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmarks offline con datos sintéticos (synthetic.py)
+Mide, sin red:
+- generate_signal de cada estrategia registrada (caché de indicadores en frío)
+- recommender.decide_action y run.combine_signals
+- la carga de data_cache/ con cada backend disponible
+- un escaneo completo offline (estrategias + consenso + recommender) a varios tamaños
+Los resultados se guardan en JSON y pueden compararse con una línea base:
+el proceso termina con código 1 si algún caso es más lento que la base
+por encima de la tolerancia.
+
+Uso:
+    python benchmark.py                          # 35, 500 y 5000 tickers
+    python benchmark.py --sizes 35 500 --save-baseline
+    python benchmark.py --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import indicators as ind
+import registry
+import synthetic
+from data import BACKENDS
+from signals import Signal, as_signal
+
+DEFAULT_SIZES = (35, 500, 5000)
+OUTPUT_FILE = os.path.join("logs", "benchmark.json")
+BASELINE_FILE = os.path.join("benchmarks", "baseline.json")
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silencia los print de estrategias y recommender durante la medición."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timeit(func, repeat=5, number=1, setup=None) -> dict:
+    """Tiempo por llamada (mediana y mejor de `repeat` rondas de `number` llamadas)."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        with _quiet():
+            for _ in range(number):
+                func()
+        times.append((time.perf_counter() - t0) / number)
+    return {"seconds": float(np.median(times)), "best": float(min(times)), "repeat": repeat, "number": number}
+
+
+# ============================================================
+# Casos
+# ============================================================
+
+def bench_strategies(df, repeat) -> dict:
+    out = {}
+    for spec in registry.get_strategies():
+        out[f"strategy.{spec.name}"] = timeit(lambda: spec.generate_signal(df), repeat,
+                                              setup=ind.ENGINE.clear)
+    return out
+
+
+def _sample_signals(df):
+    with _quiet():
+        signals = []
+        for spec in registry.get_strategies():
+            s = as_signal(spec.generate_signal(df), spec.name, "SYN")
+            if s:
+                signals.append(s)
+    if not signals:
+        signals.append(Signal(df["timestamp"].iloc[-1], "BUY", strategy="synthetic", ticker="SYN"))
+    return signals
+
+
+def bench_decisions(df, repeat) -> dict:
+    from run import combine_signals
+    from recommender import decide_action
+
+    signals = _sample_signals(df)
+    final = combine_signals(signals).replace(ticker="SYN")
+    return {
+        "combine_signals": timeit(lambda: combine_signals(signals), repeat, number=200),
+        "decide_action": timeit(lambda: decide_action(final, df), repeat, number=50, setup=ind.ENGINE.clear),
+    }
+
+
+def bench_cache(frames, repeat) -> dict:
+    out = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for name in BACKENDS:
+            try:
+                backend = BACKENDS[name](os.path.join(folder, name))
+            except ImportError:
+                continue
+            for t, df in frames.items():
+                backend.save(t, df)
+            tickers = list(frames)
+            out[f"cache.load.{name}"] = timeit(lambda: [backend.load(t) for t in tickers], repeat)
+            out[f"cache.load.{name}"]["tickers"] = len(tickers)
+    return out
+
+
+def offline_scan(frames) -> int:
+    """Escaneo como el de run.py (sin red, estado ni Telegram). Devuelve el nº de acciones."""
+    from run import combine_signals, evaluate_universe
+    from recommender import decide_action
+
+    actions = 0
+    for ticker, signals, _, _ in evaluate_universe(list(frames), frames, "sequential"):
+        final = combine_signals(signals)
+        if final:
+            final.ticker = ticker
+            actions += decide_action(final, frames[ticker]) != "NONE"
+    return actions
+
+
+def bench_scan(sizes, bars, seed, repeat) -> dict:
+    out = {}
+    for size in sizes:
+        frames = synthetic.generate_universe(size, bars, seed)
+        rounds = repeat if size <= 500 else 1
+        result = timeit(lambda: offline_scan(frames), rounds, setup=ind.ENGINE.clear)
+        result["tickers"] = size
+        result["per_ticker"] = result["seconds"] / size
+        out[f"scan.{size}"] = result
+        print(f"[Bench] scan {size} tickers: {result['seconds']:.2f}s")
+        del frames
+        ind.ENGINE.clear()
+    return out
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, bars=500, seed=0, repeat=5) -> dict:
+    df = synthetic.generate_ohlcv(bars, seed=seed)
+    results = {}
+    results.update(bench_strategies(df, repeat))
+    results.update(bench_decisions(df, repeat))
+    results.update(bench_cache(synthetic.generate_universe(35, bars, seed), repeat))
+    results.update(bench_scan(sizes, bars, seed, repeat))
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "bars": bars,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+# ============================================================
+# Comparación con la línea base
+# ============================================================
+
+def compare(current: dict, baseline: dict, tolerance=0.25, min_delta=0.001) -> list:
+    """
+    Casos más lentos que la base en más de `tolerance` (relativo) y `min_delta` segundos.
+    Devuelve [(caso, segundos_base, segundos_actuales, ratio)].
+    """
+    slower = []
+    base = baseline.get("results", {})
+    for name, res in current.get("results", {}).items():
+        if name not in base:
+            continue
+        old, new = base[name]["seconds"], res["seconds"]
+        if new > old * (1 + tolerance) and new - old > min_delta:
+            slower.append((name, old, new, new / old if old else float("inf")))
+    return slower
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as fh:
+        json.dump(data, fh, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline con datos sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES),
+                        help="Tamaños del universo para el escaneo completo")
+    parser.add_argument("--bars", type=int, default=500, help="Velas por ticker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Línea base con la que comparar")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar estos resultados como línea base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Margen relativo antes de fallar")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.bars, args.seed, args.repeat)
+    _write_json(args.output, report)
+
+    print("=" * 60)
+    print(" ⏱️ Benchmarks")
+    print("=" * 60)
+    for name, res in report["results"].items():
+        print(f"{name:<32} {res['seconds'] * 1000:>10.3f} ms")
+    print(f"[Bench] Resultados guardados en {args.output}")
+
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+        print(f"[Bench] Línea base guardada en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[Bench] Sin línea base en {args.baseline}; nada que comparar.")
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    slower = compare(report, baseline, args.tolerance)
+    if not slower:
+        print(f"[Bench] ✅ Sin regresiones respecto a {args.baseline} (tolerancia {args.tolerance:.0%})")
+        return 0
+    print(f"[Bench] ❌ {len(slower)} casos más lentos que la línea base:")
+    for name, old, new, ratio in slower:
+        print(f"  {name:<32} {old * 1000:>10.3f} ms → {new * 1000:>10.3f} ms (x{ratio:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# candles.py
+# -*- coding: utf-8 -*-
+"""
+🕯️ Patrones de velas vectorizados
+Cada patrón devuelve un array booleano sobre todo el histórico de un ticker
+(forma (T,)) o de todo el panel (forma (T, N), eje 0 = tiempo).
+Las columnas base (cuerpo, rango, sombras) se calculan una sola vez y se
+reutilizan entre patrones; sobre un DataFrame salen del motor de indicadores,
+así que también se comparten entre estrategias del mismo escaneo.
+
+Uso:
+    c = Candles.from_frame(df)          # o Candles.from_panel(panel)
+    c.strong(0.7), c.bullish_engulfing(), c.doji(), c.inside_bar()
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+import indicators as ind
+
+
+def _shift(x, k=1):
+    """Desplaza `k` filas hacia abajo en el eje temporal, rellenando con NaN."""
+    out = np.full(x.shape, np.nan)
+    if k < len(x):
+        out[k:] = x[:len(x) - k]
+    return out
+
+
+class Candles:
+    """Columnas OHLC de uno o varios tickers y los patrones de vela sobre ellas."""
+
+    def __init__(self, open_, high, low, close, df=None, engine=None):
+        self.open = np.asarray(open_, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.close = np.asarray(close, dtype=float)
+        self._df = df
+        self._engine = engine
+
+    @classmethod
+    def from_frame(cls, df, engine=None) -> "Candles":
+        """Velas de un DataFrame OHLC; cuerpo, rango y sombras se memoizan en el motor."""
+        return cls(df["open"].to_numpy(dtype=float), df["high"].to_numpy(dtype=float),
+                   df["low"].to_numpy(dtype=float), df["close"].to_numpy(dtype=float),
+                   df=df, engine=engine or ind.ENGINE)
+
+    @classmethod
+    def from_panel(cls, p) -> "Candles":
+        """Velas de un panel.Panel (arrays (T, N))."""
+        return cls(p.open, p.high, p.low, p.close)
+
+    def _column(self, name, compute):
+        if self._df is not None:
+            return self._engine.get(self._df, name).to_numpy()
+        return compute()
+
+    # ------------------------------------------------------------
+    # Columnas base
+    # ------------------------------------------------------------
+    @cached_property
+    def body(self):
+        """|close - open|"""
+        return self._column("candle_body", lambda: np.abs(self.close - self.open))
+
+    @cached_property
+    def range(self):
+        """high - low"""
+        return self._column("candle_range", lambda: self.high - self.low)
+
+    @cached_property
+    def upper_shadow(self):
+        """high - max(open, close)"""
+        return self._column("upper_shadow", lambda: self.high - np.maximum(self.open, self.close))
+
+    @cached_property
+    def lower_shadow(self):
+        """min(open, close) - low"""
+        return self._column("lower_shadow", lambda: np.minimum(self.open, self.close) - self.low)
+
+    @cached_property
+    def body_ratio(self):
+        """Cuerpo / rango (inf o NaN cuando el rango es 0)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.body / self.range
+
+    @cached_property
+    def bullish(self):
+        return self.close > self.open
+
+    @cached_property
+    def bearish(self):
+        return self.close < self.open
+
+    @cached_property
+    def prev_open(self):
+        return _shift(self.open)
+
+    @cached_property
+    def prev_close(self):
+        return _shift(self.close)
+
+    @cached_property
+    def prev_high(self):
+        return _shift(self.high)
+
+    @cached_property
+    def prev_low(self):
+        return _shift(self.low)
+
+    # ------------------------------------------------------------
+    # Patrones de una vela
+    # ------------------------------------------------------------
+    def strong(self, threshold=0.7):
+        """Vela decisiva: rango > 0 y cuerpo/rango > umbral."""
+        return (self.range > 0) & (self.body_ratio > threshold)
+
+    def doji(self, max_ratio=0.1):
+        """Cuerpo casi nulo: cuerpo/rango <= max_ratio."""
+        return (self.range > 0) & (self.body_ratio <= max_ratio)
+
+    def hammer(self, shadow_mult=2.0, max_upper=0.25):
+        """Martillo: sombra inferior >= shadow_mult·cuerpo y sombra superior corta."""
+        return (self.range > 0) & (self.lower_shadow >= shadow_mult * self.body) \
+            & (self.upper_shadow <= max_upper * self.range) & (self.body > 0)
+
+    def shooting_star(self, shadow_mult=2.0, max_lower=0.25):
+        """Estrella fugaz: el martillo invertido."""
+        return (self.range > 0) & (self.upper_shadow >= shadow_mult * self.body) \
+            & (self.lower_shadow <= max_lower * self.range) & (self.body > 0)
+
+    # ------------------------------------------------------------
+    # Patrones de dos velas
+    # ------------------------------------------------------------
+    def bullish_engulfing(self):
+        """Vela alcista cuyo cuerpo envuelve el de la vela bajista anterior."""
+        o, c, po, pc = self.open, self.close, self.prev_open, self.prev_close
+        return (c > o) & (pc < po) & (c > po) & (o < pc)
+
+    def bearish_engulfing(self):
+        """Vela bajista cuyo cuerpo envuelve el de la vela alcista anterior."""
+        o, c, po, pc = self.open, self.close, self.prev_open, self.prev_close
+        return (c < o) & (pc > po) & (o > pc) & (c < po)
+
+    def inside_bar(self):
+        """Máximo y mínimo dentro del rango de la vela anterior."""
+        return (self.high < self.prev_high) & (self.low > self.prev_low)
+
+    def outside_bar(self):
+        """Máximo y mínimo fuera del rango de la vela anterior."""
+        return (self.high > self.prev_high) & (self.low < self.prev_low)
+
+
+# nombre → patrón con sus parámetros por defecto
+PATTERNS = {
+    "strong": Candles.strong,
+    "doji": Candles.doji,
+    "hammer": Candles.hammer,
+    "shooting_star": Candles.shooting_star,
+    "bullish_engulfing": Candles.bullish_engulfing,
+    "bearish_engulfing": Candles.bearish_engulfing,
+    "inside_bar": Candles.inside_bar,
+    "outside_bar": Candles.outside_bar,
+}
+
+
+def detect(candles: Candles, names=None) -> dict:
+    """{patrón: array booleano} para los patrones indicados (todos por defecto)."""
+    return {n: PATTERNS[n](candles) for n in (names or PATTERNS)}
@@ -8,6 +8,11 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', 'PON_AQUI_TU_CHAT_ID')
 # Si publicas en un tema concreto de un supergrupo, pon el thread/topic id (entero)
 TELEGRAM_THREAD_ID = os.getenv('TELEGRAM_THREAD_ID')
 TELEGRAM_THREAD_ID = int(TELEGRAM_THREAD_ID) if TELEGRAM_THREAD_ID and TELEGRAM_THREAD_ID.isdigit() else None
+# Alertas agrupadas: tamaño máximo de mensaje, segundos acumulando antes de enviar
+# y plazo máximo para vaciar la cola al terminar el escaneo
+TELEGRAM_MAX_CHARS = 4096
+TELEGRAM_LINGER_SEC = float(os.getenv('TELEGRAM_LINGER_SEC', '5'))
+TELEGRAM_FLUSH_TIMEOUT = float(os.getenv('TELEGRAM_FLUSH_TIMEOUT', '30'))
 
 # ===== Universo =====
 DEFAULT_UNIVERSE = [
@@ -18,6 +23,95 @@ DEFAULT_UNIVERSE = [
 ]
 UNIVERSE_FILE = os.getenv('UNIVERSE_FILE', 'tickers_ibex.txt')
 
+# ===== Escaneo por fragmentos (run.py --sharded) =====
+# Tickers por fragmento y fichero de progreso para reanudar los que fallen (--resume)
+SHARD_SIZE = int(os.getenv('SHARD_SIZE', '200'))
+SHARD_CHECKPOINT = os.getenv('SHARD_CHECKPOINT', 'logs/scan_checkpoint.json')
+
+# ===== Pre-filtro del universo (prescreen.py) =====
+PRESCREEN = os.getenv('PRESCREEN', 'True').lower() == 'true'
+# Banda de precio del último cierre (PRICE_MAX=0 desactiva el tope)
+PRICE_MIN = float(os.getenv('PRICE_MIN', '0'))
+PRICE_MAX = float(os.getenv('PRICE_MAX', '10'))
+# Liquidez media de las últimas PRESCREEN_WINDOW velas: acciones y efectivo (0 = sin mínimo)
+PRESCREEN_WINDOW = int(os.getenv('PRESCREEN_WINDOW', '20'))
+PRESCREEN_MIN_VOLUME = float(os.getenv('PRESCREEN_MIN_VOLUME', '10000'))
+PRESCREEN_MIN_TURNOVER = float(os.getenv('PRESCREEN_MIN_TURNOVER', '0'))
+# Antigüedad máxima de la última vela
+PRESCREEN_MAX_AGE = timedelta(days=int(os.getenv('PRESCREEN_MAX_AGE_DAYS', '5')))
+
+# ===== Descarga de datos =====
+# Nº de símbolos por llamada a yf.download en las descargas por lotes
+DOWNLOAD_BATCH_SIZE = int(os.getenv('DOWNLOAD_BATCH_SIZE', '20'))
+# Conexiones simultáneas por lote de descarga
+DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '4'))
+
+# ===== Proveedor de datos (providers.py) =====
+# yfinance, yahoo_chart (API chart v8 directa), cache (directorio local) o synthetic
+DATA_PROVIDER = os.getenv('DATA_PROVIDER', 'yfinance')
+# Base de la API chart; p. ej. http://127.0.0.1:8765 para el servidor de pruebas fake_yahoo.py
+YAHOO_CHART_URL = os.getenv('YAHOO_CHART_URL', 'https://query2.finance.yahoo.com')
+PROVIDER_CACHE_DIR = os.getenv('PROVIDER_CACHE_DIR', 'data_cache')
+SYNTHETIC_SEED = int(os.getenv('SYNTHETIC_SEED', '0'))
+SYNTHETIC_EPOCH = os.getenv('SYNTHETIC_EPOCH', '2024-01-01')
+
+# ===== Peticiones HTTP salientes =====
+# Ritmo por host: (peticiones/s sostenidas, ráfaga máxima)
+YAHOO_HOST = 'query2.finance.yahoo.com'
+YAHOO_RATE = float(os.getenv('YAHOO_RATE', '2'))
+TELEGRAM_RATE = float(os.getenv('TELEGRAM_RATE', '1'))
+HTTP_RATES = {
+    YAHOO_HOST: (YAHOO_RATE, 5),
+    'query1.finance.yahoo.com': (YAHOO_RATE, 5),
+    'api.telegram.org': (TELEGRAM_RATE, 3),
+}
+HTTP_DEFAULT_RATE = (5.0, 10)
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '4'))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.5'))
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '30'))
+# Circuit breaker: fallos seguidos antes de abrir y segundos en cuarentena
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', '5'))
+BREAKER_RESET_SEC = float(os.getenv('BREAKER_RESET_SEC', '60'))
+# Antigüedad máxima de la cache antes de pedir velas nuevas, y solape al refrescar
+CACHE_MAX_AGE = timedelta(minutes=int(os.getenv('CACHE_MAX_AGE_MIN', '30')))
+CACHE_OVERLAP = timedelta(days=int(os.getenv('CACHE_OVERLAP_DAYS', '3')))
+# Formato de data_cache/: npy (binario, sin dependencias), parquet (requiere pyarrow) o csv
+CACHE_FORMAT = os.getenv('CACHE_FORMAT', 'npy')
+# Serie base que se descarga y cachea (una por ticker) y marco temporal que ven las
+# estrategias; los marcos 1h/4h/1d/1w se derivan en local de la base (data.load_timeframe)
+BASE_INTERVAL = os.getenv('BASE_INTERVAL', '1d')
+BASE_PERIOD = os.getenv('BASE_PERIOD', '12mo')
+STRATEGY_TIMEFRAME = os.getenv('STRATEGY_TIMEFRAME', '1d')
+
+# ===== Estado de posiciones =====
+# csv (positions_state.csv, escritura atómica) o sqlite (base embebida en modo WAL)
+POSITIONS_BACKEND = os.getenv('POSITIONS_BACKEND', 'csv')
+POSITIONS_DB = os.getenv('POSITIONS_DB', 'positions_state.sqlite')
+
+# ===== Puntuación de estrategias =====
+# Semivida (en operaciones) de las medias exponenciales y tamaño de las ventanas
+SCORE_HALFLIFE = float(os.getenv('SCORE_HALFLIFE', '20'))
+SCORE_WINDOW_TRADES = int(os.getenv('SCORE_WINDOW_TRADES', '50'))
+SCORE_WINDOW_DAYS = int(os.getenv('SCORE_WINDOW_DAYS', '30'))
+
+# ===== Consenso entre estrategias (consensus.py) =====
+# Votos necesarios: verde con >= CONSENSUS_GREEN verdes; amarillo con >= CONSENSUS_YELLOW_GREEN
+# verdes o >= CONSENSUS_YELLOW amarillos; rojo si no
+CONSENSUS_GREEN = float(os.getenv('CONSENSUS_GREEN', '2'))
+CONSENSUS_YELLOW_GREEN = float(os.getenv('CONSENSUS_YELLOW_GREEN', '1'))
+CONSENSUS_YELLOW = float(os.getenv('CONSENSUS_YELLOW', '1'))
+# equal (un voto por estrategia) o scores (puntuación de strategy_performance, normalizada a media 1)
+CONSENSUS_WEIGHTS = os.getenv('CONSENSUS_WEIGHTS', 'equal')
+CONSENSUS_SCORE_WINDOW = os.getenv('CONSENSUS_SCORE_WINDOW', 'all')
+
+# ===== Métricas =====
+# off (sin coste), json (logs/metrics.json) o prometheus (json + formato texto de Prometheus)
+METRICS_MODE = os.getenv('METRICS', 'json')
+METRICS_FILE = os.getenv('METRICS_FILE', 'logs/metrics.json')
+METRICS_PROM_FILE = os.getenv('METRICS_PROM_FILE', 'logs/metrics.prom')
+# Tabla de señales del último escaneo (ticker × estrategia): .csv o .parquet; vacío = no se guarda
+SCAN_RESULT_FILE = os.getenv('SCAN_RESULT_FILE', 'logs/scan_signals.csv')
+
 # ===== Presupuesto y riesgo =====
 BUDGET = float(os.getenv('BUDGET', '10000'))
 MAX_RISK_FRACTION = float(os.getenv('MAX_RISK_FRACTION', '0.01'))
@@ -45,4 +139,13 @@ TIMEZONE = os.getenv('TIMEZONE') or 'Europe/Madrid'
 MARKET_OPEN = "09:00"
 MARKET_CLOSE = "22:00"
 
+# ===== Modo daemon (run.py --daemon) =====
+# Segundos de espera tras el cierre de cada vela antes de pedirla (Yahoo tarda en publicarla)
+LIVE_DELAY_SEC = float(os.getenv('LIVE_DELAY_SEC', '20'))
+# Velas que se mantienen en memoria por ticker y histórico inicial a descargar
+LIVE_WINDOW = int(os.getenv('LIVE_WINDOW', '300'))
+LIVE_PERIOD = os.getenv('LIVE_PERIOD', '30d')
+# Estado de los indicadores online por ticker (streaming.py), persistido entre ejecuciones
+LIVE_STATE_FILE = os.getenv('LIVE_STATE_FILE', 'data_cache/live_indicators.json')
+
 DRY_RUN = os.getenv('DRY_RUN', 'True').lower() == 'true'
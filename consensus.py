@@ -0,0 +1,203 @@
+# consensus.py
+# -*- coding: utf-8 -*-
+"""
+🗳️ Consenso entre estrategias como operación de matrices
+Todo el escaneo se convierte en una matriz ticker × estrategia con el color de
+cada señal, y el color final de todos los tickers sale de un solo producto
+matriz·pesos:
+- verde si los votos verdes suman >= CONSENSUS_GREEN (la regla clásica de "≥2 verdes")
+- amarillo si los verdes suman >= CONSENSUS_YELLOW_GREEN o los amarillos >= CONSENSUS_YELLOW
+- rojo en otro caso
+Con CONSENSUS_WEIGHTS=scores cada voto pesa según strategy_performance.get_strategy_scores,
+normalizado a media 1 (las estrategias sin histórico votan con peso 1), así que los
+umbrales se leen igual: "el peso de dos estrategias medias".
+
+La señal fuente de cada ticker es la más reciente; a igual timestamp gana la
+estrategia que va antes en el registro (PRIORITY y nombre), sea cual sea el
+orden en que llegaron las señales.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import registry
+from config import (CONSENSUS_GREEN, CONSENSUS_YELLOW_GREEN, CONSENSUS_YELLOW, CONSENSUS_WEIGHTS,
+                    CONSENSUS_SCORE_WINDOW)
+
+# Códigos de color en la matriz (0 = la estrategia no dio señal)
+NONE, GREEN, YELLOW, RED = 0, 1, 2, 3
+CODES = {"green": GREEN, "yellow": YELLOW, "red": RED}
+COLOR_NAMES = np.array([None, "green", "yellow", "red"], dtype=object)
+_NAT = np.iinfo(np.int64).min
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Umbrales de voto (en votos ponderados)."""
+    green: float = CONSENSUS_GREEN
+    yellow_green: float = CONSENSUS_YELLOW_GREEN
+    yellow: float = CONSENSUS_YELLOW
+
+
+@dataclass
+class Ballot:
+    """Matriz de votos de un escaneo (filas = tickers, columnas = estrategias en orden del registro)."""
+    tickers: list
+    strategies: list
+    codes: np.ndarray       # (N, S) int8 con NONE/GREEN/YELLOW/RED
+    stamps: np.ndarray      # (N, S) int64, ns UTC de cada señal (mínimo int64 si no hay)
+    rows: np.ndarray        # (N, S) int64, fila de la tabla de origen (-1 si no hay)
+
+
+# ============================================================
+# Núcleo vectorizado
+# ============================================================
+
+def strategy_order(names) -> list:
+    """Estrategias en orden del registro; las desconocidas al final por nombre."""
+    rank = {n: i for i, n in enumerate(registry.names())}
+    return sorted(set(names), key=lambda n: (rank.get(n, len(rank)), n))
+
+
+def strategy_weights(strategies, mode=CONSENSUS_WEIGHTS, scores=None, window=CONSENSUS_SCORE_WINDOW) -> np.ndarray:
+    """
+    Peso del voto de cada estrategia: 'equal' (1 cada una) o 'scores'
+    (get_strategy_scores normalizadas a media 1; sin puntuación → 1).
+    """
+    weights = np.ones(len(strategies))
+    if mode == "equal":
+        return weights
+    if mode != "scores":
+        raise ValueError(f"Pesos de consenso desconocidos: {mode} (opciones: equal, scores)")
+    if scores is None:
+        from strategy_performance import get_strategy_scores
+        scores = get_strategy_scores(window)
+    known = [scores[s] for s in strategies if s in scores]
+    mean = float(np.mean(known)) if known else 0.0
+    if mean <= 0:
+        return weights
+    for i, s in enumerate(strategies):
+        if s in scores:
+            weights[i] = max(0.0, scores[s]) / mean
+    return weights
+
+
+def _weights(strategies, weights=None) -> np.ndarray:
+    """Pesos alineados con `strategies` a partir de un dict (o los de CONSENSUS_WEIGHTS)."""
+    if weights is None:
+        return strategy_weights(strategies)
+    return np.array([float(weights.get(s, 1.0)) for s in strategies])
+
+
+def vote(codes, weights=None, rule=None) -> np.ndarray:
+    """Color final (código) de cada fila de `codes` (N, S) con los pesos (S,) y umbrales dados."""
+    rule = rule or Rule()
+    codes = np.asarray(codes)
+    weights = np.ones(codes.shape[-1]) if weights is None else np.asarray(weights, dtype=float)
+    greens = (codes == GREEN) @ weights
+    yellows = (codes == YELLOW) @ weights
+    return np.select([greens >= rule.green - _EPS,
+                      (greens >= rule.yellow_green - _EPS) | (yellows >= rule.yellow - _EPS)],
+                     [GREEN, YELLOW], RED).astype(np.int8)
+
+
+def pick_source(codes, stamps) -> np.ndarray:
+    """
+    Columna de la señal fuente de cada fila: la de timestamp más reciente entre
+    las que dieron señal; en empate, la primera columna (orden del registro).
+    -1 si la fila no tiene ninguna señal con timestamp.
+    """
+    eligible = (np.asarray(codes) != NONE) & (stamps != _NAT)
+    key = np.where(eligible, stamps, _NAT)
+    best = key.max(axis=1, initial=_NAT)
+    winner = eligible & (key == best[:, None])
+    if not winner.shape[1]:
+        return np.full(winner.shape[0], -1)
+    return np.where(winner.any(axis=1), winner.argmax(axis=1), -1)
+
+
+# ============================================================
+# Escaneo completo (ScanResult)
+# ============================================================
+
+def ballot(table, tickers=None) -> Ballot:
+    """Matriz de votos a partir de un signals.ScanResult (`tickers` fija filas y orden)."""
+    df = table.frame
+    tickers = list(pd.unique(df["ticker"])) if tickers is None else list(tickers)
+    strategies = strategy_order(df["strategy"])
+    shape = (len(tickers), len(strategies))
+    codes = np.zeros(shape, dtype=np.int8)
+    stamps = np.full(shape, _NAT, dtype=np.int64)
+    rows = np.full(shape, -1, dtype=np.int64)
+
+    r = pd.Index(tickers).get_indexer(df["ticker"])
+    c = pd.Index(strategies).get_indexer(df["strategy"])
+    ok = r >= 0
+    r, c = r[ok], c[ok]
+    codes[r, c] = df["color"].map(CODES).fillna(NONE).to_numpy(dtype=np.int8)[ok]
+    stamps[r, c] = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("i8")[ok]
+    rows[r, c] = np.flatnonzero(ok)
+    return Ballot(tickers, strategies, codes, stamps, rows)
+
+
+def combine(table, tickers=None, weights=None, rule=None) -> pd.DataFrame:
+    """
+    Consenso de todo el escaneo (`weights`: {estrategia: peso}, por defecto según
+    CONSENSUS_WEIGHTS). DataFrame indexado por ticker con:
+    color final, estrategia y fila (en table.frame) de la señal fuente,
+    y votos verdes/amarillos ponderados. Tickers sin señal con timestamp: color None, row -1.
+    """
+    b = ballot(table, tickers)
+    w = _weights(b.strategies, weights)
+    final = vote(b.codes, w, rule)
+    source = pick_source(b.codes, b.stamps)
+    has = source >= 0
+    idx = np.arange(len(b.tickers))
+    # Columna extra para source = -1 (sin señal): estrategia None, fila -1
+    strategies = np.array(b.strategies + [None], dtype=object)
+    rows = np.hstack([b.rows, np.full((len(b.tickers), 1), -1)])
+    return pd.DataFrame({
+        "color": np.where(has, COLOR_NAMES[final], None),
+        "strategy": strategies[source],
+        "row": rows[idx, source],
+        "green_votes": (b.codes == GREEN) @ w,
+        "yellow_votes": (b.codes == YELLOW) @ w,
+    }, index=pd.Index(b.tickers, name="ticker"))
+
+
+def final_signals(table, tickers=None, weights=None, rule=None) -> dict:
+    """{ticker: Signal final} (copia de la señal fuente con el color de consenso)."""
+    out = combine(table, tickers, weights, rule)
+    out = out[out["row"] >= 0]
+    return {t: table.signal(row).replace(color=color, ticker=t)
+            for t, row, color in zip(out.index, out["row"], out["color"])}
+
+
+# ============================================================
+# Un solo ticker (modo daemon, workers)
+# ============================================================
+
+def combine_signals(signals, weights=None, rule=None):
+    """
+    Consenso de las señales de un ticker con las mismas reglas que `combine`.
+    `weights`: {estrategia: peso}; por defecto según CONSENSUS_WEIGHTS.
+    Devuelve una copia de la señal fuente con el color final, o None.
+    """
+    signals = [s for s in signals if s]
+    if not signals:
+        return None
+    # Una columna por señal, en orden del registro (el orden de llegada no influye)
+    rank = {n: i for i, n in enumerate(strategy_order(s.strategy for s in signals))}
+    signals = sorted(signals, key=lambda s: rank[s.strategy])
+    codes = np.array([[CODES.get(s.color, NONE) for s in signals]], dtype=np.int8)
+    stamps = np.array([[s.timestamp.value if s.timestamp is not None else _NAT for s in signals]], dtype=np.int64)
+    names = [s.strategy for s in signals]
+    source = pick_source(codes, stamps)[0]
+    if source < 0:
+        return None
+    unique = _weights(list(rank), weights)
+    final = vote(codes, unique[[rank[n] for n in names]], rule)[0]
+    return signals[source].replace(color=COLOR_NAMES[final])
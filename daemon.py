@@ -0,0 +1,241 @@
+# daemon.py
+# -*- coding: utf-8 -*-
+"""
+🛰️ Modo daemon: escáner en vivo de velas intradía
+Se mantiene en marcha durante la sesión MARKET_OPEN–MARKET_CLOSE (TIMEZONE)
+y se despierta al cierre de cada vela de config.INTERVAL:
+- pide solo las velas nuevas de cada símbolo (desde la última que tiene; los
+  símbolos con la misma última vela se piden en el mismo lote)
+- las añade a los DataFrames en memoria, recortados a LIVE_WINDOW velas, de
+  modo que el recálculo por vela no crece con el histórico
+- evalúa solo los tickers que han cerrado vela y envía las alertas
+- mantiene los indicadores online de streaming.py (O(1) por vela), de los que
+  el recommender lee tendencia y RSI, y guarda su estado en LIVE_STATE_FILE,
+  de modo que al reiniciar solo se reproducen las velas posteriores a la última
+  procesada
+Procesos, imports, caches, sesiones HTTP y cola de Telegram quedan calientes
+entre velas.
+
+Uso:
+    python run.py --daemon            # hasta el cierre de la sesión de hoy
+    python run.py --daemon --forever  # también las sesiones siguientes
+"""
+
+import time
+import pandas as pd
+
+import metrics
+import recommender
+import registry
+import streaming
+from config import (INTERVAL, TIMEZONE, MARKET_OPEN, MARKET_CLOSE,
+                    LIVE_DELAY_SEC, LIVE_WINDOW, LIVE_PERIOD, LIVE_STATE_FILE)
+from data import fetch_bars, merge_bars
+from notifier import flush_alerts
+from positions_state import load_positions
+
+UNITS = {"m": "min", "h": "h", "d": "D", "wk": "W"}
+
+
+def interval_delta(interval=INTERVAL) -> pd.Timedelta:
+    """Duración de una vela a partir del intervalo de yfinance ('30m', '1h', '1d'...)."""
+    for suffix in sorted(UNITS, key=len, reverse=True):
+        if interval.endswith(suffix) and interval[:-len(suffix)].isdigit():
+            return pd.Timedelta(int(interval[:-len(suffix)]), unit=UNITS[suffix])
+    raise ValueError(f"Intervalo no soportado: {interval}")
+
+
+def session_bounds(day, tz=TIMEZONE, open_=MARKET_OPEN, close=MARKET_CLOSE):
+    """(apertura, cierre) de la sesión del día `day` en hora local."""
+    day = pd.Timestamp(day).strftime("%Y-%m-%d")
+    return pd.Timestamp(f"{day} {open_}", tz=tz), pd.Timestamp(f"{day} {close}", tz=tz)
+
+
+def bar_closes(day, delta, tz=TIMEZONE) -> list:
+    """Horas de cierre de las velas de la sesión (la última coincide con el cierre de mercado)."""
+    start, end = session_bounds(day, tz)
+    closes = []
+    t = start + delta
+    while t < end:
+        closes.append(t)
+        t += delta
+    closes.append(end)
+    return closes
+
+
+def next_bar_close(now, delta, tz=TIMEZONE):
+    """Próximo cierre de vela posterior a `now` (saltando fines de semana)."""
+    now = pd.Timestamp(now).tz_convert(tz)
+    day = now.normalize()
+    for _ in range(8):
+        if day.weekday() < 5:
+            for t in bar_closes(day, delta, tz):
+                if t > now:
+                    return t
+        day += pd.Timedelta(days=1)
+    raise RuntimeError("No se encontró el siguiente cierre de vela")
+
+
+def _localize(df, tz=TIMEZONE):
+    if df["timestamp"].dt.tz is None:
+        df = df.assign(timestamp=df["timestamp"].dt.tz_localize(tz))
+    return df
+
+
+class LiveScanner:
+    """Escáner residente: un ciclo completo (descarga → estrategias → alertas) por cierre de vela."""
+
+    def __init__(self, tickers, interval=INTERVAL, executor="thread", workers=None,
+                 window=LIVE_WINDOW, delay=LIVE_DELAY_SEC, tz=TIMEZONE, state_file=LIVE_STATE_FILE):
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.delta = interval_delta(interval)
+        self.executor = executor
+        self.workers = workers
+        self.window = window
+        self.delay = delay
+        self.tz = tz
+        self.state_file = state_file
+        self.frames = {}
+        self.streams = {}
+        self.positions = None
+
+    # ------------------------------------------------------------
+    # Datos
+    # ------------------------------------------------------------
+    def warm_up(self):
+        """Carga inicial del histórico intradía, estrategias y estado de posiciones."""
+        registry.discover()
+        self.positions = load_positions()
+        with metrics.timer("live_warm_up"):
+            frames, failures = fetch_bars(self.tickers, self.interval, period=LIVE_PERIOD)
+        self.frames = {t: _localize(df).tail(self.window).reset_index(drop=True) for t, df in frames.items()}
+        print(f"[Daemon] {len(self.frames)} tickers cargados ({self.interval}), {len(failures)} sin datos")
+        with metrics.timer("live_stream_warm_up"):
+            self.warm_streams()
+
+    def warm_streams(self):
+        """
+        Recupera el estado online guardado y reproduce solo las velas posteriores;
+        si no hay estado, es de otro plan de indicadores o deja un hueco, se
+        reconstruye con la ventana en memoria.
+        """
+        plan = registry.indicator_plan() + [k for k in recommender.INDICATORS if k not in registry.indicator_plan()]
+        keys = [k for k in plan if streaming.supported(k)]
+        saved = streaming.load_states(self.state_file)
+        resumed = 0
+        for t, df in self.frames.items():
+            state = saved.get(t)
+            first = str(df["timestamp"].iloc[0]) if not df.empty else None
+            if state is not None and state.keys == keys and state.last_timestamp and first \
+                    and state.last_timestamp >= first:
+                state.update_frame(df, since=state.last_timestamp)
+                resumed += 1
+            else:
+                state = streaming.OnlineIndicators.from_frame(keys, df)
+            self.streams[t] = state
+        print(f"[Daemon] Indicadores online: {resumed} reanudados, {len(self.streams) - resumed} reconstruidos")
+
+    def last_values(self, ticker):
+        """Últimos valores de recommender.INDICATORS según el estado online (None si no lo hay)."""
+        state = self.streams.get(ticker)
+        if state is None or not all(k in state.routes for k in recommender.INDICATORS):
+            return None
+        return {k: state.value(k) for k in recommender.INDICATORS}
+
+    def save_streams(self):
+        if self.streams:
+            streaming.save_states(self.streams, self.state_file)
+
+    def _since_groups(self, close_time) -> dict:
+        """
+        {inicio: [tickers]}: cada ticker pide desde su propia última vela (un ticker
+        rezagado no amplía la descarga de los demás); los que coinciden van juntos.
+        """
+        default = close_time - self.delta * self.window
+        groups = {}
+        for t in self.tickers:
+            df = self.frames.get(t)
+            since = df["timestamp"].iloc[-1] if df is not None and not df.empty else default
+            groups.setdefault(since, []).append(t)
+        return groups
+
+    def refresh(self, close_time) -> list:
+        """
+        Pide las velas posteriores a la última conocida y añade las ya cerradas
+        a `close_time`. Devuelve los tickers que tienen vela nueva.
+        """
+        got, failures = {}, {}
+        with metrics.timer("live_fetch"):
+            for since, tickers in self._since_groups(close_time).items():
+                frames, bad = fetch_bars(tickers, self.interval, start=since.tz_convert("UTC").to_pydatetime())
+                got.update(frames)
+                failures.update(bad)
+        updated = []
+        for t, new in got.items():
+            new = _localize(new)
+            new = new[new["timestamp"] + self.delta <= close_time]
+            old = self.frames.get(t)
+            merged = merge_bars(old, new).tail(self.window).reset_index(drop=True)
+            if merged.empty:
+                continue
+            if old is None or old.empty or merged["timestamp"].iloc[-1] > old["timestamp"].iloc[-1]:
+                updated.append(t)
+                state = self.streams.get(t)
+                if state is not None:
+                    state.update_frame(merged, since=state.last_timestamp)
+            self.frames[t] = merged
+        metrics.inc("live_fetch_failures", len(failures))
+        return [t for t in self.tickers if t in updated]
+
+    # ------------------------------------------------------------
+    # Ciclo
+    # ------------------------------------------------------------
+    def on_bar(self, close_time):
+        """Procesa el cierre de una vela: descarga incremental, evaluación y alertas."""
+        from run import decide, evaluate_universe, handle_result
+
+        with metrics.timer("live_bar"):
+            tickers = self.refresh(close_time)
+            results = evaluate_universe(tickers, self.frames, self.executor, self.workers)
+            for result in results:
+                df = self.frames[result[0]]
+                with metrics.timer("recommender"):
+                    decision = decide(result, df, last=self.last_values(result[0]))
+                handle_result(result, df, self.positions, decision)
+            self.positions.commit()
+            self.save_streams()
+        latency = (pd.Timestamp.now(tz=self.tz) - close_time).total_seconds()
+        metrics.observe("live_latency", latency)
+        print(f"[Daemon] Vela {close_time:%H:%M}: {len(tickers)} tickers evaluados, {latency:.1f}s tras el cierre")
+        metrics.write()
+
+    def _sleep_until(self, when):
+        while True:
+            remaining = (when - pd.Timestamp.now(tz=self.tz)).total_seconds()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 60))
+
+    def run(self, forever=False):
+        """Bucle principal. Sin `forever`, termina tras la última vela de la sesión en curso."""
+        now = pd.Timestamp.now(tz=self.tz)
+        session_day = now.normalize()
+        self.warm_up()
+        try:
+            while True:
+                now = pd.Timestamp.now(tz=self.tz)
+                close_time = next_bar_close(now - pd.Timedelta(seconds=self.delay), self.delta, self.tz)
+                if not forever and close_time.normalize() != session_day:
+                    print("[Daemon] Sesión terminada.")
+                    break
+                print(f"[Daemon] Próxima vela: {close_time:%Y-%m-%d %H:%M} ({self.tz})")
+                self._sleep_until(close_time + pd.Timedelta(seconds=self.delay))
+                self.on_bar(close_time)
+        except KeyboardInterrupt:
+            print("\n[Daemon] Interrumpido por el usuario.")
+        finally:
+            if self.positions is not None:
+                self.positions.commit()
+            self.save_streams()
+            flush_alerts()
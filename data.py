@@ -1,77 +1,725 @@
 # data.py
 # -*- coding: utf-8 -*-
-import warnings
-warnings.filterwarnings("ignore", category=FutureWarning, module="yfinance")
-
-import yfinance as yf
+import json
+import numpy as np
 import pandas as pd
 import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import metrics
+import providers
+from config import (UNIVERSE_FILE, DEFAULT_UNIVERSE, DOWNLOAD_BATCH_SIZE, DATA_PROVIDER,
+                    CACHE_MAX_AGE, CACHE_OVERLAP, CACHE_FORMAT, BASE_INTERVAL, BASE_PERIOD,
+                    STRATEGY_TIMEFRAME, TIMEZONE, MARKET_OPEN, MARKET_CLOSE)
 
 DATA_FOLDER = "data_cache"
+META_FILE = os.path.join(DATA_FOLDER, "_meta.json")
+
+def read_universe(path=UNIVERSE_FILE):
+    """
+    Lee la lista de tickers (una por línea, se ignoran vacías y comentarios '#').
+    Si el fichero no existe se usa config.DEFAULT_UNIVERSE.
+    """
+    if not os.path.exists(path):
+        print(f"[Advertencia] No existe {path}, se usa el universo por defecto ({len(DEFAULT_UNIVERSE)} tickers)")
+        return list(DEFAULT_UNIVERSE)
+    tickers = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            t = line.strip()
+            if t and not t.startswith("#"):
+                tickers.append(t)
+    return tickers
+
+
+# ============================================================
+# Backends de cache
+# ============================================================
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+class CsvCache:
+    """Cache histórica: un CSV por ticker en data_cache/."""
+    name = "csv"
 
-if not os.path.exists(DATA_FOLDER):
-    os.makedirs(DATA_FOLDER)
+    def __init__(self, folder=DATA_FOLDER):
+        self.folder = folder
 
-def download_bars(ticker, period="12mo", interval="1d", use_cache=True):
+    def _path(self, ticker):
+        return os.path.join(self.folder, f"{ticker}.csv")
+
+    def exists(self, ticker):
+        return os.path.exists(self._path(ticker))
+
+    def load(self, ticker):
+        if not self.exists(ticker):
+            return None
+        return pd.read_csv(self._path(ticker), parse_dates=['timestamp'])
+
+    def save(self, ticker, df, since=None):
+        os.makedirs(self.folder, exist_ok=True)
+        df.to_csv(self._path(ticker), index=False)
+
+    def tickers(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(f[:-4] for f in os.listdir(self.folder) if f.endswith(".csv"))
+
+
+class _PartitionedCache:
     """
-    Descarga datos históricos de Yahoo Finance para un ticker.
-    Guarda y reutiliza archivos locales para acelerar ejecuciones posteriores.
-    Devuelve un DataFrame con columnas:
-    ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    Base de los backends columnares: data_cache/<formato>/<ticker>/<año>.<ext>.
+    Al añadir velas solo se reescriben las particiones (años) afectadas.
     """
-    file_path = os.path.join(DATA_FOLDER, f"{ticker}.csv")
+    name = ""
+    ext = ""
 
-    # --- Usar cache si existe ---
-    if use_cache and os.path.exists(file_path):
-        df = pd.read_csv(file_path, parse_dates=['timestamp'])
-        print(f"[Info] Cargando datos de {ticker} desde cache ✅")
+    def __init__(self, folder=DATA_FOLDER):
+        self.folder = os.path.join(folder, self.name)
+
+    def _dir(self, ticker):
+        return os.path.join(self.folder, ticker)
+
+    def _partitions(self, ticker):
+        d = self._dir(ticker)
+        if not os.path.isdir(d):
+            return []
+        return sorted(f for f in os.listdir(d) if f.endswith(self.ext))
+
+    def exists(self, ticker):
+        return bool(self._partitions(ticker))
+
+    def tickers(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(t for t in os.listdir(self.folder) if self.exists(t))
+
+    def _tz(self, ticker):
+        path = os.path.join(self._dir(ticker), "tz.txt")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        return None
+
+    def load(self, ticker):
+        parts = self._partitions(ticker)
+        if not parts:
+            return None
+        frames = [self._read(os.path.join(self._dir(ticker), p)) for p in parts]
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        tz = self._tz(ticker)
+        if tz:
+            df["timestamp"] = df["timestamp"].dt.tz_localize("UTC").dt.tz_convert(tz)
         return df
 
-    print(f"[Info] Descargando datos para {ticker}...")
+    def save(self, ticker, df, since=None):
+        """
+        Guarda `df` completo; con `since` solo reescribe las particiones desde ese instante.
+        Todas las particiones se escriben antes en .tmp y luego se sustituyen; los años
+        que ya no están en `df` se borran al final, así que un fallo a mitad no vacía la cache.
+        """
+        d = self._dir(ticker)
+        os.makedirs(d, exist_ok=True)
+        df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].copy()
+        ts = pd.to_datetime(df["timestamp"])
+        tz = getattr(ts.dt, "tz", None)
+        if tz is not None:
+            ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+        df["timestamp"] = ts.astype("datetime64[ns]")
+
+        years = df["timestamp"].dt.year
+        first_year = None
+        if since is not None:
+            since = pd.Timestamp(since)
+            if since.tzinfo is not None:
+                since = since.tz_convert("UTC").tz_localize(None)
+            first_year = since.year
+        written = {}
+        try:
+            for year, part in df.groupby(years, sort=True):
+                if first_year is not None and year < first_year:
+                    continue
+                path = os.path.join(d, f"{year}{self.ext}")
+                written[path] = path + ".tmp"
+                self._write(part.reset_index(drop=True), written[path])
+            tz_path = os.path.join(d, "tz.txt")
+            written[tz_path] = tz_path + ".tmp"
+            with open(written[tz_path], "w", encoding="utf-8") as f:
+                f.write(str(tz) if tz is not None else "")
+        except Exception:
+            for tmp in written.values():
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            raise
+
+        for path, tmp in written.items():
+            os.replace(tmp, path)
+        if since is None:
+            for p in self._partitions(ticker):
+                if os.path.join(d, p) not in written:
+                    os.remove(os.path.join(d, p))
+
+
+class NpyCache(_PartitionedCache):
+    """
+    Backend binario sin dependencias: un array estructurado .npy por año.
+    Se lee con memory-map (sin parseo de texto ni de fechas).
+    """
+    name = "npy"
+    ext = ".npy"
+    DTYPE = np.dtype([("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"),
+                      ("low", "<f8"), ("close", "<f8"), ("volume", "<f8")])
+
+    def _read(self, path):
+        arr = np.load(path, mmap_mode="r")
+        data = {c: arr[c] for c in OHLCV_COLUMNS}
+        data["timestamp"] = arr["timestamp"].view("datetime64[ns]")
+        return pd.DataFrame(data)
+
+    def _write(self, df, path):
+        arr = np.empty(len(df), dtype=self.DTYPE)
+        arr["timestamp"] = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("<i8")
+        for c in OHLCV_COLUMNS[1:]:
+            arr[c] = df[c].to_numpy(dtype=float) if c in df.columns else np.nan
+        with open(path, "wb") as f:
+            np.save(f, arr)
+
+
+class ParquetCache(_PartitionedCache):
+    """Backend Parquet (requiere pyarrow): columnas tipadas y comprimidas con zstd."""
+    name = "parquet"
+    ext = ".parquet"
+
+    def __init__(self, folder=DATA_FOLDER):
+        import pyarrow  # noqa: F401  (dependencia opcional)
+        super().__init__(folder)
+
+    def _read(self, path):
+        return pd.read_parquet(path, memory_map=True)
 
+    def _write(self, df, path):
+        df.to_parquet(path, index=False, compression="zstd")
+
+
+BACKENDS = {"csv": CsvCache, "npy": NpyCache, "parquet": ParquetCache}
+
+
+def get_backend(name=CACHE_FORMAT, folder=DATA_FOLDER):
+    """Instancia el backend `name`; si falta su dependencia se usa npy."""
+    try:
+        return BACKENDS[name](folder)
+    except KeyError:
+        raise ValueError(f"Formato de cache desconocido: {name} (opciones: {', '.join(BACKENDS)})")
+    except ImportError:
+        print(f"[Advertencia] Backend de cache '{name}' no disponible (falta dependencia), se usa npy.")
+        return NpyCache(folder)
+
+
+CACHE = get_backend()
+
+
+def migrate_cache(src="csv", dst=None, remove_src=False):
+    """
+    Migración única entre backends (por defecto de los CSV antiguos al formato configurado).
+    Devuelve el nº de tickers migrados.
+    """
+    source, target = get_backend(src), (get_backend(dst) if dst else CACHE)
+    if source.name == target.name:
+        return 0
+    n = 0
+    for t in source.tickers():
+        df = source.load(t)
+        if df is None or df.empty:
+            continue
+        target.save(t, df)
+        if remove_src and source.name == "csv":
+            os.remove(source._path(t))
+        n += 1
+    print(f"[Info] {n} tickers migrados de {source.name} a {target.name} ✅")
+    return n
+
+
+def load_cache(ticker):
+    """
+    Lee los datos cacheados de un ticker sin tocar la red.
+    Si el backend activo no es CSV y solo existe el CSV antiguo, lo migra al vuelo.
+    Devuelve None si no hay cache.
+    """
+    df = CACHE.load(ticker)
+    if df is None and CACHE.name != "csv":
+        legacy = CsvCache()
+        if legacy.exists(ticker):
+            df = legacy.load(ticker)
+            CACHE.save(ticker, df)
+    return df
+
+
+def cached_tickers():
+    """Lista los tickers con datos en cache (orden alfabético)."""
+    names = set(CACHE.tickers())
+    if CACHE.name != "csv":
+        names |= set(CsvCache().tickers())
+    return sorted(names)
+
+
+def save_cache(ticker, df, since=None):
+    """
+    Guarda el DataFrame normalizado de un ticker en cache.
+    `since` indica desde dónde hay cambios (los backends particionados solo reescriben eso).
+    """
+    CACHE.save(ticker, df, since=since)
+
+
+def _load_meta():
+    """Metadatos de frescura de la cache: {ticker: {last_timestamp, last_refresh, rows, interval}}."""
+    if not os.path.exists(META_FILE):
+        return {}
     try:
-        df = yf.download(ticker, period=period, interval=interval, progress=False, auto_adjust=True)
-    except Exception as e:
-        print(f"[Error] {ticker}: fallo en descarga ({e})")
+        with open(META_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@contextmanager
+def _meta_lock():
+    """Bloqueo entre procesos del fichero de metadatos (no-op donde no hay fcntl)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    os.makedirs(DATA_FOLDER, exist_ok=True)
+    with open(META_FILE + ".lock", "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _save_meta(meta, tickers=None):
+    """
+    Guarda los metadatos. Con `tickers`, solo actualiza esas entradas sobre lo
+    que haya en disco, para que varios procesos (escaneo por fragmentos) no se pisen.
+    """
+    with _meta_lock():
+        if tickers is not None:
+            merged = _load_meta()
+            merged.update({t: meta[t] for t in tickers if t in meta})
+            meta = merged
+        tmp = META_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1, sort_keys=True)
+        os.replace(tmp, META_FILE)
+
+
+def _record(meta, ticker, df, interval):
+    meta[ticker] = {
+        "last_timestamp": str(df["timestamp"].iloc[-1]),
+        "last_refresh": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": int(len(df)),
+        "interval": interval,
+    }
+
+
+def cache_age(ticker, meta=None):
+    """Tiempo desde la última actualización de la cache de `ticker` (None si no consta)."""
+    info = (meta if meta is not None else _load_meta()).get(ticker)
+    if not info:
         return None
+    return datetime.now(timezone.utc) - datetime.fromisoformat(info["last_refresh"])
+
+
+def is_stale(ticker, meta=None, max_age=CACHE_MAX_AGE):
+    """True si la cache no consta como refrescada en los últimos `max_age`."""
+    age = cache_age(ticker, meta)
+    return age is None or age > max_age
+
 
-    if df.empty:
+def cached_interval(ticker, meta=None):
+    """Intervalo de la serie base cacheada de `ticker` (None si no consta)."""
+    return ((meta if meta is not None else _load_meta()).get(ticker) or {}).get("interval")
+
+
+def _other_interval(ticker, meta, interval):
+    """True si la cache de `ticker` es de otro intervalo: no se puede fusionar, se descarga entera."""
+    cached = cached_interval(ticker, meta)
+    return cached is not None and cached != interval
+
+
+def merge_bars(old, new):
+    """Añade las velas nuevas a las cacheadas; en solape gana la versión nueva (velas revisadas)."""
+    if old is None or old.empty:
+        return new
+    if new is None or new.empty:
+        return old
+    old, new = old.copy(), new.copy()
+    old_tz = getattr(old["timestamp"].dt, "tz", None)
+    new_tz = getattr(new["timestamp"].dt, "tz", None)
+    if (old_tz is None) != (new_tz is None):
+        old["timestamp"] = pd.to_datetime(old["timestamp"], utc=True)
+        new["timestamp"] = pd.to_datetime(new["timestamp"], utc=True)
+    df = pd.concat([old, new], ignore_index=True)
+    df = df.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+    return df.reset_index(drop=True)
+
+
+def _refresh_start(df):
+    """Fecha desde la que pedir datos para completar la cache (con solape)."""
+    return (df["timestamp"].iloc[-1] - CACHE_OVERLAP).strftime("%Y-%m-%d")
+
+
+def download_bars(ticker, period=BASE_PERIOD, interval=BASE_INTERVAL, use_cache=True):
+    """
+    Descarga datos históricos de un ticker con el proveedor activo (config.DATA_PROVIDER).
+    Guarda y reutiliza archivos locales para acelerar ejecuciones posteriores:
+    si la cache está desactualizada solo se piden las velas que faltan
+    (más un pequeño solape para corregir la última vela).
+    Devuelve un DataFrame con columnas:
+    ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    """
+    meta = _load_meta()
+    with metrics.timer("cache_load"):
+        cached = load_cache(ticker) if use_cache else None
+    if cached is not None and (cached.empty or _other_interval(ticker, meta, interval)):
+        cached = None
+
+    # --- Usar cache si existe y está al día ---
+    if cached is not None and not is_stale(ticker, meta):
+        metrics.inc("cache", result="hit")
+        print(f"[Info] Cargando datos de {ticker} desde cache ✅")
+        return cached
+    metrics.inc("cache", result="stale" if cached is not None else "miss")
+
+    if cached is not None:
+        start = _refresh_start(cached)
+        print(f"[Info] Actualizando {ticker} desde {start} (incremental)...")
+        kwargs = {"start": start}
+    else:
+        print(f"[Info] Descargando datos para {ticker}...")
+        kwargs = {"period": period}
+
+    got, bad = _download_batch([ticker], interval, **kwargs)
+    if ticker in bad and bad[ticker].startswith("fallo en descarga"):
+        print(f"[Error] {ticker}: {bad[ticker]}")
+        return cached
+
+    if ticker not in got:
+        if cached is not None:
+            # Sin velas nuevas (mercado cerrado): la cache sigue siendo válida
+            _record(meta, ticker, cached, interval)
+            _save_meta(meta, [ticker])
+            return cached
         print(f"[Advertencia] {ticker}: sin datos recientes.")
         return None
 
-    # --- Aplanar MultiIndex si existiera ---
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = [f"{a}_{b}".strip().lower() for a, b in df.columns]
-    else:
-        df.columns = [c.lower() for c in df.columns]
-
-    # --- Renombrar columnas ---
-    rename_map = {}
-    for c in df.columns:
-        if "open" in c: rename_map[c] = "open"
-        elif "high" in c: rename_map[c] = "high"
-        elif "low" in c: rename_map[c] = "low"
-        elif "close" in c: rename_map[c] = "close"
-        elif "volume" in c: rename_map[c] = "volume"
-    df = df.rename(columns=rename_map)
-
-    # --- Añadir columna timestamp ---
-    df["timestamp"] = df.index
-    df = df.reset_index(drop=True)
-
-    # --- Seleccionar columnas útiles ---
-    cols = ["timestamp", "open", "high", "low", "close", "volume"]
-    df = df[[c for c in cols if c in df.columns]]
+    df = merge_bars(cached, got[ticker])
 
     # --- Guardar cache ---
-    df.to_csv(file_path, index=False)
+    save_cache(ticker, df, since=kwargs.get("start"))
+    _record(meta, ticker, df, interval)
+    _save_meta(meta, [ticker])
     print(f"[Info] Datos de {ticker} guardados en cache ✅")
 
     return df
 
 
+# ============================================================
+# Proveedor de datos
+# ============================================================
 
+_PROVIDER = None
+
+
+def get_provider() -> providers.DataProvider:
+    """Proveedor activo (config.DATA_PROVIDER), creado en el primer uso."""
+    global _PROVIDER
+    if _PROVIDER is None:
+        _PROVIDER = providers.get_provider(DATA_PROVIDER)
+    return _PROVIDER
+
+
+def set_provider(provider) -> providers.DataProvider:
+    """Cambia el proveedor activo: nombre de providers.PROVIDERS o instancia."""
+    global _PROVIDER
+    _PROVIDER = providers.get_provider(provider) if isinstance(provider, str) else provider
+    return _PROVIDER
+
+
+def _download_batch(batch, interval, **kwargs):
+    """
+    Una descarga del proveedor activo para todo el lote.
+    Devuelve ({ticker: DataFrame normalizado}, {ticker: motivo de fallo});
+    todo ticker del lote acaba en uno de los dos (si el proveedor no lo
+    menciona, cuenta como "sin datos en la respuesta").
+    """
+    provider = get_provider()
+    with metrics.timer("provider_download", provider=provider.name):
+        got, bad = provider.download(batch, interval, **kwargs)
+    for t in batch:
+        if t not in got and t not in bad:
+            bad[t] = "sin datos en la respuesta"
+    return got, bad
+
+
+def download_many(tickers, period=BASE_PERIOD, interval=BASE_INTERVAL, use_cache=True,
+                  batch_size=DOWNLOAD_BATCH_SIZE):
+    """
+    Descarga varios tickers en lotes de `batch_size` con una sola llamada al
+    proveedor por lote, y guarda la cache de cada ticker.
+    Los tickers con cache desactualizada se piden en lotes incrementales
+    (desde su última vela menos el solape) y se fusionan con lo cacheado.
+    Devuelve (frames, failures):
+    - frames: {ticker: DataFrame normalizado}
+    - failures: {ticker: motivo} para los símbolos que fallaron (el resto del lote sigue adelante)
+    """
+    meta = _load_meta()
+    frames, failures, full, stale = {}, {}, [], []
+    with metrics.timer("cache_load"):
+        for t in tickers:
+            cached = load_cache(t) if use_cache else None
+            if cached is None or cached.empty or _other_interval(t, meta, interval):
+                full.append(t)
+                continue
+            frames[t] = cached
+            if is_stale(t, meta):
+                stale.append(t)
+    metrics.inc("cache", len(frames) - len(stale), result="hit")
+    metrics.inc("cache", len(stale), result="stale")
+    metrics.inc("cache", len(full), result="miss")
+
+    step = max(1, batch_size)
+    for i in range(0, len(full), step):
+        batch = full[i:i + step]
+        print(f"[Info] Descargando lote de {len(batch)} tickers: {', '.join(batch)}")
+        got, bad = _download_batch(batch, interval, period=period)
+        failures.update(bad)
+        for t, df in got.items():
+            save_cache(t, df)
+            _record(meta, t, df, interval)
+            frames[t] = df
+
+    # Cada ticker pide desde su propia última vela: uno rezagado no amplía
+    # la descarga del resto del lote; los que coinciden van juntos.
+    since_groups = {}
+    for t in stale:
+        since_groups.setdefault(_refresh_start(frames[t]), []).append(t)
+    for start, group in sorted(since_groups.items()):
+        for i in range(0, len(group), step):
+            batch = group[i:i + step]
+            print(f"[Info] Actualizando lote de {len(batch)} tickers desde {start}: {', '.join(batch)}")
+            got, bad = _download_batch(batch, interval, start=start)
+            for t in batch:
+                reason = bad.get(t, "sin datos en la respuesta")
+                if t in got:
+                    frames[t] = merge_bars(frames[t], got[t])
+                    save_cache(t, frames[t], since=start)
+                elif not reason.startswith("sin datos"):
+                    # Fallo real: se conserva la cache antigua y se reintentará en la próxima ejecución
+                    print(f"[Advertencia] {t}: no se pudo actualizar ({reason}), se usa la cache")
+                    continue
+                _record(meta, t, frames[t], interval)
+
+    if full or stale:
+        _save_meta(meta, full + stale)
+    for t, reason in failures.items():
+        print(f"[Advertencia] {t}: {reason}")
+    return {t: frames[t] for t in tickers if t in frames}, failures
+
+
+def fetch_bars(tickers, interval="1d", batch_size=DOWNLOAD_BATCH_SIZE, **kwargs):
+    """
+    Descarga por lotes sin pasar por data_cache/ (p. ej. las velas intradía del
+    modo daemon, que viven en memoria). `kwargs` se pasa al proveedor
+    (period=... o start=...). Devuelve (frames, failures) como download_many.
+    """
+    frames, failures = {}, {}
+    step = max(1, batch_size)
+    for i in range(0, len(tickers), step):
+        got, bad = _download_batch(tickers[i:i + step], interval, **kwargs)
+        frames.update(got)
+        failures.update(bad)
+    return frames, failures
 
 
+# ============================================================
+# Marcos temporales derivados (remuestreo local)
+# ============================================================
 
+# Duración de cada marco; 1h/4h se anclan a la apertura de la sesión, 1d al día
+# natural y 1w al lunes (hora de TIMEZONE). Cada vela derivada lleva la hora de
+# inicio de su tramo, como las de Yahoo.
+TIMEFRAMES = {
+    "1h": pd.Timedelta(hours=1),
+    "4h": pd.Timedelta(hours=4),
+    "1d": pd.Timedelta(days=1),
+    "1w": pd.Timedelta(days=7),
+}
+_DAY_NS = pd.Timedelta(days=1).value
+_TF_CACHES = {}
 
+
+def _span(interval):
+    """Duración de un intervalo de Yahoo ('30m', '1h', '1d', '1wk'); None si no es fija ('1mo')."""
+    try:
+        return pd.Timedelta(providers.interval_freq(interval))
+    except ValueError:
+        return None
+
+
+def _session_ns(session):
+    return tuple(pd.Timedelta(f"{t}:00").value for t in session)
+
+
+def _bucket_starts(ts, timeframe, tz=TIMEZONE, session=(MARKET_OPEN, MARKET_CLOSE), intraday=True):
+    """
+    Inicio del tramo de `timeframe` de cada vela (ns en hora local, sin zona) y máscara
+    de velas dentro de la sesión. Con base diaria o mayor no se filtra por sesión.
+    """
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_convert(tz).dt.tz_localize(None)
+    ns = ts.to_numpy(dtype="datetime64[ns]").view("i8")
+    day = ns - ns % _DAY_NS
+    open_ns, close_ns = _session_ns(session)
+    keep = ((ns - day >= open_ns) & (ns - day < close_ns)) if intraday else np.ones(len(ns), bool)
+    if timeframe == "1w":
+        # 1970-01-01 fue jueves: (días + 3) % 7 es el día de la semana con lunes = 0
+        return day - ((ns // _DAY_NS + 3) % 7) * _DAY_NS, keep
+    if timeframe == "1d":
+        return day, keep
+    step = TIMEFRAMES[timeframe].value
+    return day + open_ns + (ns - day - open_ns) // step * step, keep
+
+
+def resample_bars(df, timeframe, tz=TIMEZONE, session=(MARKET_OPEN, MARKET_CLOSE), intraday=None):
+    """
+    Agrega velas OHLCV (ordenadas) al marco `timeframe` (ver TIMEFRAMES), de forma
+    vectorizada: open de la primera vela del tramo, high/low extremos, close de la
+    última y volumen sumado. Las velas intradía fuera de la sesión se descartan.
+    `intraday` indica si la base es intradía (por defecto se deduce del paso típico).
+    La última vela derivada puede estar aún en formación.
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Marco temporal no soportado: {timeframe} (opciones: {', '.join(TIMEFRAMES)})")
+    if df is None or df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    ts = pd.to_datetime(df["timestamp"])
+    if intraday is None:
+        step = np.diff(ts.to_numpy(dtype="datetime64[ns]").view("i8"))
+        intraday = bool(len(step)) and np.median(step) < _DAY_NS
+    starts, keep = _bucket_starts(ts, timeframe, tz, session, intraday)
+    keys = starts[keep]
+    if not len(keys):
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    last = np.r_[first[1:] - 1, len(keys) - 1]
+    col = {c: df[c].to_numpy(dtype=float)[keep] for c in OHLCV_COLUMNS[1:]}
+    stamps = pd.to_datetime(keys[first])
+    if getattr(ts.dt, "tz", None) is not None:
+        stamps = stamps.tz_localize(tz, ambiguous=False, nonexistent="shift_forward")
+    return pd.DataFrame({
+        "timestamp": stamps,
+        "open": col["open"][first],
+        "high": np.fmax.reduceat(col["high"], first),
+        "low": np.fmin.reduceat(col["low"], first),
+        "close": col["close"][last],
+        "volume": np.add.reduceat(np.nan_to_num(col["volume"]), first),
+    })
+
+
+def _recompute_from(base, derived, since=None) -> int:
+    """
+    Primera vela de `derived` a recalcular con la base actual (0 = todo): la última
+    derivada, que podía estar a medias, o la que contiene `since` si es anterior.
+    """
+    if derived is None or derived.empty or base is None or base.empty:
+        return 0
+    stamps = pd.to_datetime(derived["timestamp"])
+    base_ts = pd.to_datetime(base["timestamp"])
+    if (stamps.dt.tz is None) != (base_ts.dt.tz is None) or base_ts.iloc[-1] < stamps.iloc[-1]:
+        return 0
+    cut = stamps.iloc[-1] if since is None else min(stamps.iloc[-1], pd.Timestamp(since))
+    return max(0, int(stamps.searchsorted(cut, side="right")) - 1)
+
+
+def update_timeframe(base, derived, timeframe, since=None, **kwargs):
+    """
+    Actualiza incrementalmente `derived` (velas de `timeframe` ya calculadas) con la
+    serie `base`: solo se recalculan los tramos desde el último derivado o desde `since`
+    (velas base revisadas); los anteriores se reutilizan tal cual.
+    """
+    i = _recompute_from(base, derived, since)
+    if i == 0:
+        return resample_bars(base, timeframe, **kwargs)
+    base_ts = pd.to_datetime(base["timestamp"])
+    fresh = resample_bars(base[base_ts >= derived["timestamp"].iloc[i]], timeframe, **kwargs)
+    return pd.concat([derived.iloc[:i], fresh], ignore_index=True)
+
+
+def _tf_cache(timeframe):
+    """Cache de un marco derivado: mismo backend que la base, en data_cache/tf/<marco>/."""
+    if timeframe not in _TF_CACHES:
+        _TF_CACHES[timeframe] = type(CACHE)(os.path.join(DATA_FOLDER, "tf", timeframe))
+    return _TF_CACHES[timeframe]
+
+
+def load_timeframe(ticker, timeframe=STRATEGY_TIMEFRAME, base=None, base_interval=None, meta=None):
+    """
+    Velas de `ticker` en `timeframe` derivadas de su serie base, sin tocar la red.
+    `base` evita releer la cache (p. ej. el DataFrame recién descargado). Si el marco
+    coincide con el intervalo base se devuelve la base tal cual; si es más fino, ValueError.
+    Las velas derivadas se guardan en cache y en cada llamada solo se recalcula la cola.
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Marco temporal no soportado: {timeframe} (opciones: {', '.join(TIMEFRAMES)})")
+    base = load_cache(ticker) if base is None else base
+    if base is None or base.empty:
+        return None
+    base_interval = base_interval or cached_interval(ticker, meta) or BASE_INTERVAL
+    span = _span(base_interval)
+    if span == TIMEFRAMES[timeframe]:
+        return base
+    if span is None or span > TIMEFRAMES[timeframe]:
+        raise ValueError(f"No se puede derivar {timeframe} de velas de {base_interval} ({ticker})")
+
+    cache = _tf_cache(timeframe)
+    with metrics.timer("resample", timeframe=timeframe):
+        derived = cache.load(ticker)
+        since = pd.to_datetime(base["timestamp"]).iloc[-1] - CACHE_OVERLAP
+        i = _recompute_from(base, derived, since)
+        df = update_timeframe(base, derived, timeframe, since=since, intraday=span < TIMEFRAMES["1d"])
+    # Solo se reescribe la cola recalculada, y nada si no ha cambiado
+    if df.empty or (derived is not None and df.iloc[i:].reset_index(drop=True)
+                    .equals(derived.iloc[i:].reset_index(drop=True))):
+        return df
+    cache.save(ticker, df, since=df["timestamp"].iloc[i] if i else None)
+    return df
+
+
+def derive_many(frames, timeframe=STRATEGY_TIMEFRAME, interval=BASE_INTERVAL):
+    """{ticker: velas de `timeframe`} a partir de las series base de `frames` (sin red)."""
+    if _span(interval) == TIMEFRAMES.get(timeframe):
+        return frames
+    meta = _load_meta()
+    out = {}
+    for t, df in frames.items():
+        try:
+            out[t] = load_timeframe(t, timeframe, base=df, base_interval=interval, meta=meta)
+        except ValueError as e:
+            print(f"[Error] {e}")
+    return out
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "--migrate":
+        # python data.py --migrate [formato_destino]
+        migrate_cache("csv", sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print(f"[Info] Backend de cache: {CACHE.name} | proveedor: {DATA_PROVIDER} | "
+              f"serie base: {BASE_INTERVAL} → estrategias en {STRATEGY_TIMEFRAME} | "
+              f"tickers cacheados: {len(cached_tickers())}")
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 import sys
-from data import download_bars
+from data import download_bars, download_many, read_universe, get_provider, set_provider
 
 def main(t='SAN.MC'):
     df = download_bars(t)
@@ -10,6 +10,26 @@ def main(t='SAN.MC'):
         print('[OK] Datos para', t, '| filas:', len(df))
         print(df.tail())
 
+def prefetch(tickers=None):
+    """Precarga (descarga por lotes + cache) todo el universo y resume el resultado."""
+    tickers = tickers or read_universe()
+    frames, failures = download_many(tickers)
+    print(f'[OK] {len(frames)}/{len(tickers)} tickers con datos')
+    for t, reason in failures.items():
+        print('[X]', t, '→', reason)
+    return frames, failures
+
 if __name__ == '__main__':
-    t = sys.argv[1] if len(sys.argv)>1 else 'SAN.MC'
-    main(t)
+    args = sys.argv[1:]
+    if '--provider' in args:
+        # --provider NOMBRE: yfinance, yahoo_chart, cache, synthetic (por defecto DATA_PROVIDER)
+        i = args.index('--provider')
+        set_provider(args[i + 1])
+        del args[i:i + 2]
+    print('[Info] Proveedor de datos:', get_provider().name)
+    if args and args[0] == '--all':
+        prefetch()
+    elif len(args) > 1:
+        prefetch(args)
+    else:
+        main(args[0] if args else 'SAN.MC')
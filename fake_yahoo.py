@@ -0,0 +1,176 @@
+# fake_yahoo.py
+# -*- coding: utf-8 -*-
+"""
+🎭 Servidor local que imita la API chart v8 de Yahoo
+Sirve respuestas grabadas (recordings/<TICKER>.json) o, si no hay grabación,
+velas sintéticas deterministas, recortadas a period1/period2 como el original.
+Permite inyectar latencia, errores 5xx y límites 429 con Retry-After para
+probar sin red las descargas por lotes, los reintentos y el circuit breaker.
+
+Uso:
+    python fake_yahoo.py --port 8765 --error-rate 0.1 --latency 0.05
+    DATA_PROVIDER=yahoo_chart YAHOO_CHART_URL=http://127.0.0.1:8765 python diagnostics.py --all
+    python fake_yahoo.py --record SAN.MC BBVA.MC     # graba respuestas reales en recordings/
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import pandas as pd
+
+import providers
+
+RECORDINGS_DIR = "recordings"
+
+
+class FakeYahoo:
+    """Estado del servidor: origen de datos, fallos inyectados y contadores."""
+
+    def __init__(self, recordings=RECORDINGS_DIR, synthetic=True, latency=0.0, error_rate=0.0,
+                 throttle_rate=0.0, retry_after=1, seed=0):
+        self.recordings = recordings
+        self.synthetic = providers.SyntheticProvider(seed=seed) if synthetic else None
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "ok": 0, "not_found": 0, "errors": 0, "throttled": 0}
+        self._lock = threading.Lock()
+        self._frames = {}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _roll(self):
+        with self._lock:
+            return self.rng.random()
+
+    def frame(self, symbol, interval):
+        """Velas completas de `symbol` (grabación o sintéticas), o None si no existe."""
+        key = (symbol, interval)
+        if key not in self._frames:
+            path = os.path.join(self.recordings, f"{symbol}.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as fh:
+                    df, _ = providers.parse_chart(json.load(fh), interval)
+            elif self.synthetic is not None:
+                df = self.synthetic.series(symbol, interval)
+            else:
+                df = None
+            self._frames[key] = df
+        return self._frames[key]
+
+    def respond(self, path, query):
+        """(status, cabeceras, cuerpo JSON) para una petición GET."""
+        self._count("requests")
+        if self.latency:
+            time.sleep(self.latency)
+        roll = self._roll()
+        if roll < self.throttle_rate:
+            self._count("throttled")
+            return 429, {"Retry-After": str(self.retry_after)}, {"error": "Too Many Requests"}
+        if roll < self.throttle_rate + self.error_rate:
+            self._count("errors")
+            return 503, {}, {"error": "Service Unavailable"}
+
+        parts = path.rstrip("/").split("/")
+        if len(parts) < 5 or parts[1:4] != ["v8", "finance", "chart"]:
+            self._count("not_found")
+            return 404, {}, {"error": "Not Found"}
+        symbol = unquote(parts[4])
+        interval = query.get("interval", ["1d"])[0]
+        df = self.frame(symbol, interval)
+        if df is None:
+            self._count("not_found")
+            return 404, {}, {"chart": {"result": None, "error": {
+                "code": "Not Found", "description": "No data found, symbol may be delisted"}}}
+        start = pd.Timestamp(int(query.get("period1", ["0"])[0]), unit="s", tz="UTC")
+        now = pd.Timestamp(int(query["period2"][0]), unit="s", tz="UTC") if "period2" in query else None
+        self._count("ok")
+        return 200, {}, providers.to_chart(symbol, providers.window(df, start=start, now=now), interval=interval)
+
+
+def make_handler(state: FakeYahoo):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            status, headers, body = state.respond(url.path, parse_qs(url.query))
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8765, **kwargs):
+    """Arranca el servidor en un hilo y lo devuelve (server.state tiene los contadores)."""
+    state = FakeYahoo(**kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-yahoo", daemon=True).start()
+    return server
+
+
+def record(tickers, folder=RECORDINGS_DIR, interval="1d", period="12mo"):
+    """Graba las respuestas reales de la API chart para servirlas después sin red."""
+    provider = providers.YahooChartProvider()
+    os.makedirs(folder, exist_ok=True)
+    for t in tickers:
+        status, payload = provider.fetch(t, interval, period)
+        if status != 200 or payload is None:
+            print(f"[Error] {t}: HTTP {status}, no se graba")
+            continue
+        with open(os.path.join(folder, f"{t}.json"), "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+        print(f"[Info] {t}: respuesta grabada en {folder}/")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API chart de Yahoo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", default=RECORDINGS_DIR, help="Carpeta con respuestas grabadas")
+    parser.add_argument("--no-synthetic", action="store_true", help="404 para símbolos sin grabación")
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos de espera por petición")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fracción de respuestas 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Cabecera Retry-After de los 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", nargs="+", metavar="TICKER", help="Grabar respuestas reales y salir")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record, args.recordings)
+        return
+    server = serve(args.host, args.port, recordings=args.recordings, synthetic=not args.no_synthetic,
+                   latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                   retry_after=args.retry_after, seed=args.seed)
+    print(f"[FakeYahoo] Sirviendo en {server.url} (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\n[FakeYahoo] {server.state.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+# http_client.py
+# -*- coding: utf-8 -*-
+"""
+🌐 Capa común para todas las peticiones salientes (Yahoo y Telegram)
+- Token bucket por host: ritmo sostenido + ráfaga máxima
+- Sesiones keep-alive reutilizadas (pool de conexiones por host)
+- Reintentos con backoff exponencial y jitter
+- Respeta `Retry-After` (cabecera) y `retry_after` (JSON de Telegram)
+- Circuit breaker: tras varios fallos seguidos deja de insistir contra el host
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+from config import (HTTP_RATES, HTTP_DEFAULT_RATE, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE,
+                    HTTP_BACKOFF_MAX, BREAKER_THRESHOLD, BREAKER_RESET_SEC)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """El host está en cuarentena tras demasiados fallos seguidos."""
+
+
+class TransientError(OSError):
+    """Fallo reintentable de una llamada ajena (p. ej. yf.download sin datos por un error HTTP)."""
+
+
+class TokenBucket:
+    """Limitador de ritmo: `rate` peticiones/s sostenidas con ráfagas de hasta `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, tokens=1.0):
+        """Bloquea hasta disponer de `tokens` fichas. Devuelve el tiempo esperado (s)."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """Vacía el cubo durante `seconds` (p. ej. tras un 429 con Retry-After)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class CircuitBreaker:
+    """
+    Cerrado → abierto tras `threshold` fallos seguidos; abierto durante
+    `reset_after` segundos; después deja pasar una sola petición de prueba
+    (semiabierto): el resto sigue rechazado hasta conocer su resultado.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_after=BREAKER_RESET_SEC):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return state == "closed"
+
+    def release(self):
+        """Libera la prueba en curso sin veredicto (p. ej. un 429): otra llamada podrá probar."""
+        with self._lock:
+            self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+def _retry_after(response):
+    """Segundos de espera pedidos por el servidor (cabecera Retry-After o JSON de Telegram)."""
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(header)
+                return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    try:
+        params = response.json().get("parameters") or {}
+        if "retry_after" in params:
+            return float(params["retry_after"])
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+class HttpClient:
+    """Cliente compartido: un cubo, un breaker y una sesión keep-alive por host."""
+
+    def __init__(self, rates=None, default_rate=HTTP_DEFAULT_RATE, max_retries=HTTP_MAX_RETRIES,
+                 backoff_base=HTTP_BACKOFF_BASE, backoff_max=HTTP_BACKOFF_MAX, pool_size=10):
+        self.rates = dict(HTTP_RATES if rates is None else rates)
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.retries = 0
+        self._buckets, self._breakers, self._sessions = {}, {}, {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Recursos por host
+    # ------------------------------------------------------------
+    def _get(self, store, host, factory):
+        with self._lock:
+            if host not in store:
+                store[host] = factory()
+            return store[host]
+
+    def bucket(self, host):
+        rate, burst = self.rates.get(host, self.default_rate)
+        return self._get(self._buckets, host, lambda: TokenBucket(rate, burst))
+
+    def breaker(self, host):
+        return self._get(self._breakers, host, CircuitBreaker)
+
+    def session(self, host):
+        def factory():
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            return s
+        return self._get(self._sessions, host, factory)
+
+    def backoff(self, attempt):
+        """Espera exponencial (base·2^intento, con tope) con jitter aleatorio."""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(cap / 2, cap)
+
+    # ------------------------------------------------------------
+    # Peticiones
+    # ------------------------------------------------------------
+    def request(self, method, url, **kwargs):
+        """
+        Petición HTTP con ritmo por host, reintentos y circuit breaker.
+        Devuelve la última respuesta obtenida (el llamante decide según el status).
+        Lanza CircuitOpenError si el host está en cuarentena, o la última
+        excepción de red si se agotan los reintentos sin respuesta.
+        """
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", 20)
+        return self._run(host, lambda: self.session(host).request(method, url, **kwargs), http=True)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def call(self, host, func, *args, **kwargs):
+        """
+        Ejecuta una llamada de red ajena (p. ej. yf.download) bajo el mismo
+        control de ritmo, reintentos y breaker del host indicado. `func` debe
+        lanzar TransientError (o un error de red) cuando la llamada falle, para
+        que cuente como fallo del host.
+        """
+        return self._run(host, lambda: func(*args, **kwargs), http=False)
+
+    def _run(self, host, fn, http):
+        bucket, breaker = self.bucket(host), self.breaker(host)
+        last_exc, server_wait = None, None
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                metrics.inc("http_circuit_open", host=host)
+                raise CircuitOpenError(f"{host}: circuito abierto tras {breaker.failures} fallos")
+            bucket.acquire()
+            try:
+                result = fn()
+            except (requests.ConnectionError, requests.Timeout, OSError) as e:
+                last_exc, server_wait = e, None
+                breaker.record_failure()
+                wait = self.backoff(attempt)
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                status = getattr(result, "status_code", None) if http else None
+                if status not in RETRY_STATUS:
+                    breaker.record_success()
+                    return result
+                if status != 429:
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+                if attempt == self.max_retries:
+                    return result
+                server_wait = _retry_after(result)
+                if server_wait is not None:
+                    # El servidor marca la pausa: se aplica a todo el host vía el cubo
+                    bucket.pause(server_wait)
+                    wait = server_wait
+                else:
+                    wait = self.backoff(attempt)
+            if attempt == self.max_retries:
+                break
+            self.retries += 1
+            metrics.inc("http_retries", host=host)
+            print(f"[HTTP] {host}: reintento {attempt + 1}/{self.max_retries} en {wait:.1f}s")
+            if not (http and server_wait is not None):
+                time.sleep(wait)
+        raise last_exc
+
+
+# Cliente global compartido
+CLIENT = HttpClient()
+
+
+def get(url, **kwargs):
+    return CLIENT.get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return CLIENT.post(url, **kwargs)
+
+
+# ============================================================
+# Comprobación contra fake_yahoo.py (python http_client.py)
+# ============================================================
+
+def self_check() -> dict:
+    """
+    Ejercita backoff, Retry-After y el breaker contra un fake_yahoo local.
+    Devuelve {comprobación: (ok, detalle)}.
+    """
+    import fake_yahoo
+
+    out = {}
+    server = fake_yahoo.serve(port=0)
+    state = server.state
+    url = f"{server.url}/v8/finance/chart/SAN.MC"
+    host = urlsplit(url).netloc
+
+    def client(threshold=100, reset_after=60.0, retries=2):
+        c = HttpClient(rates={host: (1000.0, 1000)}, max_retries=retries, backoff_base=0.02, backoff_max=0.05)
+        c._breakers[host] = CircuitBreaker(threshold, reset_after)
+        return c
+
+    try:
+        # 503 persistente: max_retries reintentos con backoff y se devuelve la última respuesta
+        state.error_rate, before = 1.0, state.stats["requests"]
+        c = client()
+        status = c.get(url).status_code
+        sent = state.stats["requests"] - before
+        out["backoff"] = (status == 503 and sent == 3 and c.retries == 2, f"HTTP {status}, {sent} peticiones")
+
+        # 429 con Retry-After: se espera lo que pide el servidor antes de reintentar
+        state.error_rate, state.throttle_rate, state.retry_after = 0.0, 1.0, 1
+        c = client(retries=1)
+        t0 = time.monotonic()
+        status = c.get(url).status_code
+        waited = time.monotonic() - t0
+        out["retry_after"] = (status == 429 and waited >= 0.9 and c.breaker(host).state == "closed",
+                              f"HTTP {status} tras {waited:.2f}s")
+
+        # Breaker: abierto tras `threshold` fallos, una sola prueba en semiabierto y cerrado tras un éxito
+        state.throttle_rate, state.error_rate = 0.0, 1.0
+        c = client(threshold=2, reset_after=0.2, retries=1)
+        c.get(url)
+        breaker = c.breaker(host)
+        opened = breaker.state == "open"
+        try:
+            c.get(url)
+            rejected = False
+        except CircuitOpenError:
+            rejected = True
+        time.sleep(0.25)
+        half_open = breaker.state == "half-open"
+        probes = [breaker.allow() for _ in range(3)]
+        breaker.release()
+        state.error_rate = 0.0
+        closed = c.get(url).status_code == 200 and breaker.state == "closed"
+        out["breaker"] = (opened and rejected and half_open and probes == [True, False, False] and closed,
+                          f"abierto={opened} rechaza={rejected} semiabierto={half_open} "
+                          f"pruebas={probes} cerrado={closed}")
+
+        # call(): un resultado vacío que lanza TransientError cuenta como fallo reintentable
+        c = client(threshold=3, retries=2)
+        calls = []
+
+        def empty():
+            calls.append(1)
+            raise TransientError("respuesta vacía")
+
+        try:
+            c.call(host, empty)
+            raised = False
+        except TransientError:
+            raised = True
+        out["call"] = (raised and len(calls) == 3 and c.breaker(host).state == "open",
+                       f"{len(calls)} intentos, breaker {c.breaker(host).state}")
+
+        # yfinance: un lote vacío sin errores anotados (deslistado, sin velas nuevas) no es
+        # un fallo de red; un error transitorio de un ticker no tumba al resto del lote
+        from types import SimpleNamespace
+
+        import pandas as pd
+        import providers
+
+        shared = SimpleNamespace(_ERRORS={})
+        calls.clear()
+
+        def download(batch, **kwargs):
+            calls.append(list(batch))
+            shared._ERRORS = {t: "YFRateLimitError('Too Many Requests. Rate limited.')" for t in batch if t == "BAD.MC"}
+            idx = pd.date_range("2025-01-02", periods=3, freq="D", name="Date")
+            cols = pd.MultiIndex.from_product([[t for t in batch if t == "SAN.MC"],
+                                               ["Open", "High", "Low", "Close", "Volume"]])
+            return pd.DataFrame(1.0, index=idx, columns=cols) if len(cols) else pd.DataFrame()
+
+        c = client(threshold=2, retries=2)
+        yf = providers.YFinanceProvider(client=c, yf=SimpleNamespace(download=download, shared=shared))
+        frames, failures = yf.download(["DELISTED.MC"])
+        breaker = c.breaker(yf.host)
+        empty_ok = (not frames and failures["DELISTED.MC"].startswith("sin datos") and len(calls) == 1
+                    and c.retries == 0 and breaker.failures == 0 and breaker.state == "closed")
+        out["yf_empty"] = (empty_ok, f"{len(calls)} llamadas, {c.retries} reintentos, "
+                                     f"breaker {breaker.state} ({breaker.failures} fallos): {failures}")
+
+        calls.clear()
+        c = client(threshold=5, retries=1)
+        yf = providers.YFinanceProvider(client=c, yf=SimpleNamespace(download=download, shared=shared))
+        frames, failures = yf.download(["SAN.MC", "BAD.MC", "DELISTED.MC"])
+        partial_ok = (list(frames) == ["SAN.MC"] and failures["BAD.MC"].startswith("fallo en descarga")
+                      and failures["DELISTED.MC"].startswith("sin datos") and calls[1:] == [["BAD.MC"]] * 2)
+        out["yf_partial"] = (partial_ok, f"datos {list(frames)}, llamadas {calls}, fallos {failures}")
+    finally:
+        server.shutdown()
+    return out
+
+
+if __name__ == "__main__":
+    for name, (ok, detail) in self_check().items():
+        print(f"{'✅' if ok else '❌'} {name:<12} {detail}")
@@ -0,0 +1,294 @@
+# indicators.py
+# -*- coding: utf-8 -*-
+"""
+📐 Motor de indicadores compartido y memoizado
+Calcula cada par (indicador, parámetros) una sola vez por ticker y escaneo.
+La caché se indexa por la identidad del DataFrame, su longitud y su último
+timestamp; las series devueltas son vistas de solo lectura, así que las
+estrategias ya no necesitan hacer `df.copy()` para no pisarse entre ellas.
+"""
+
+import weakref
+import numpy as np
+import pandas as pd
+
+
+def _readonly(values, index, name) -> pd.Series:
+    """Envuelve un array en una Serie cuyo buffer no admite escritura."""
+    arr = np.array(values, dtype=float, copy=True)
+    arr.flags.writeable = False
+    return pd.Series(arr, index=index, name=name, copy=False)
+
+
+class IndicatorEngine:
+    """
+    Caché de indicadores por DataFrame.
+    - Clave del marco: (id(df), len(df), último timestamp)
+    - Clave del indicador: (nombre, *parámetros)
+    Cuando el DataFrame se libera, sus entradas se eliminan automáticamente.
+    """
+
+    def __init__(self):
+        self._frames = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------
+    # Gestión de caché
+    # ------------------------------------------------------------
+    @staticmethod
+    def _frame_key(df):
+        if "timestamp" in df.columns and len(df):
+            last = df["timestamp"].iloc[-1]
+        else:
+            last = df.index[-1] if len(df) else None
+        return (len(df), last)
+
+    def _bucket(self, df) -> dict:
+        fid = id(df)
+        key = self._frame_key(df)
+        entry = self._frames.get(fid)
+        if entry is None:
+            weakref.finalize(df, self._frames.pop, fid, None)
+        if entry is None or entry[0] != key:
+            entry = (key, {})
+            self._frames[fid] = entry
+        return entry[1]
+
+    def get(self, df, name: str, *params) -> pd.Series:
+        """Devuelve el indicador `name(*params)` de `df`, calculándolo solo la primera vez."""
+        cache = self._bucket(df)
+        key = (name,) + tuple(params)
+        series = cache.get(key)
+        if series is None:
+            self.misses += 1
+            values = _KERNELS[name](self, df, *params)
+            series = _readonly(values, df.index, "_".join(str(k) for k in key))
+            cache[key] = series
+        else:
+            self.hits += 1
+        return series
+
+    def warm(self, df, plan) -> None:
+        """Precalcula una lista de (nombre, *parámetros) sobre `df`."""
+        for item in plan:
+            self.get(df, item[0], *item[1:])
+
+    def clear(self) -> None:
+        """Vacía la caché (p. ej. al terminar un escaneo)."""
+        self._frames.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"frames": len(self._frames), "hits": self.hits, "misses": self.misses}
+
+
+# ============================================================
+# Núcleos de cálculo (reciben el motor para reutilizar resultados)
+# ============================================================
+
+def _k_ema(eng, df, col, span):
+    return df[col].ewm(span=span, adjust=False).mean()
+
+
+def _k_sma(eng, df, col, window):
+    return df[col].rolling(window).mean()
+
+
+def _k_std(eng, df, col, window):
+    return df[col].rolling(window).std()
+
+
+def _k_rolling_max(eng, df, col, window, shift=0):
+    s = df[col].shift(shift) if shift else df[col]
+    return s.rolling(window).max()
+
+
+def _k_rolling_min(eng, df, col, window, shift=0):
+    s = df[col].shift(shift) if shift else df[col]
+    return s.rolling(window).min()
+
+
+def _k_avg_gain(eng, df, length):
+    return df["close"].diff().clip(lower=0).rolling(length).mean()
+
+
+def _k_avg_loss(eng, df, length):
+    return (-df["close"].diff().clip(upper=0)).rolling(length).mean()
+
+
+def _k_rsi(eng, df, length):
+    rs = eng.get(df, "avg_gain", length) / eng.get(df, "avg_loss", length)
+    return 100 - (100 / (1 + rs))
+
+
+def _k_true_range(eng, df):
+    # NaN si falta alguna parte (p. ej. la primera vela, sin cierre previo), como el ADX original
+    prev_close = df["close"].shift()
+    tr = np.maximum.reduce([(df["high"] - df["low"]).to_numpy(),
+                            (df["high"] - prev_close).abs().to_numpy(),
+                            (df["low"] - prev_close).abs().to_numpy()])
+    return pd.Series(tr, index=df.index)
+
+
+def _k_atr(eng, df, length):
+    # El ATR original ignoraba las partes NaN: sin cierre previo el rango es high - low
+    tr = eng.get(df, "true_range").fillna(df["high"] - df["low"])
+    return tr.rolling(length).mean()
+
+
+def _k_range_mean(eng, df, length):
+    return (df["high"] - df["low"]).rolling(length).mean()
+
+
+def _k_macd(eng, df, fast, slow):
+    return eng.get(df, "ema", "close", fast) - eng.get(df, "ema", "close", slow)
+
+
+def _k_macd_signal(eng, df, fast, slow, signal):
+    return eng.get(df, "macd", fast, slow).ewm(span=signal, adjust=False).mean()
+
+
+def _k_roc(eng, df, col, periods):
+    return df[col].pct_change(periods=periods) * 100
+
+
+def _k_dm_plus(eng, df):
+    up, down = df["high"].diff(), df["low"].diff()
+    return np.where(up > down, np.maximum(up, 0), 0)
+
+
+def _k_dm_minus(eng, df):
+    up, down = df["high"].diff(), df["low"].diff()
+    return np.where(down > up, np.maximum(down, 0), 0)
+
+
+def _k_di_plus(eng, df, length):
+    tr_n = eng.get(df, "true_range").rolling(length).sum()
+    return 100 * eng.get(df, "dm_plus").rolling(length).sum() / tr_n
+
+
+def _k_di_minus(eng, df, length):
+    tr_n = eng.get(df, "true_range").rolling(length).sum()
+    return 100 * eng.get(df, "dm_minus").rolling(length).sum() / tr_n
+
+
+def _k_adx(eng, df, length):
+    plus, minus = eng.get(df, "di_plus", length), eng.get(df, "di_minus", length)
+    return 100 * (plus - minus).abs() / (plus + minus)
+
+
+def _k_candle_body(eng, df):
+    return (df["close"] - df["open"]).abs()
+
+
+def _k_candle_range(eng, df):
+    return df["high"] - df["low"]
+
+
+def _k_upper_shadow(eng, df):
+    return df["high"] - np.maximum(df["open"], df["close"])
+
+
+def _k_lower_shadow(eng, df):
+    return np.minimum(df["open"], df["close"]) - df["low"]
+
+
+_KERNELS = {
+    "ema": _k_ema,
+    "sma": _k_sma,
+    "std": _k_std,
+    "rolling_max": _k_rolling_max,
+    "rolling_min": _k_rolling_min,
+    "avg_gain": _k_avg_gain,
+    "avg_loss": _k_avg_loss,
+    "rsi": _k_rsi,
+    "true_range": _k_true_range,
+    "atr": _k_atr,
+    "range_mean": _k_range_mean,
+    "macd": _k_macd,
+    "macd_signal": _k_macd_signal,
+    "roc": _k_roc,
+    "dm_plus": _k_dm_plus,
+    "dm_minus": _k_dm_minus,
+    "di_plus": _k_di_plus,
+    "di_minus": _k_di_minus,
+    "adx": _k_adx,
+    "candle_body": _k_candle_body,
+    "candle_range": _k_candle_range,
+    "upper_shadow": _k_upper_shadow,
+    "lower_shadow": _k_lower_shadow,
+}
+
+# Motor global compartido por estrategias y recommender
+ENGINE = IndicatorEngine()
+
+
+# ============================================================
+# Atajos de uso habitual
+# ============================================================
+
+def ema(df, span, col="close"):
+    return ENGINE.get(df, "ema", col, span)
+
+
+def sma(df, window, col="close"):
+    return ENGINE.get(df, "sma", col, window)
+
+
+def rolling_std(df, window, col="close"):
+    return ENGINE.get(df, "std", col, window)
+
+
+def rolling_max(df, window, col="high", shift=0):
+    return ENGINE.get(df, "rolling_max", col, window, shift)
+
+
+def rolling_min(df, window, col="low", shift=0):
+    return ENGINE.get(df, "rolling_min", col, window, shift)
+
+
+def rsi(df, length=14):
+    """RSI con medias simples de ganancias/pérdidas (variante usada en el proyecto)."""
+    return ENGINE.get(df, "rsi", length)
+
+
+def rsi_components(df, length=14):
+    """Devuelve (media de ganancias, media de pérdidas) del RSI."""
+    return ENGINE.get(df, "avg_gain", length), ENGINE.get(df, "avg_loss", length)
+
+
+def true_range(df):
+    return ENGINE.get(df, "true_range")
+
+
+def atr(df, length=14):
+    """ATR como media simple del rango verdadero."""
+    return ENGINE.get(df, "atr", length)
+
+
+def range_mean(df, length=14):
+    """Media simple de (high - low), el 'ATR' simplificado de Murphy."""
+    return ENGINE.get(df, "range_mean", length)
+
+
+def bollinger(df, window=20, num_std=2):
+    """Devuelve (sma, upper, lower)."""
+    mid = sma(df, window)
+    dev = rolling_std(df, window)
+    return mid, mid + num_std * dev, mid - num_std * dev
+
+
+def macd(df, fast=12, slow=26, signal=9):
+    """Devuelve (macd, línea de señal)."""
+    return ENGINE.get(df, "macd", fast, slow), ENGINE.get(df, "macd_signal", fast, slow, signal)
+
+
+def roc(df, periods=5, col="close"):
+    return ENGINE.get(df, "roc", col, periods)
+
+
+def adx(df, length=14):
+    """Devuelve (adx, +DI, -DI)."""
+    return ENGINE.get(df, "adx", length), ENGINE.get(df, "di_plus", length), ENGINE.get(df, "di_minus", length)
@@ -0,0 +1,268 @@
+# metrics.py
+# -*- coding: utf-8 -*-
+"""
+📏 Instrumentación del escaneo: temporizadores, contadores y memoria
+- timer(nombre, **etiquetas): context manager que acumula nº de llamadas, total y máximo
+- inc(nombre, valor, **etiquetas): contadores (aciertos de cache, reintentos HTTP, señales...)
+- muestreo del pico de memoria (RSS) en un hilo de fondo
+- volcado a JSON por ejecución y, opcionalmente, en formato texto de Prometheus
+En modo "off" todas las llamadas son no-ops de coste despreciable.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from config import METRICS_MODE, METRICS_FILE, METRICS_PROM_FILE
+
+MODES = ("off", "json", "prometheus")
+PREFIX = "murphy"
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def _rss_bytes():
+    """Memoria residente actual del proceso (0 si no se puede leer)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class MemorySampler(threading.Thread):
+    """Hilo que muestrea la RSS cada `interval` segundos y guarda el pico."""
+
+    def __init__(self, interval=0.5):
+        super().__init__(name="metrics-memory", daemon=True)
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def stop(self):
+        self._stop_event.set()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+class Metrics:
+    """Registro de métricas de una ejecución (seguro entre hilos)."""
+
+    enabled = True
+
+    def __init__(self, memory_interval=0.5):
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self.timers = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._sampler = MemorySampler(memory_interval) if memory_interval else None
+        if self._sampler:
+            self._sampler.start()
+
+    # ------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------
+    @contextmanager
+    def timer(self, name, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            count, total, peak = self.timers.get(key, (0, 0.0, 0.0))
+            self.timers[key] = (count + 1, total + seconds, max(peak, seconds))
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def merge_timings(self, timings, name, label):
+        """Incorpora {etiqueta: segundos} medidos en otro hilo o proceso."""
+        for value, seconds in timings.items():
+            self.observe(name, seconds, **{label: value})
+
+    def export(self) -> dict:
+        """Temporizadores y contadores en bruto (para enviarlos desde un worker a `merge`)."""
+        with self._lock:
+            return {"timers": dict(self.timers), "counters": dict(self.counters)}
+
+    def merge(self, data):
+        """Suma las métricas exportadas en otro proceso con `export`."""
+        with self._lock:
+            for key, (count, total, peak) in data.get("timers", {}).items():
+                c, t, m = self.timers.get(key, (0, 0.0, 0.0))
+                self.timers[key] = (c + count, t + total, max(m, peak))
+            for key, value in data.get("counters", {}).items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    @property
+    def peak_memory(self):
+        return self._sampler.peak if self._sampler else _rss_bytes()
+
+    # ------------------------------------------------------------
+    # Salida
+    # ------------------------------------------------------------
+    def snapshot(self) -> dict:
+        if self._sampler:
+            self._sampler.stop()
+        with self._lock:
+            timers = [{"name": n, "labels": dict(l), "count": c, "total_s": round(t, 6),
+                       "max_s": round(m, 6), "avg_s": round(t / c, 6)}
+                      for (n, l), (c, t, m) in sorted(self.timers.items())]
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self.counters.items())]
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self._t0, 6),
+            "peak_rss_bytes": self.peak_memory,
+            "timers": timers,
+            "counters": counters,
+        }
+
+    def to_prometheus(self, snapshot=None) -> str:
+        snap = snapshot or self.snapshot()
+        lines = []
+
+        def fmt(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+        seen = set()
+        for t in snap["timers"]:
+            base = f"{PREFIX}_{t['name']}_seconds"
+            if base not in seen:
+                seen.add(base)
+                lines.append(f"# TYPE {base} summary")
+            lines.append(f"{base}_sum{fmt(t['labels'])} {t['total_s']}")
+            lines.append(f"{base}_count{fmt(t['labels'])} {t['count']}")
+        for c in snap["counters"]:
+            base = f"{PREFIX}_{c['name']}_total"
+            if base not in seen:
+                seen.add(base)
+                lines.append(f"# TYPE {base} counter")
+            lines.append(f"{base}{fmt(c['labels'])} {c['value']}")
+        lines.append(f"# TYPE {PREFIX}_peak_rss_bytes gauge")
+        lines.append(f"{PREFIX}_peak_rss_bytes {snap['peak_rss_bytes']}")
+        lines.append(f"# TYPE {PREFIX}_wall_seconds gauge")
+        lines.append(f"{PREFIX}_wall_seconds {snap['wall_s']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=METRICS_FILE, prom_path=None) -> dict:
+        snap = self.snapshot()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as fh:
+            json.dump(snap, fh, indent=2, default=str)
+        if prom_path:
+            with open(prom_path, "w") as fh:
+                fh.write(self.to_prometheus(snap))
+        return snap
+
+
+class NullMetrics:
+    """Modo off: misma interfaz, sin coste."""
+
+    enabled = False
+    peak_memory = 0
+    _NULL = nullcontext()
+
+    def timer(self, name, **labels):
+        return self._NULL
+
+    def observe(self, name, seconds, **labels):
+        pass
+
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def merge_timings(self, timings, name, label):
+        pass
+
+    def export(self):
+        return {}
+
+    def merge(self, data):
+        pass
+
+    def snapshot(self):
+        return {}
+
+    def write(self, path=None, prom_path=None):
+        return {}
+
+
+METRICS = NullMetrics()
+_MODE = "off"
+
+
+def configure(mode=METRICS_MODE):
+    """Activa (json / prometheus) o desactiva (off) la instrumentación para esta ejecución."""
+    global METRICS, _MODE
+    if mode not in MODES:
+        raise ValueError(f"Modo de métricas desconocido: {mode} (opciones: {', '.join(MODES)})")
+    _MODE = mode
+    METRICS = Metrics() if mode != "off" else NullMetrics()
+    return METRICS
+
+
+@contextmanager
+def isolated(enabled=None):
+    """
+    Registro aparte durante el bloque (p. ej. un fragmento en un worker, que hereda
+    al hacer fork las métricas ya acumuladas del principal). Entrega un dict que al
+    salir contiene el `export` de lo medido dentro; fuera, METRICS vuelve a ser el de antes.
+    """
+    global METRICS
+    previous, out = METRICS, {}
+    enabled = previous.enabled if enabled is None else enabled
+    METRICS = Metrics(memory_interval=0) if enabled else NullMetrics()
+    try:
+        yield out
+    finally:
+        out.update(METRICS.export())
+        METRICS = previous
+
+
+def timer(name, **labels):
+    return METRICS.timer(name, **labels)
+
+
+def observe(name, seconds, **labels):
+    METRICS.observe(name, seconds, **labels)
+
+
+def inc(name, value=1, **labels):
+    METRICS.inc(name, value, **labels)
+
+
+def enabled() -> bool:
+    return METRICS.enabled
+
+
+def write(path=METRICS_FILE, prom_path=METRICS_PROM_FILE):
+    """Vuelca las métricas de la ejecución según el modo configurado."""
+    if _MODE == "off":
+        return {}
+    snap = METRICS.write(path, prom_path if _MODE == "prometheus" else None)
+    print(f"[Metrics] Métricas guardadas en {path}" + (f" y {prom_path}" if _MODE == "prometheus" else ""))
+    return snap
@@ -5,21 +5,35 @@
 Evita errores de parseo de Markdown (como el caracter '.').
 """
 
-import requests
+import html
+import queue
+import re
+import threading
+import time
 from typing import Dict
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_THREAD_ID
+
+import http_client
+import metrics
+from config import (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_THREAD_ID,
+                    TELEGRAM_MAX_CHARS, TELEGRAM_LINGER_SEC, TELEGRAM_FLUSH_TIMEOUT)
 
 API_URL = "https://api.telegram.org/bot{token}/{method}"
+SEPARATOR = "\n\n"
 
-def send_telegram_message(text: str) -> None:
-    """
-    Envía un mensaje al canal o grupo configurado en Telegram.
-    Usa formato HTML para evitar errores de parseo con caracteres especiales.
-    """
+# Etiquetas HTML que admite Telegram (las que hay que cerrar y reabrir al trocear)
+HTML_TAGS = {"b", "strong", "i", "em", "u", "ins", "s", "strike", "del", "span",
+             "tg-spoiler", "a", "code", "pre", "blockquote", "tg-emoji"}
+# Unidades que no se pueden partir: etiquetas, entidades y, si no, caracteres sueltos
+_HTML_TOKEN = re.compile(r"<[^<>]*>|&#?\w+;|.", re.S)
+_TAG_NAME = re.compile(r"<\s*(/?)\s*([\w-]+)")
+
+
+def _deliver(text: str) -> bool:
+    """POST a sendMessage. Devuelve True si Telegram aceptó el mensaje."""
     if TELEGRAM_BOT_TOKEN.startswith('PON_AQUI') or TELEGRAM_CHAT_ID.startswith('PON_AQUI'):
         print('[Aviso] Configura TELEGRAM_BOT_TOKEN y TELEGRAM_CHAT_ID en los secrets o entorno.')
         print(text)
-        return
+        return True
 
     payload = {
         'chat_id': TELEGRAM_CHAT_ID,
@@ -31,16 +45,206 @@ def send_telegram_message(text: str) -> None:
     if TELEGRAM_THREAD_ID not in [None, '', '0']:
         payload['message_thread_id'] = TELEGRAM_THREAD_ID
 
+    # Sesión keep-alive compartida, con límite de ritmo y reintentos (respeta retry_after en 429)
     try:
-        r = requests.post(
-            API_URL.format(token=TELEGRAM_BOT_TOKEN, method='sendMessage'),
-            data=payload,
-            timeout=20
-        )
+        url = API_URL.format(token=TELEGRAM_BOT_TOKEN, method='sendMessage')
+        r = http_client.post(url, data=payload, timeout=20)
+        if r.status_code == 400 and "parse entities" in r.text:
+            # HTML rechazado: se reenvía como texto plano antes de dar el mensaje por perdido
+            print('[Telegram] HTML no válido, se reenvía sin formato:', r.text)
+            payload['text'] = _plain_text(text)
+            del payload['parse_mode']
+            r = http_client.post(url, data=payload, timeout=20)
         if r.status_code != 200:
             print('[Telegram] Error:', r.text)
+            return False
+        return True
     except Exception as e:
         print('[Telegram] Excepción:', e)
+        return False
+
+
+def send_telegram_message(text: str) -> None:
+    """
+    Envía un mensaje al canal o grupo configurado en Telegram (bloqueante).
+    Usa formato HTML para evitar errores de parseo con caracteres especiales.
+    Para las alertas del escaneo usar queue_alert(), que no bloquea.
+    """
+    _deliver(text)
+
+
+# ============================================================
+# Cola de envío en segundo plano
+# ============================================================
+
+def _plain_text(text: str) -> str:
+    """Texto sin etiquetas ni entidades HTML, para enviar sin parse_mode."""
+    text = re.sub(r"<\s*br\s*/?>", "\n", text, flags=re.I)
+    return html.unescape(re.sub(r"<[^<>]*>", "", text))
+
+
+def _tag_stack(stack: list, token: str) -> list:
+    """Etiquetas abiertas [(nombre, etiqueta)] tras añadir `token`."""
+    m = _TAG_NAME.match(token) if token.startswith("<") else None
+    if not m or m.group(2).lower() not in HTML_TAGS or token.endswith("/>"):
+        return stack
+    name = m.group(2).lower()
+    if not m.group(1):
+        return stack + [(name, token)]
+    for k in range(len(stack) - 1, -1, -1):
+        if stack[k][0] == name:
+            return stack[:k] + stack[k + 1:]
+    return stack
+
+
+def _closing(stack: list) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(stack))
+
+
+def split_text(text: str, max_chars: int = TELEGRAM_MAX_CHARS) -> list:
+    """
+    Trocea un texto demasiado largo por líneas (y, si hace falta, por espacios
+    o caracteres) sin cortar nunca dentro de una etiqueta o entidad HTML.
+    Las etiquetas abiertas en un corte se cierran al final de la parte y se
+    reabren al principio de la siguiente, para que cada parte sea HTML válido.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    tokens = _HTML_TOKEN.findall(text)
+    parts, opened, i = [], [], 0
+    while i < len(tokens):
+        stack = opened
+        size = sum(len(tag) for _, tag in opened)
+        # Cortes posibles (índice del token siguiente, etiquetas abiertas): fin de línea o espacio
+        line_cut = space_cut = None
+        j = i
+        while j < len(tokens):
+            after = _tag_stack(stack, tokens[j])
+            if j > i and size + len(tokens[j]) + len(_closing(after)) > max_chars:
+                break
+            size += len(tokens[j])
+            stack = after
+            j += 1
+            if tokens[j - 1] == "\n":
+                line_cut = (j, stack)
+            elif tokens[j - 1].isspace():
+                space_cut = (j, stack)
+        if j < len(tokens):
+            j, stack = line_cut or space_cut or (j, stack)
+        parts.append("".join(tag for _, tag in opened) + "".join(tokens[i:j]) + _closing(stack))
+        opened, i = stack, j
+    return parts
+
+
+def pack_messages(alerts, max_chars: int = TELEGRAM_MAX_CHARS) -> list:
+    """Agrupa las alertas, en orden, en el menor nº de mensajes de hasta `max_chars`."""
+    messages, current = [], ""
+    for alert in alerts:
+        for part in split_text(alert, max_chars):
+            if current and len(current) + len(SEPARATOR) + len(part) > max_chars:
+                messages.append(current)
+                current = ""
+            current = f"{current}{SEPARATOR}{part}" if current else part
+    if current:
+        messages.append(current)
+    return messages
+
+
+_STOP = object()
+
+
+class AlertQueue:
+    """
+    Cola de alertas con un worker en segundo plano.
+    El worker acumula las alertas que llegan durante `linger` segundos (o hasta
+    llenar un mensaje) y las envía agrupadas; put() nunca espera a Telegram.
+    """
+
+    def __init__(self, sender=_deliver, max_chars=TELEGRAM_MAX_CHARS, linger=TELEGRAM_LINGER_SEC):
+        self.sender = sender
+        self.max_chars = max_chars
+        self.linger = linger
+        self.sent = 0
+        self.failed = 0
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._work, args=(self._queue,),
+                                                name="telegram-sender", daemon=True)
+                self._thread.start()
+            self._queue.put(text)
+
+    def flush(self, timeout=TELEGRAM_FLUSH_TIMEOUT) -> bool:
+        """
+        Envía lo pendiente y detiene el worker, esperando como mucho `timeout` s.
+        Devuelve False si se agotó el plazo (el resto se descarta al salir el proceso).
+        """
+        with self._lock:
+            thread, q = self._thread, self._queue
+            self._thread = self._queue = None
+        if thread is None:
+            return True
+        q.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"[Telegram] Plazo de {timeout}s agotado con mensajes pendientes.")
+            return False
+        return True
+
+    def _send(self, pending):
+        metrics.inc("telegram_alerts", len(pending))
+        for message in pack_messages(pending, self.max_chars):
+            with metrics.timer("telegram_send"):
+                ok = self.sender(message)
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            metrics.inc("telegram_messages", status="sent" if ok else "failed")
+
+    def _work(self, q):
+        pending, size, deadline = [], 0, None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                if pending and size + len(item) > self.max_chars:
+                    # El mensaje en curso está lleno: se envía sin esperar al plazo
+                    self._send(pending)
+                    pending, size, deadline = [], 0, None
+                pending.append(item)
+                size += len(item) + len(SEPARATOR)
+                if deadline is None:
+                    deadline = time.monotonic() + self.linger
+            if pending and time.monotonic() >= deadline:
+                self._send(pending)
+                pending, size, deadline = [], 0, None
+        if pending:
+            self._send(pending)
+
+
+# Cola global usada por el escaneo
+QUEUE = AlertQueue()
+
+
+def queue_alert(text: str) -> None:
+    """Encola una alerta para envío agrupado en segundo plano."""
+    QUEUE.put(text)
+
+
+def flush_alerts(timeout=TELEGRAM_FLUSH_TIMEOUT) -> bool:
+    """Envía las alertas pendientes con un plazo máximo (llamar al terminar el escaneo)."""
+    return QUEUE.flush(timeout)
 
 
 def format_alert(ticker: str, signal: Dict) -> str:
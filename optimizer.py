@@ -0,0 +1,360 @@
+# optimizer.py
+# -*- coding: utf-8 -*-
+"""
+🔬 Optimizador walk-forward de parámetros de estrategia
+Busca (rejilla o muestreo aleatorio) las constantes de las estrategias y
+los parámetros de riesgo de config sobre data_cache/, y mide cada fold
+fuera de muestra:
+- el histórico se divide en N+1 tramos temporales comunes a todo el universo
+- en cada fold se elige la mejor combinación en los tramos de entrenamiento
+  (ventana creciente o deslizante) y se evalúa en el tramo siguiente
+Cada combinación se simula una sola vez sobre todo el histórico (los
+indicadores solo miran hacia atrás) y sus operaciones se reparten por tramos.
+El trabajo se reparte en un pool de procesos; el OHLCV vive en memoria
+compartida y cada worker reutiliza los indicadores comunes a varias
+combinaciones gracias al motor de indicators.py.
+
+Uso:
+    python optimizer.py murphy --folds 4
+    python optimizer.py rsi_reversal --search random --samples 500 --workers 8
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import config
+from backtest import hold_window, _trades_from_signals, load_universe
+
+FIELDS = ("open", "high", "low", "close", "volume")
+RISK_SPACE = {
+    "config.ATR_MULT_SL": [1.0, 1.5, 2.0, 2.5],
+    "config.RR": [1.5, 2.0, 2.5, 3.0],
+}
+# Espacio de búsqueda por estrategia. Las claves "config.X" se aplican a config
+# (niveles por ATR que usa el backtest cuando la señal no trae TP/SL).
+SPACES = {
+    "murphy": {
+        "EMA_FAST": [8, 10, 12, 16, 20],
+        "EMA_SLOW": [21, 26, 34, 50],
+        "HIGH_BREAK_LEN": [10, 20, 30, 50],
+        "ATR_LEN": [10, 14, 20],
+    },
+    "bollinger_rebound": {
+        "BB_LEN": [10, 14, 20, 26, 30],
+        "BB_STD": [1.5, 2.0, 2.5, 3.0],
+    },
+    "rsi_reversal": {
+        "RSI_LEN": [7, 10, 14, 21],
+        "RSI_LOW": [20, 25, 30, 35],
+        "RSI_HIGH": [65, 70, 75, 80],
+    },
+    "adx_trend": dict(RISK_SPACE),
+    "roc_momentum": dict(RISK_SPACE),
+    "engulfing": dict(RISK_SPACE),
+}
+# Restricciones entre parámetros
+CONSTRAINTS = {
+    "murphy": lambda p: p["EMA_FAST"] < p["EMA_SLOW"],
+    "rsi_reversal": lambda p: p["RSI_LOW"] < p["RSI_HIGH"],
+}
+METRICS = ("tstat", "avg_pnl", "total_pnl", "win_rate")
+
+
+# ============================================================
+# Espacio de parámetros
+# ============================================================
+
+def grid(strategy, space=None) -> list:
+    """Todas las combinaciones válidas, ordenadas para que las vecinas compartan indicadores."""
+    space = space or SPACES[strategy]
+    keys = list(space)
+    valid = CONSTRAINTS.get(strategy, lambda p: True)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    return [c for c in combos if valid(c)]
+
+
+def sample(strategy, n, seed=0, space=None) -> list:
+    """Muestra aleatoria (sin repetición) de la rejilla."""
+    combos = grid(strategy, space)
+    if n >= len(combos):
+        return combos
+    picked = sorted(random.Random(seed).sample(range(len(combos)), n))
+    return [combos[i] for i in picked]
+
+
+@contextmanager
+def override(module, params):
+    """Aplica temporalmente los parámetros a la estrategia (y a config) y los restaura al salir."""
+    saved = []
+    try:
+        for key, value in params.items():
+            target, attr = (config, key[7:]) if key.startswith("config.") else (module, key)
+            saved.append((target, attr, getattr(target, attr)))
+            setattr(target, attr, value)
+        if hasattr(module, "_min_bars"):
+            saved.append((module, "MIN_BARS", module.MIN_BARS))
+            module.MIN_BARS = module._min_bars()
+        yield
+    finally:
+        for target, attr, value in reversed(saved):
+            setattr(target, attr, value)
+
+
+# ============================================================
+# Universo en memoria compartida
+# ============================================================
+
+class SharedUniverse:
+    """
+    OHLCV de todos los tickers en un único bloque de memoria compartida:
+    matriz (5, total_velas) de float64 más los timestamps (ns UTC) en int64.
+    Solo viajan a los workers el nombre del bloque y los offsets.
+    """
+
+    def __init__(self, frames: dict):
+        self.tickers = list(frames)
+        lengths = [len(frames[t]) for t in self.tickers]
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(int).tolist()
+        total = self.offsets[-1]
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, total * 8 * (len(FIELDS) + 1)))
+        values, stamps = _views(self.shm, total)
+        for t, start, end in zip(self.tickers, self.offsets[:-1], self.offsets[1:]):
+            df = frames[t]
+            for i, f in enumerate(FIELDS):
+                values[i, start:end] = df[f].to_numpy(dtype=float)
+            stamps[start:end] = _utc_ns(df["timestamp"])
+
+    def spec(self):
+        return self.shm.name, self.tickers, self.offsets
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _views(shm, total):
+    values = np.ndarray((len(FIELDS), total), dtype=np.float64, buffer=shm.buf)
+    stamps = np.ndarray((total,), dtype=np.int64, buffer=shm.buf, offset=total * 8 * len(FIELDS))
+    return values, stamps
+
+
+def _utc_ns(ts) -> np.ndarray:
+    ts = pd.to_datetime(ts)
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    return ts.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+# Estado de cada worker (se rellena en _init_worker)
+_WORKER = {}
+
+
+def _init_worker(spec, edges):
+    name, tickers, offsets = spec
+    shm = shared_memory.SharedMemory(name=name)
+    values, stamps = _views(shm, offsets[-1])
+    frames = {}
+    for t, start, end in zip(tickers, offsets[:-1], offsets[1:]):
+        cols = {"timestamp": stamps[start:end].view("datetime64[ns]")}
+        cols.update({f: values[i, start:end] for i, f in enumerate(FIELDS)})
+        df = pd.DataFrame(cols, copy=False)
+        # Tramo de cada vela y ventana de mantenimiento: fijos para todas las combinaciones
+        seg = np.searchsorted(edges, stamps[start:end], side="right") - 1
+        frames[t] = (df, seg, hold_window(df))
+    _WORKER.update(shm=shm, frames=frames, n_seg=len(edges) - 1)
+
+
+def _evaluate(strategy, combos):
+    """
+    Simula cada combinación sobre todo el universo del worker.
+    Devuelve un array (combinaciones, tramos, 4) con nº de operaciones,
+    suma de PnL, suma de PnL² y nº de aciertos por tramo de entrada.
+    """
+    module = importlib.import_module(f"strategies.{strategy}")
+    n_seg = _WORKER["n_seg"]
+    out = np.zeros((len(combos), n_seg, 4))
+    for c, params in enumerate(combos):
+        with override(module, params):
+            for ticker, (df, seg, hold) in _WORKER["frames"].items():
+                if len(df) < max(3, module.MIN_BARS):
+                    continue
+                sig = module.generate_signals(df)
+                if sig is None:
+                    continue
+                trades = _trades_from_signals(df, sig, ticker, strategy, np.ones(len(df), bool), hold)
+                if trades.empty:
+                    continue
+                entry_seg = _segment(df, seg, trades["entry_time"])
+                exit_seg = _segment(df, seg, trades["exit_time"])
+                # Se descartan las operaciones que cruzan de un tramo al siguiente
+                keep = (entry_seg == exit_seg) & (entry_seg >= 0) & (entry_seg < n_seg)
+                s = entry_seg[keep]
+                pnl = trades["pnl"].to_numpy(dtype=float)[keep]
+                out[c, :, 0] += np.bincount(s, minlength=n_seg)[:n_seg]
+                out[c, :, 1] += np.bincount(s, weights=pnl, minlength=n_seg)[:n_seg]
+                out[c, :, 2] += np.bincount(s, weights=pnl * pnl, minlength=n_seg)[:n_seg]
+                out[c, :, 3] += np.bincount(s, weights=(pnl > 0).astype(float), minlength=n_seg)[:n_seg]
+    return out
+
+
+def _segment(df, seg, times):
+    pos = np.searchsorted(df["timestamp"].to_numpy(), times.to_numpy(dtype="datetime64[ns]"))
+    return seg[np.minimum(pos, len(seg) - 1)]
+
+
+# ============================================================
+# Walk-forward
+# ============================================================
+
+def segment_edges(frames: dict, n_segments: int) -> np.ndarray:
+    """Límites (ns UTC) de `n_segments` tramos de igual duración sobre todo el universo."""
+    stamps = np.concatenate([_utc_ns(df["timestamp"]) for df in frames.values()])
+    edges = np.linspace(stamps.min(), stamps.max() + 1, n_segments + 1)
+    return edges.astype(np.int64)
+
+
+def metrics(cells) -> dict:
+    """Métricas a partir de (n, suma, suma², aciertos) agregados."""
+    n, s1, s2, wins = (float(x) for x in cells)
+    if n == 0:
+        return {"n_trades": 0, "win_rate": np.nan, "avg_pnl": np.nan, "total_pnl": 0.0, "tstat": np.nan}
+    mean = s1 / n
+    var = (s2 - n * mean * mean) / (n - 1) if n > 1 else 0.0
+    std = np.sqrt(max(var, 0.0))
+    return {
+        "n_trades": int(n),
+        "win_rate": wins / n,
+        "avg_pnl": mean,
+        "total_pnl": s1,
+        "tstat": mean / std * np.sqrt(n) if std > 0 else np.nan,
+    }
+
+
+def walk_forward(combos, results, folds, anchored=True, metric="tstat", min_trades=10) -> list:
+    """
+    Para cada fold elige la mejor combinación en entrenamiento y la mide en el tramo siguiente.
+    `results` es el array (combinaciones, tramos, 4) devuelto por la evaluación.
+    """
+    report = []
+    for k in range(1, folds + 1):
+        lo = 0 if anchored else k - 1
+        train = results[:, lo:k].sum(axis=1)
+        scores = []
+        for cells in train:
+            m = metrics(cells)
+            value = m[metric] if m["n_trades"] >= min_trades else np.nan
+            scores.append(-np.inf if np.isnan(value) else value)
+        best = int(np.argmax(scores))  # desempate: la primera en orden de rejilla
+        report.append({
+            "fold": k,
+            "train_segments": [lo, k - 1],
+            "test_segment": k,
+            "params": combos[best],
+            "train": metrics(train[best]),
+            "test": metrics(results[best, k]),
+        })
+    return report
+
+
+def optimize(strategy, combos, frames, folds=4, anchored=True, metric="tstat", min_trades=10,
+             workers=None, chunk=None):
+    """Evalúa en paralelo todas las combinaciones y devuelve (resultados, informe walk-forward)."""
+    edges = segment_edges(frames, folds + 1)
+    universe = SharedUniverse(frames)
+    workers = workers or os.cpu_count() or 1
+    chunk = chunk or max(1, min(32, len(combos) // (workers * 4) or 1))
+    # Tareas contiguas: combinaciones vecinas comparten indicadores en el mismo worker
+    tasks = [combos[i:i + chunk] for i in range(0, len(combos), chunk)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(universe.spec(), edges)) as pool:
+            parts = list(pool.map(_evaluate, [strategy] * len(tasks), tasks))
+    finally:
+        universe.close()
+    results = np.concatenate(parts) if parts else np.zeros((0, folds + 1, 4))
+    return results, walk_forward(combos, results, folds, anchored, metric, min_trades)
+
+
+def print_report(strategy, report):
+    rows = []
+    for r in report:
+        rows.append({
+            "fold": r["fold"],
+            "params": ", ".join(f"{k}={v}" for k, v in r["params"].items()),
+            "train_n": r["train"]["n_trades"],
+            "train_avg": r["train"]["avg_pnl"],
+            "test_n": r["test"]["n_trades"],
+            "test_win": r["test"]["win_rate"],
+            "test_avg": r["test"]["avg_pnl"],
+            "test_total": r["test"]["total_pnl"],
+        })
+    print(f"\n📊 Walk-forward de {strategy} (fuera de muestra por fold)")
+    with pd.option_context("display.width", 200, "display.max_columns", 20, "display.max_colwidth", 80):
+        print(pd.DataFrame(rows).set_index("fold").round(4))
+    oos = [r["test"] for r in report if r["test"]["n_trades"]]
+    if oos:
+        n = sum(m["n_trades"] for m in oos)
+        total = sum(m["total_pnl"] for m in oos)
+        print(f"\nTotal fuera de muestra: {n} operaciones, PnL medio {total / n:.4f}, PnL total {total:.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimizador walk-forward de parámetros sobre data_cache/")
+    parser.add_argument("strategy", choices=sorted(SPACES))
+    parser.add_argument("--tickers", nargs="*", help="Tickers (por defecto, todos los cacheados)")
+    parser.add_argument("--search", choices=("grid", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=200, help="Combinaciones en búsqueda aleatoria")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--risk", action="store_true", help="Añadir ATR_MULT_SL/RR de config al espacio")
+    parser.add_argument("--folds", type=int, default=4)
+    parser.add_argument("--rolling", action="store_true", help="Ventana de entrenamiento deslizante (no creciente)")
+    parser.add_argument("--metric", choices=METRICS, default="tstat")
+    parser.add_argument("--min-trades", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="JSON de salida (por defecto logs/optimizer_<estrategia>.json)")
+    args = parser.parse_args(argv)
+
+    space = dict(SPACES[args.strategy])
+    if args.risk:
+        space.update(RISK_SPACE)
+    if args.search == "grid":
+        combos = grid(args.strategy, space)
+    else:
+        combos = sample(args.strategy, args.samples, args.seed, space)
+
+    frames = load_universe(args.tickers)
+    if not frames:
+        print("[Optimizer] No hay datos en data_cache/.")
+        return None
+
+    t0 = time.perf_counter()
+    _, report = optimize(args.strategy, combos, frames, args.folds, not args.rolling,
+                         args.metric, args.min_trades, args.workers)
+    elapsed = time.perf_counter() - t0
+    print("=" * 60)
+    print(f" 🔬 {args.strategy}: {len(combos)} combinaciones × {len(frames)} tickers en {elapsed:.1f}s")
+    print("=" * 60)
+    print_report(args.strategy, report)
+
+    output = args.output or os.path.join("logs", f"optimizer_{args.strategy}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump({"strategy": args.strategy, "combinations": len(combos), "folds": report},
+                  fh, indent=2, default=float)
+    print(f"[Optimizer] Informe guardado en {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
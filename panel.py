@@ -0,0 +1,416 @@
+# panel.py
+# -*- coding: utf-8 -*-
+"""
+🧮 Modo panel (tiempo × ticker)
+Carga todo el universo en matrices NumPy alineadas por timestamp
+(filas = velas, columnas = tickers) y calcula de una vez los indicadores
+que usan las estrategias. Las condiciones de cada estrategia se evalúan
+como matrices de enteros (+1 BUY, -1 SELL, 0 sin señal), de modo que el
+coste apenas crece con el número de símbolos.
+Los indicadores se calculan con las velas de cada ticker seguidas
+(Panel.packed), así que un hueco en el calendario de un ticker no deja
+NaN en sus ventanas; longitudes y umbrales se leen de cada estrategia.
+
+Uso:
+    python panel.py
+"""
+
+import time
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import registry
+from candles import Candles
+from data import load_cache, read_universe
+from strategies import (atr_breakout, bollinger_rebound, candle_ma_rsi, ema_crossover, macd_momentum, murphy,
+                        rsi_reversal)
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class Panel:
+    """OHLCV alineado del universo: cada campo es un array (T, N)."""
+
+    def __init__(self, index, tickers, arrays):
+        self.index = index
+        self.tickers = list(tickers)
+        for f in FIELDS:
+            setattr(self, f, arrays[f])
+        # Nº de velas disponibles de cada ticker hasta cada fila (equivale a len(df) en modo ticker)
+        self.bars_seen = np.cumsum(~np.isnan(self.close), axis=0)
+
+    @cached_property
+    def candles(self) -> Candles:
+        """Columnas y patrones de vela del panel, calculados una sola vez."""
+        return Candles.from_panel(self)
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    @classmethod
+    def from_frames(cls, frames: dict) -> "Panel":
+        """Construye el panel a partir de {ticker: DataFrame OHLCV con columna timestamp}."""
+        frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            return cls(pd.DatetimeIndex([]), [], {f: np.empty((0, 0)) for f in FIELDS})
+        wide = pd.concat({t: df.set_index("timestamp")[list(FIELDS)] for t, df in frames.items()}, axis=1)
+        wide = wide.sort_index()
+        tickers = list(frames)
+        arrays = {f: wide.xs(f, axis=1, level=1)[tickers].to_numpy(dtype=float) for f in FIELDS}
+        return cls(wide.index, tickers, arrays)
+
+    def packed(self) -> "Panel":
+        """
+        Mismo panel con las velas de cada ticker seguidas y alineadas al final
+        (la última fila es la última vela de todos). Los huecos del calendario
+        común desaparecen, de modo que medias, desplazamientos y ventanas de cada
+        columna usan solo las velas de su ticker, como en el modo ticker.
+        `source` guarda la fila de origen de cada celda (-1 si está vacía).
+        """
+        valid = ~np.isnan(self.close)
+        src = np.argsort(valid, axis=0, kind="stable")
+        keep = np.take_along_axis(valid, src, axis=0)
+        arrays = {f: np.where(keep, np.take_along_axis(getattr(self, f), src, axis=0), np.nan) for f in FIELDS}
+        out = Panel(pd.RangeIndex(len(self.index)), self.tickers, arrays)
+        out.source = np.where(keep, src, -1)
+        return out
+
+    def unpack(self, matrix) -> np.ndarray:
+        """Lleva una matriz calculada sobre `packed()` a las filas del panel original."""
+        out = np.zeros_like(matrix)
+        ok = self.source >= 0
+        out[self.source[ok], np.nonzero(ok)[1]] = matrix[ok]
+        return out
+
+    def last_rows(self) -> np.ndarray:
+        """Índice de la última fila con datos de cada ticker (-1 si no tiene)."""
+        valid = ~np.isnan(self.close)
+        last = valid.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        return np.where(valid.any(axis=0), last, -1)
+
+
+def load_panel(tickers=None, loader=load_cache) -> Panel:
+    """Carga el universo (por defecto el de tickers_ibex.txt) en un Panel."""
+    tickers = tickers or read_universe()
+    return Panel.from_frames({t: loader(t) for t in tickers})
+
+
+# ============================================================
+# Núcleos 2-D (eje 0 = tiempo)
+# ============================================================
+
+def shift(x, k=1):
+    out = np.full_like(x, np.nan)
+    if k < len(x):
+        out[k:] = x[:len(x) - k]
+    return out
+
+
+def diff(x):
+    return x - shift(x, 1)
+
+
+def ema_many(x, spans) -> dict:
+    """
+    EMAs (adjust=False) de varias longitudes en un único recorrido temporal.
+    Cada ticker arranca en su primera vela válida; los huecos intermedios
+    mantienen el último valor.
+    """
+    spans = tuple(spans)
+    alpha = (2.0 / (np.asarray(spans, dtype=float) + 1.0))[:, None]
+    out = np.full((len(spans),) + x.shape, np.nan)
+    state = np.full((len(spans), x.shape[1]), np.nan)
+    for t in range(x.shape[0]):
+        row = x[t]
+        fresh = np.isnan(state) & ~np.isnan(row)
+        state = np.where(np.isnan(row), state, np.where(fresh, row, state + alpha * (row - state)))
+        out[:, t] = state
+    return {s: out[i] for i, s in enumerate(spans)}
+
+
+def ema(x, span):
+    return ema_many(x, (span,))[span]
+
+
+def rolling_mean(x, window):
+    """Media móvil con min_periods = window (NaN si falta algún dato en la ventana)."""
+    out = np.full_like(x, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sliding_window_view(x, window, axis=0).mean(axis=-1)
+    return out
+
+
+def rolling_std(x, window):
+    """Desviación típica móvil (ddof=1) vía sumas acumuladas."""
+    out = np.full_like(x, np.nan)
+    if len(x) < window:
+        return out
+    filled = np.nan_to_num(x)
+    c1 = np.cumsum(np.vstack([np.zeros((1, x.shape[1])), filled]), axis=0)
+    c2 = np.cumsum(np.vstack([np.zeros((1, x.shape[1])), filled ** 2]), axis=0)
+    cn = np.cumsum(np.vstack([np.zeros((1, x.shape[1])), ~np.isnan(x)]), axis=0)
+    s1 = c1[window:] - c1[:-window]
+    s2 = c2[window:] - c2[:-window]
+    n = cn[window:] - cn[:-window]
+    var = (s2 - s1 ** 2 / window) / (window - 1)
+    out[window - 1:] = np.where(n == window, np.sqrt(np.maximum(var, 0)), np.nan)
+    return out
+
+
+def rolling_max(x, window):
+    out = np.full_like(x, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sliding_window_view(x, window, axis=0).max(axis=-1)
+    return out
+
+
+def rolling_min(x, window):
+    out = np.full_like(x, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sliding_window_view(x, window, axis=0).min(axis=-1)
+    return out
+
+
+def rsi(close, length=14):
+    delta = diff(close)
+    gain = rolling_mean(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), length)
+    loss = rolling_mean(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - (100 / (1 + gain / loss))
+
+
+def true_range(high, low, close, skipna=True):
+    """Rango verdadero; con skipna=False es NaN si falta el cierre previo."""
+    prev_close = shift(close)
+    top = np.fmax if skipna else np.maximum
+    return top(high - low, top(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+# ============================================================
+# Indicadores del universo
+# ============================================================
+
+# Longitudes de EMA de las estrategias: se calculan juntas en un solo recorrido
+EMA_SPANS = tuple(sorted({murphy.EMA_FAST, murphy.EMA_SLOW, ema_crossover.EMA_FAST, ema_crossover.EMA_SLOW,
+                          candle_ma_rsi.EMA_FAST, candle_ma_rsi.EMA_SLOW, 12, 26}))
+
+
+class Indicators(dict):
+    """
+    Indicadores del panel memoizados por nombre y parámetros, p. ej.
+    i["ema", 10] o i["rolling_max", "high", 20, 1]. Cada regla pide las
+    longitudes de su estrategia y lo compartido se calcula una sola vez.
+    """
+
+    def __init__(self, p: Panel):
+        super().__init__()
+        self.p = p
+
+    def __missing__(self, key):
+        name, *args = key if isinstance(key, tuple) else (key,)
+        value = self[key] = _KERNELS[name](self, *args)
+        return value
+
+
+def _k_ema(i, span):
+    spans = EMA_SPANS if span in EMA_SPANS else (span,)
+    for s, v in ema_many(i.p.close, spans).items():
+        i.setdefault(("ema", s), v)
+    return i["ema", span]
+
+
+def _k_dm(i):
+    up, down = diff(i.p.high), diff(i.p.low)
+    return np.where(up > down, np.maximum(up, 0), 0.0), np.where(down > up, np.maximum(down, 0), 0.0)
+
+
+def _k_di(i, side, length):
+    # Sin cierre previo el rango verdadero es NaN (como indicators.adx): el DI espera una vela más
+    tr = true_range(i.p.high, i.p.low, i.p.close, skipna=False)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 * rolling_mean(i["dm"][side], length) / rolling_mean(tr, length)
+
+
+def _k_adx(i, length):
+    plus, minus = i["di", 0, length], i["di", 1, length]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 * np.abs(plus - minus) / (plus + minus)
+
+
+_KERNELS = {
+    "ema": _k_ema,
+    "macd": lambda i, fast, slow: i["ema", fast] - i["ema", slow],
+    "macd_signal": lambda i, fast, slow, sig: ema(i["macd", fast, slow], sig),
+    "rsi": lambda i, length: rsi(i.p.close, length),
+    "sma": lambda i, col, length: rolling_mean(getattr(i.p, col), length),
+    "std": lambda i, col, length: rolling_std(getattr(i.p, col), length),
+    "rolling_max": lambda i, col, length, k=0: shift(rolling_max(getattr(i.p, col), length), k),
+    "rolling_min": lambda i, col, length, k=0: shift(rolling_min(getattr(i.p, col), length), k),
+    "true_range": lambda i: true_range(i.p.high, i.p.low, i.p.close),
+    "atr": lambda i, length: rolling_mean(i["true_range"], length),
+    "range_mean": lambda i, length: rolling_mean(i.p.high - i.p.low, length),
+    "roc": lambda i, length: (i.p.close / shift(i.p.close, length) - 1) * 100,
+    "dm": _k_dm,
+    "di": _k_di,
+    "adx": _k_adx,
+}
+
+
+def compute_indicators(p: Panel) -> Indicators:
+    """Almacén de indicadores del panel; cada uno se calcula la primera vez que una regla lo pide."""
+    return Indicators(p)
+
+
+# ============================================================
+# Reglas de estrategia como matrices
+# ============================================================
+
+def _side(buy, sell):
+    return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+
+def _cross(fast, slow):
+    fp, sp = shift(fast), shift(slow)
+    return (fp < sp) & (fast > slow), (fp > sp) & (fast < slow)
+
+
+def _bands(i, length, width):
+    sma, std = i["sma", "close", length], i["std", "close", length]
+    return sma + width * std, sma - width * std
+
+
+def _murphy(p, i):
+    m = murphy
+    rsi_ = i["rsi", m.RSI_LEN]
+    buy = (p.bars_seen >= m.MIN_BARS) & (i["ema", m.EMA_FAST] > i["ema", m.EMA_SLOW]) \
+        & (p.high > i["rolling_max", "high", m.HIGH_BREAK_LEN, 1]) \
+        & (p.volume > i["sma", "volume", m.VOL_AVG_LEN]) \
+        & (m.RSI_MIN < rsi_) & (rsi_ < m.RSI_MAX) & (i["range_mean", m.ATR_LEN] > 0)
+    return _side(buy, False)
+
+
+def _macd_momentum(p, i):
+    buy, sell = _cross(i["macd", 12, 26], i["macd_signal", 12, 26, 9])
+    ready = p.bars_seen >= macd_momentum.MIN_BARS
+    return _side(ready & buy, ready & sell)
+
+
+def _rsi_reversal(p, i):
+    rsi_ = i["rsi", rsi_reversal.RSI_LEN]
+    return _side(rsi_ < rsi_reversal.RSI_LOW, rsi_ > rsi_reversal.RSI_HIGH)
+
+
+def _bollinger_rebound(p, i):
+    upper, lower = _bands(i, bollinger_rebound.BB_LEN, bollinger_rebound.BB_STD)
+    return _side(p.close < lower, p.close > upper)
+
+
+def _ema_crossover(p, i):
+    return _side(*_cross(i["ema", ema_crossover.EMA_FAST], i["ema", ema_crossover.EMA_SLOW]))
+
+
+def _candle_ma_rsi(p, i):
+    buy, sell = _cross(i["ema", candle_ma_rsi.EMA_FAST], i["ema", candle_ma_rsi.EMA_SLOW])
+    strong = p.candles.strong(0.7)
+    return _side(strong & buy & (i["rsi", 14] > 40), strong & sell & (i["rsi", 14] < 60))
+
+
+def _candle_sr_volume(p, i):
+    ok = p.candles.strong(0.7) & (p.volume > 1.5 * i["sma", "volume", 20])
+    return _side(ok & (p.close > i["rolling_max", "high", 20] * 0.999),
+                 ok & (p.close < i["rolling_min", "low", 20] * 1.001))
+
+
+def _candle_boll_rsi(p, i):
+    upper, lower = _bands(i, 20, 2)
+    strong = p.candles.strong(0.6)
+    return _side(strong & (p.close < lower) & (i["rsi", 14] < 30), strong & (p.close > upper) & (i["rsi", 14] > 70))
+
+
+def _adx_trend(p, i):
+    strong = i["adx", 14] > 25
+    up = i["di", 0, 14] > i["di", 1, 14]
+    return _side(strong & up, strong & ~up)
+
+
+def _atr_breakout(p, i):
+    prev_atr = shift(i["atr", atr_breakout.ATR_LEN])
+    strong = p.candles.strong(0.7) & (p.bars_seen >= atr_breakout.MIN_BARS)
+    return _side(strong & (p.close > shift(p.high) + prev_atr), strong & (p.close < shift(p.low) - prev_atr))
+
+
+def _roc_momentum(p, i):
+    roc, prev = i["roc", 5], shift(i["roc", 5])
+    return _side((roc > 0) & (roc > prev), (roc < 0) & (roc < prev))
+
+
+def _engulfing(p, i):
+    return _side(p.candles.bullish_engulfing(), p.candles.bearish_engulfing())
+
+
+# nombre de estrategia (registry) → regla vectorizada sobre el panel
+RULES = {
+    "murphy": _murphy,
+    "macd_momentum": _macd_momentum,
+    "rsi_reversal": _rsi_reversal,
+    "bollinger_rebound": _bollinger_rebound,
+    "ema_crossover": _ema_crossover,
+    "candle_ma_rsi": _candle_ma_rsi,
+    "candle_sr_volume": _candle_sr_volume,
+    "candle_boll_rsi": _candle_boll_rsi,
+    "adx_trend": _adx_trend,
+    "atr_breakout": _atr_breakout,
+    "roc_momentum": _roc_momentum,
+    "engulfing": _engulfing,
+}
+
+
+def evaluate(p: Panel, indicators=None, names=None) -> dict:
+    """
+    Devuelve {estrategia: matriz (T, N) con +1 BUY, -1 SELL, 0 sin señal} en las
+    filas de `p`. Reglas e indicadores se calculan sobre `p.packed()` (las velas
+    propias de cada ticker); `indicators`, si se pasa, debe ser de ese panel.
+    """
+    q = p.packed()
+    indicators = indicators if indicators is not None else compute_indicators(q)
+    names = names or list(RULES)
+    with np.errstate(invalid="ignore"):
+        return {n: q.unpack(RULES[n](q, indicators)) for n in names}
+
+
+def last_sides(p: Panel, sides: dict) -> pd.DataFrame:
+    """Señal de la última vela de cada ticker: DataFrame (ticker × estrategia) con +1/-1/0."""
+    rows = p.last_rows()
+    cols = np.arange(len(p.tickers))
+    data = {n: np.where(rows >= 0, m[rows, cols], 0) for n, m in sides.items()}
+    return pd.DataFrame(data, index=p.tickers)
+
+
+def active_tickers(p: Panel, sides=None, timestamped_only=True) -> list:
+    """
+    Tickers con alguna señal en su última vela. Con `timestamped_only` solo se
+    cuentan las estrategias cuyas señales llevan timestamp (las únicas que
+    `run.combine_signals` puede elegir como señal final).
+    """
+    sides = sides if sides is not None else evaluate(p)
+    last = last_sides(p, sides)
+    if timestamped_only:
+        last = last[[n for n in last.columns if registry.get(n).timestamped]]
+    return [t for t, hit in zip(last.index, (last != 0).any(axis=1)) if hit]
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    panel = load_panel()
+    t1 = time.perf_counter()
+    sides = evaluate(panel)
+    t2 = time.perf_counter()
+    print(f"[Panel] {panel.shape[1]} tickers × {panel.shape[0]} velas | carga {t1 - t0:.3f}s | "
+          f"indicadores+reglas {t2 - t1:.3f}s")
+    table = last_sides(panel, sides).apply(lambda col: col.map({1: "green", -1: "red", 0: ""}))
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(table)
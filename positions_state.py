@@ -4,74 +4,224 @@
 📊 Control de estado de posiciones y notificaciones
 Guarda, consulta y actualiza la última acción de cada ticker.
 Evita avisos repetidos en ejecuciones sucesivas del workflow de GitHub.
+
+El estado vive en memoria como dict {ticker: registro} (consultas O(1)) y
+se escribe a disco en un único commit al final del escaneo:
+- csv: reescritura atómica (fichero temporal + fsync + os.replace)
+- sqlite: base embebida en modo WAL, una transacción por commit
+Cada "book" (cartera) tiene su propio estado.
+Las funciones load_positions/get_last_action/update_action se mantienen
+como capa de compatibilidad.
 """
 
 import os
+import sqlite3
+import tempfile
+from contextlib import closing
 import pandas as pd
 from datetime import datetime
 
+from config import POSITIONS_BACKEND, POSITIONS_DB
+
 STATE_FILE = "positions_state.csv"
+COLUMNS = ["ticker", "last_action", "last_signal", "last_update"]
+DEFAULT_BOOK = "default"
+
+
+def _state_file(book):
+    if book == DEFAULT_BOOK:
+        return STATE_FILE
+    root, ext = os.path.splitext(STATE_FILE)
+    return f"{root}_{book}{ext}"
+
+
+class PositionStore:
+    """
+    Estado de posiciones de un book en un dict indexado por ticker.
+    Los cambios se acumulan en memoria y se persisten con commit().
+    """
+
+    def __init__(self, book=DEFAULT_BOOK, backend=POSITIONS_BACKEND, path=None):
+        if backend not in ("csv", "sqlite"):
+            raise ValueError(f"Backend de posiciones desconocido: {backend}")
+        self.book = book
+        self.backend = backend
+        self.path = path or (POSITIONS_DB if backend == "sqlite" else _state_file(book))
+        self._rows = {}
+        self._dirty = set()
+        self.load()
+
+    # ------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------
+    def load(self):
+        """(Re)carga el estado desde disco, descartando cambios no confirmados."""
+        self._rows, self._dirty = {}, set()
+        if self.backend == "sqlite":
+            with closing(self._connect()) as con:
+                rows = con.execute(
+                    "SELECT ticker, last_action, last_signal, last_update FROM positions WHERE book = ?",
+                    (self.book,)).fetchall()
+            for r in rows:
+                self._rows[r[0]] = dict(zip(COLUMNS, r))
+            return self
+        if os.path.exists(self.path):
+            try:
+                df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+            except Exception:
+                df = pd.DataFrame(columns=COLUMNS)
+            if "ticker" in df.columns:
+                df = df.reindex(columns=COLUMNS, fill_value="")
+                # Si hubiera duplicados, vale la primera fila (como hacía get_last_action)
+                for rec in reversed(df.to_dict("records")):
+                    self._rows[rec["ticker"]] = rec
+        return self
+
+    def __contains__(self, ticker):
+        return ticker in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, ticker):
+        return self._rows.get(ticker)
+
+    def last_action(self, ticker) -> str:
+        row = self._rows.get(ticker)
+        return row["last_action"] if row else "NONE"
+
+    def last_signal(self, ticker):
+        row = self._rows.get(ticker)
+        return row["last_signal"] if row else None
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self._rows.values()), columns=COLUMNS)
+
+    # ------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------
+    def update(self, ticker, action, now=None):
+        """Registra la acción en memoria (se persiste en el siguiente commit)."""
+        now = now or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._rows[ticker] = {"ticker": ticker, "last_action": action,
+                              "last_signal": action, "last_update": now}
+        self._dirty.add(ticker)
 
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
 
-def load_positions() -> pd.DataFrame:
-    """Carga el CSV de posiciones si existe, o crea uno vacío."""
-    if os.path.exists(STATE_FILE):
+    def commit(self) -> int:
+        """Persiste de una vez los cambios pendientes. Devuelve cuántos tickers se escribieron."""
+        if not self._dirty:
+            return 0
+        n = len(self._dirty)
+        if self.backend == "sqlite":
+            rows = [(self.book,) + tuple(self._rows[t][c] for c in COLUMNS) for t in self._dirty]
+            with closing(self._connect()) as con, con:
+                con.executemany(
+                    "INSERT OR REPLACE INTO positions (book, ticker, last_action, last_signal, last_update) "
+                    "VALUES (?, ?, ?, ?, ?)", rows)
+        else:
+            self._write_csv()
+        self._dirty.clear()
+        return n
+
+    def _write_csv(self):
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix=".positions_", suffix=".tmp", dir=folder)
         try:
-            df = pd.read_csv(STATE_FILE)
-            if "ticker" not in df.columns:
-                df = pd.DataFrame(columns=["ticker", "last_action", "last_signal", "last_update"])
-        except Exception:
-            df = pd.DataFrame(columns=["ticker", "last_action", "last_signal", "last_update"])
-    else:
-        df = pd.DataFrame(columns=["ticker", "last_action", "last_signal", "last_update"])
-    return df
+            with os.fdopen(fd, "w", newline="") as fh:
+                self.to_frame().to_csv(fh, index=False)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _connect(self):
+        con = sqlite3.connect(self.path)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS positions ("
+            "book TEXT NOT NULL, ticker TEXT NOT NULL, last_action TEXT, last_signal TEXT, "
+            "last_update TEXT, PRIMARY KEY (book, ticker))")
+        return con
+
+
+# ============================================================
+# Capa de compatibilidad (API basada en DataFrame)
+# Aceptan tanto un PositionStore (O(1), escritura diferida) como el
+# DataFrame de versiones anteriores.
+# ============================================================
+
+def load_positions(book=DEFAULT_BOOK) -> PositionStore:
+    """Carga el estado de posiciones del book indicado."""
+    return PositionStore(book)
 
 
-def save_positions(df: pd.DataFrame):
-    """Guarda el DataFrame actualizado en CSV."""
-    df.to_csv(STATE_FILE, index=False)
+def save_positions(state):
+    """Persiste el estado (commit atómico si es un PositionStore)."""
+    if isinstance(state, PositionStore):
+        state.commit()
+    else:
+        state.to_csv(STATE_FILE, index=False)
 
 
-def get_last_action(ticker: str, df: pd.DataFrame) -> str:
+def get_last_action(ticker: str, state) -> str:
     """Devuelve la última acción registrada para un ticker."""
-    row = df[df["ticker"] == ticker]
+    if isinstance(state, PositionStore):
+        return state.last_action(ticker)
+    row = state[state["ticker"] == ticker]
     if not row.empty:
         return row.iloc[0]["last_action"]
     return "NONE"
 
 
-def get_last_signal(ticker: str, df: pd.DataFrame) -> str:
+def get_last_signal(ticker: str, state) -> str:
     """Devuelve el último tipo de señal enviada (BUY, SELL, etc.) para el ticker."""
-    row = df[df["ticker"] == ticker]
+    if isinstance(state, PositionStore):
+        return state.last_signal(ticker)
+    row = state[state["ticker"] == ticker]
     if not row.empty:
         return row.iloc[0]["last_signal"]
     return None
 
 
-def update_action(ticker: str, action: str, df: pd.DataFrame) -> pd.DataFrame:
-    """Actualiza o crea una nueva entrada para un ticker."""
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def update_action(ticker: str, action: str, state):
+    """
+    Actualiza o crea una nueva entrada para un ticker.
+    Con un PositionStore el cambio queda pendiente hasta save_positions/commit;
+    con un DataFrame se guarda inmediatamente, como antes.
+    """
+    if isinstance(state, PositionStore):
+        state.update(ticker, action)
+        return state
 
-    if ticker in df["ticker"].values:
-        df.loc[df["ticker"] == ticker, ["last_action", "last_signal", "last_update"]] = [action, action, now]
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if ticker in state["ticker"].values:
+        state.loc[state["ticker"] == ticker, ["last_action", "last_signal", "last_update"]] = [action, action, now]
     else:
-        df = pd.concat([df, pd.DataFrame([{
+        state = pd.concat([state, pd.DataFrame([{
             "ticker": ticker,
             "last_action": action,
             "last_signal": action,
             "last_update": now
         }])], ignore_index=True)
 
-    save_positions(df)
-    return df
+    save_positions(state)
+    return state
 
 
-def should_notify(ticker: str, action: str, df: pd.DataFrame) -> bool:
+def should_notify(ticker: str, action: str, state) -> bool:
     """
     Evita enviar notificaciones repetidas si ya se ha notificado la misma acción.
     Devuelve True solo si la acción ha cambiado.
     """
-    last_signal = get_last_signal(ticker, df)
+    last_signal = get_last_signal(ticker, state)
     return last_signal != action
 
 
@@ -79,21 +229,25 @@ def should_notify(ticker: str, action: str, df: pd.DataFrame) -> bool:
 # Uso conjunto con recommender.py (flujo principal)
 # ============================================================
 
-def process_signal_and_notify(ticker: str, action: str, notifier_func):
+def process_signal_and_notify(ticker: str, action: str, notifier_func, store=None):
     """
     Controla si debe notificarse una acción y actualiza el estado.
     - ticker: símbolo del activo
     - action: BUY, SELL, HOLD, SHORT, COVER o NONE
     - notifier_func: función externa que envía el mensaje (Telegram, etc.)
+    - store: PositionStore compartido; si se omite se carga y se confirma aquí
     """
-    df = load_positions()
-
     if action == "NONE":
         return  # no notificar acciones neutras
 
-    if should_notify(ticker, action, df):
+    own = store is None
+    store = store or load_positions()
+
+    if should_notify(ticker, action, store):
         notifier_func(ticker, action)  # envía mensaje a Telegram u otro canal
-        df = update_action(ticker, action, df)
+        store.update(ticker, action)
+        if own:
+            store.commit()
         print(f"[State] {ticker}: acción '{action}' registrada y notificada ✅")
     else:
         print(f"[State] {ticker}: acción '{action}' ya notificada recientemente, se omite ⚪")
@@ -104,6 +258,5 @@ def process_signal_and_notify(ticker: str, action: str, notifier_func):
 # ============================================================
 
 if __name__ == "__main__":
-    df = load_positions()
-    print(df.head())
-
+    store = load_positions()
+    print(store.to_frame().head())
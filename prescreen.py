@@ -0,0 +1,147 @@
+# prescreen.py
+# -*- coding: utf-8 -*-
+"""
+🧹 Pre-filtro barato del universo antes de evaluar estrategias
+Se resume cada ticker en unos pocos números (último cierre, nº de velas,
+volumen y efectivo medios de las últimas velas, antigüedad de la última vela)
+y las reglas se aplican de una vez como operaciones sobre arrays:
+- precio: PRICE_MIN <= último cierre < PRICE_MAX (el "precio < 10 €" del README)
+- velas mínimas: las que necesitan las estrategias que se van a ejecutar (registry.lookback)
+- liquidez: volumen medio >= PRESCREEN_MIN_VOLUME y efectivo medio (cierre·volumen) >= PRESCREEN_MIN_TURNOVER
+- frescura: última vela con menos de PRESCREEN_MAX_AGE de antigüedad
+Solo los supervivientes pasan a las estrategias; los motivos de descarte van a metrics.
+El resumen sale de los DataFrames (summarize) o, si ya hay un panel.Panel del
+universo (run.py --panel), de sus matrices de una vez (summarize_panel).
+"""
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import registry
+from config import (TIMEZONE, PRICE_MIN, PRICE_MAX, PRESCREEN_MIN_VOLUME, PRESCREEN_MIN_TURNOVER,
+                    PRESCREEN_MAX_AGE, PRESCREEN_WINDOW)
+
+# Orden de comprobación: se registra el primer motivo que falla
+REASONS = ("no_data", "min_bars", "stale", "price_band", "volume", "turnover")
+
+
+def summarize(frames, tickers, window=PRESCREEN_WINDOW, tz=TIMEZONE) -> dict:
+    """
+    Resumen por ticker en arrays alineados con `tickers`:
+    close, bars, avg_volume, avg_turnover y last_ns (última vela en ns UTC; NaN sin datos).
+    Solo lee las últimas `window` velas de cada DataFrame.
+    """
+    n = len(tickers)
+    out = {k: np.full(n, np.nan) for k in ("close", "bars", "avg_volume", "avg_turnover", "last_ns")}
+    for i, t in enumerate(tickers):
+        df = frames.get(t)
+        if df is None or df.empty:
+            continue
+        tail = df.iloc[-window:]
+        close = tail["close"].to_numpy(dtype=float)
+        volume = tail["volume"].to_numpy(dtype=float)
+        out["close"][i] = close[-1]
+        out["bars"][i] = len(df)
+        with np.errstate(invalid="ignore"):
+            out["avg_volume"][i] = np.nanmean(volume) if np.isfinite(volume).any() else np.nan
+            out["avg_turnover"][i] = np.nanmean(close * volume) if np.isfinite(close * volume).any() else np.nan
+        last = pd.Timestamp(tail["timestamp"].iloc[-1] if "timestamp" in tail.columns else tail.index[-1])
+        out["last_ns"][i] = (last.tz_localize(tz) if last.tz is None else last).value
+    return out
+
+
+def summarize_panel(p, tickers=None, window=PRESCREEN_WINDOW, tz=TIMEZONE) -> dict:
+    """
+    Mismo resumen a partir de un panel.Panel, sin recorrer los tickers. Las medias
+    usan las últimas `window` velas propias de cada ticker (Panel.packed), no las
+    del calendario común. Con `tickers`, los arrays se alinean con esa lista.
+    """
+    n = len(p.tickers)
+    out = {k: np.full(n, np.nan) for k in ("close", "bars", "avg_volume", "avg_turnover", "last_ns")}
+    last = p.last_rows()
+    ok = np.flatnonzero(last >= 0)
+    if len(ok):
+        q = p.packed()
+        close, volume = q.close[-window:, ok], q.volume[-window:, ok]
+        turnover = close * volume
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out["avg_volume"][ok] = np.nansum(volume, axis=0) / (~np.isnan(volume)).sum(axis=0)
+            out["avg_turnover"][ok] = np.nansum(turnover, axis=0) / (~np.isnan(turnover)).sum(axis=0)
+        index = p.index if p.index.tz is not None else p.index.tz_localize(tz)
+        out["close"][ok] = q.close[-1, ok]
+        out["bars"][ok] = q.bars_seen[-1, ok]
+        out["last_ns"][ok] = index.as_unit("ns").asi8[last[ok]]
+    if tickers is not None:
+        pos = pd.Index(p.tickers).get_indexer(list(tickers))
+        out = {k: np.where(pos >= 0, v[pos], np.nan) for k, v in out.items()}
+    return out
+
+
+def evaluate(summary, min_bars=None, price_min=PRICE_MIN, price_max=PRICE_MAX,
+             min_volume=PRESCREEN_MIN_VOLUME, min_turnover=PRESCREEN_MIN_TURNOVER,
+             max_age=PRESCREEN_MAX_AGE, now=None) -> np.ndarray:
+    """
+    Motivo de descarte por ticker (array de str, "" si pasa).
+    Límites a None o 0 (en price_max, min_volume, min_turnover, max_age) se desactivan.
+    """
+    min_bars = registry.lookback() if min_bars is None else min_bars
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    close, bars = summary["close"], summary["bars"]
+    with np.errstate(invalid="ignore"):
+        checks = [
+            np.isnan(close),
+            bars < min_bars,
+            (summary["last_ns"] < now.value - pd.Timedelta(max_age).value) if max_age else np.zeros(len(close), bool),
+            ~(close >= (price_min or 0)) | ((close >= price_max) if price_max else False),
+            ~(summary["avg_volume"] >= min_volume) if min_volume else False,
+            ~(summary["avg_turnover"] >= min_turnover) if min_turnover else False,
+        ]
+    checks = [np.broadcast_to(c, close.shape) for c in checks]
+    return np.select(checks, REASONS, default="")
+
+
+def screen(frames, tickers, record=True, panel=None, **limits):
+    """
+    Aplica el pre-filtro. Devuelve (tickers que pasan, {ticker: motivo}) en el orden
+    de `tickers`. Con `record`, cuenta los descartes por motivo en metrics.
+    Con `panel` (el Panel del universo ya construido) el resumen sale de sus matrices.
+    """
+    tickers = list(tickers)
+    with metrics.timer("prescreen"):
+        summary = summarize_panel(panel, tickers) if panel is not None else summarize(frames, tickers)
+        reasons = evaluate(summary, **limits)
+    passed = [t for t, r in zip(tickers, reasons) if not r]
+    rejected = {t: str(r) for t, r in zip(tickers, reasons) if r}
+    if record:
+        record_rejections(rejected, len(passed))
+    return passed, rejected
+
+
+def record_rejections(rejected, passed=0):
+    """Contadores prescreen{result=pass|<motivo>} en metrics."""
+    metrics.inc("prescreen", passed, result="pass")
+    for reason in REASONS:
+        count = sum(1 for r in rejected.values() if r == reason)
+        if count:
+            metrics.inc("prescreen", count, result=reason)
+
+
+def describe() -> str:
+    """Límites activos, para avisar en el escaneo de que el pre-filtro descarta tickers."""
+    parts = [f"precio >= {PRICE_MIN:g}" + (f" y < {PRICE_MAX:g}" if PRICE_MAX else ""),
+             f">= {registry.lookback()} velas"]
+    if PRESCREEN_MIN_VOLUME:
+        parts.append(f"volumen medio >= {PRESCREEN_MIN_VOLUME:g}")
+    if PRESCREEN_MIN_TURNOVER:
+        parts.append(f"efectivo medio >= {PRESCREEN_MIN_TURNOVER:g}")
+    if PRESCREEN_MAX_AGE:
+        parts.append(f"última vela de hace < {PRESCREEN_MAX_AGE.days} días")
+    return ", ".join(parts) + " (PRESCREEN=False lo desactiva)"
+
+
+def report(rejected, total) -> str:
+    """Resumen de una línea: '12/35 tickers pasan (price_band: 20, stale: 3)'."""
+    counts = {r: sum(1 for v in rejected.values() if v == r) for r in REASONS}
+    detail = ", ".join(f"{r}: {c}" for r, c in counts.items() if c)
+    return f"{total - len(rejected)}/{total} tickers pasan el pre-filtro" + (f" ({detail})" if detail else "")
@@ -0,0 +1,457 @@
+# providers.py
+# -*- coding: utf-8 -*-
+"""
+🔌 Proveedores de datos OHLCV intercambiables (config.DATA_PROVIDER)
+Todos implementan la misma interfaz que usa data.py:
+
+    provider.download(tickers, interval="1d", period=None, start=None)
+        → ({ticker: DataFrame normalizado}, {ticker: motivo de fallo})
+
+- yfinance:    yf.download por lotes (importación diferida)
+- yahoo_chart: API chart v8 de Yahoo directamente, vía http_client (ritmo,
+               reintentos, breaker); YAHOO_CHART_URL permite apuntar a fake_yahoo.py
+- cache:       un directorio local de cache (npy/parquet/csv), sin red
+- synthetic:   velas deterministas de synthetic.py (misma semilla → mismos datos)
+- replay:      reproduce unos DataFrames dados hasta un instante que se puede avanzar
+               (se crea en código con ReplayProvider(frames); no se elige por configuración)
+"""
+
+import warnings
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import http_client
+from config import (DATA_PROVIDER, DOWNLOAD_WORKERS, YAHOO_HOST, YAHOO_CHART_URL, TIMEZONE,
+                    MARKET_OPEN, MARKET_CLOSE,
+                    PROVIDER_CACHE_DIR, SYNTHETIC_SEED, SYNTHETIC_EPOCH)
+
+warnings.filterwarnings("ignore", category=FutureWarning, module="yfinance")
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+UNITS = {"m": "min", "h": "h", "d": "D", "wk": "W", "mo": "MS"}
+
+
+# ============================================================
+# Utilidades comunes
+# ============================================================
+
+def normalize(df):
+    """
+    Normaliza un DataFrame de yfinance a las columnas
+    ['timestamp', 'open', 'high', 'low', 'close', 'volume'].
+    """
+    # --- Aplanar MultiIndex si existiera ---
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [f"{a}_{b}".strip().lower() for a, b in df.columns]
+    else:
+        df.columns = [c.lower() for c in df.columns]
+
+    # --- Renombrar columnas ---
+    rename_map = {}
+    for c in df.columns:
+        if "open" in c: rename_map[c] = "open"
+        elif "high" in c: rename_map[c] = "high"
+        elif "low" in c: rename_map[c] = "low"
+        elif "close" in c: rename_map[c] = "close"
+        elif "volume" in c: rename_map[c] = "volume"
+    df = df.rename(columns=rename_map)
+
+    # --- Añadir columna timestamp ---
+    df["timestamp"] = df.index
+    df = df.reset_index(drop=True)
+
+    # --- Seleccionar columnas útiles ---
+    return df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+
+
+def interval_freq(interval) -> str:
+    """Frecuencia de pandas para un intervalo de yfinance ('30m' → '30min', '1d' → '1D')."""
+    for suffix in sorted(UNITS, key=len, reverse=True):
+        if interval.endswith(suffix) and interval[:-len(suffix)].isdigit():
+            return f"{interval[:-len(suffix)]}{UNITS[suffix]}"
+    raise ValueError(f"Intervalo no soportado: {interval}")
+
+
+def period_start(period, now=None):
+    """Inicio de un periodo de yfinance ('12mo', '30d', '1y', '5d', 'ytd', 'max') contado desde `now`."""
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    if not period or period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    units = {"mo": "months", "wk": "weeks", "y": "years", "d": "days"}
+    for suffix in sorted(units, key=len, reverse=True):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return now - pd.DateOffset(**{units[suffix]: int(period[:-len(suffix)])})
+    raise ValueError(f"Periodo no soportado: {period}")
+
+
+def _as_utc(ts, tz=TIMEZONE):
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize(tz) if ts.tz is None else ts).tz_convert("UTC")
+
+
+def window(df, period=None, start=None, now=None):
+    """Recorta `df` a las velas pedidas (desde `start`, o el último `period` hasta `now`)."""
+    if df is None or df.empty:
+        return df
+    ts = df["timestamp"]
+    ts_utc = ts.dt.tz_localize(TIMEZONE) if ts.dt.tz is None else ts
+    ts_utc = ts_utc.dt.tz_convert("UTC")
+    keep = np.ones(len(df), bool)
+    if start is not None:
+        keep &= (ts_utc >= _as_utc(start)).to_numpy()
+    elif period is not None:
+        begin = period_start(period, now)
+        if begin is not None:
+            keep &= (ts_utc >= _as_utc(begin)).to_numpy()
+    if now is not None:
+        keep &= (ts_utc <= _as_utc(now)).to_numpy()
+    return df[keep].reset_index(drop=True)
+
+
+# ============================================================
+# Formato chart v8 de Yahoo (compartido con fake_yahoo.py)
+# ============================================================
+
+def parse_chart(payload, interval="1d"):
+    """
+    Convierte una respuesta chart v8 en un DataFrame normalizado (precios ajustados,
+    como yf.download(auto_adjust=True)). Devuelve (df, error); df vacío si no hay velas.
+    """
+    chart = (payload or {}).get("chart") or {}
+    if chart.get("error"):
+        err = chart["error"]
+        return None, f"{err.get('code', 'error')}: {err.get('description', '')}".strip()
+    results = chart.get("result") or []
+    if not results or not results[0].get("timestamp"):
+        return pd.DataFrame(columns=OHLCV_COLUMNS), None
+    res = results[0]
+    tz = (res.get("meta") or {}).get("exchangeTimezoneName") or TIMEZONE
+    quote = res["indicators"]["quote"][0]
+    df = pd.DataFrame({c: np.asarray(quote.get(c) or [np.nan] * len(res["timestamp"]), dtype=float)
+                       for c in OHLCV_COLUMNS[1:]})
+    ts = pd.to_datetime(np.asarray(res["timestamp"], dtype="int64"), unit="s", utc=True).tz_convert(tz)
+    if interval_freq(interval)[-1] in "DWS":
+        ts = ts.normalize()
+    df.insert(0, "timestamp", ts)
+    adj = (res["indicators"].get("adjclose") or [{}])[0].get("adjclose")
+    if adj is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.asarray(adj, dtype=float) / df["close"].to_numpy()
+        ratio = np.where(np.isfinite(ratio), ratio, 1.0)
+        for c in ("open", "high", "low", "close"):
+            df[c] = df[c].to_numpy() * ratio
+    df = df.dropna(subset=["open", "high", "low", "close"], how="all")
+    return df.drop_duplicates("timestamp", keep="last").reset_index(drop=True), None
+
+
+def to_chart(symbol, df, tz=TIMEZONE, interval="1d"):
+    """Respuesta chart v8 (dict) con las velas de `df`; la inversa de parse_chart."""
+    ts = df["timestamp"]
+    ts = ts.dt.tz_localize(tz) if ts.dt.tz is None else ts
+    epoch = ts.dt.tz_convert("UTC").dt.as_unit("s").astype("int64").tolist() if len(df) else []
+
+    def col(c):
+        return [None if v != v else float(v) for v in df[c].to_numpy(dtype=float)]
+
+    quote = {c: col(c) for c in OHLCV_COLUMNS[1:]}
+    return {"chart": {"result": [{
+        "meta": {"symbol": symbol, "exchangeTimezoneName": str(ts.dt.tz) if len(df) else tz,
+                 "dataGranularity": interval},
+        "timestamp": epoch,
+        "indicators": {"quote": [quote], "adjclose": [{"adjclose": quote["close"]}]},
+    }], "error": None}}
+
+
+# ============================================================
+# Proveedores
+# ============================================================
+
+class DataProvider(ABC):
+    """Interfaz común. `host` es el host de red (None si el proveedor es local)."""
+
+    name = "base"
+    host = None
+
+    @abstractmethod
+    def download(self, tickers, interval="1d", period=None, start=None):
+        """({ticker: DataFrame normalizado}, {ticker: motivo de fallo}) de `tickers`."""
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+# Fragmentos de los errores que yfinance anota por ticker y que merecen reintento
+TRANSIENT_ERRORS = ("rate limit", "too many requests", "429", "timed out", "timeout", "connection",
+                    "500", "502", "503", "504")
+
+
+class YFinanceProvider(DataProvider):
+    """
+    yf.download por lotes (una llamada por lote) bajo el control de http_client.
+    `client` y `yf` permiten inyectar otro HttpClient o un módulo yfinance de prueba.
+    """
+
+    name = "yfinance"
+    host = YAHOO_HOST
+
+    def __init__(self, workers=DOWNLOAD_WORKERS, client=None, yf=None):
+        self.workers = workers
+        self.client = client
+        self.yf = yf
+
+    @staticmethod
+    def _split_batch(raw, batch):
+        """Separa el resultado multi-ticker de yf.download en un DataFrame por ticker."""
+        if raw is None or raw.empty:
+            return {}
+        if not isinstance(raw.columns, pd.MultiIndex):
+            return {batch[0]: raw} if len(batch) == 1 else {}
+        level = 0 if set(batch) & set(raw.columns.get_level_values(0)) else 1
+        available = set(raw.columns.get_level_values(level))
+        return {t: raw.xs(t, axis=1, level=level) for t in batch if t in available}
+
+    @classmethod
+    def _fetch(cls, yf, batch, **kwargs):
+        """
+        yf.download con los fallos a la vista: yfinance se traga los errores HTTP y
+        los anota por ticker en yf.shared._ERRORS. Devuelve ({ticker: velas}, {ticker:
+        error transitorio}) y lanza TransientError (reintento y breaker) solo si ningún
+        ticker trae datos y alguno tiene un error transitorio. Un resultado vacío sin
+        errores (símbolo deslistado, mercado cerrado) no es un fallo de red.
+        """
+        raw = yf.download(batch, **kwargs)
+        errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+        transient = {t: str(errors[t]) for t in batch
+                     if t in errors and any(k in str(errors[t]).lower() for k in TRANSIENT_ERRORS)}
+        parts = {t: sub.dropna(how="all") for t, sub in cls._split_batch(raw, batch).items()}
+        parts = {t: sub for t, sub in parts.items() if not sub.empty}
+        if transient and not parts:
+            detail = next(iter(transient.values()))
+            raise http_client.TransientError(f"yf.download sin datos para {len(transient)} tickers ({detail})")
+        return parts, transient
+
+    def _call(self, yf, batch, kwargs):
+        client = self.client or http_client.CLIENT
+        return client.call(self.host, self._fetch, yf, batch, progress=False, auto_adjust=True, group_by="ticker",
+                           threads=max(1, min(self.workers, len(batch))), **kwargs)
+
+    def download(self, tickers, interval="1d", period=None, start=None):
+        yf = self.yf
+        if yf is None:
+            import yfinance as yf  # importación diferida: los modos offline no necesitan yfinance
+
+        batch = list(tickers)
+        kwargs = {"interval": interval}
+        kwargs.update({"start": start} if start is not None else {"period": period or "12mo"})
+        # yf.download comparte estado global entre llamadas, así que los lotes van de
+        # uno en uno y el paralelismo de red lo da su pool interno (acotado a DOWNLOAD_WORKERS)
+        try:
+            parts, transient = self._call(yf, batch, kwargs)
+        except Exception as e:
+            return {}, {t: f"fallo en descarga ({e})" for t in batch}
+        # Los que fallaron por un error transitorio se repiten solos (con sus reintentos);
+        # lo que ya llegó del resto del lote se conserva
+        retry = [t for t in batch if t in transient and t not in parts]
+        if retry and len(retry) < len(batch):
+            try:
+                again, transient = self._call(yf, retry, kwargs)
+                parts.update(again)
+            except Exception as e:
+                transient = {t: str(e) for t in retry}
+
+        frames, failures = {}, {}
+        for t in batch:
+            sub = parts.get(t)
+            if sub is None:
+                failures[t] = f"fallo en descarga ({transient[t]})" if t in transient else "sin datos en la respuesta"
+                continue
+            try:
+                frames[t] = normalize(sub.copy())
+            except Exception as e:
+                failures[t] = f"datos no válidos ({e})"
+        return frames, failures
+
+
+class YahooChartProvider(DataProvider):
+    """
+    API chart v8 de Yahoo (una petición por símbolo, DOWNLOAD_WORKERS en paralelo).
+    Pasa por http_client: ritmo por host, reintentos con Retry-After y circuit breaker.
+    """
+
+    name = "yahoo_chart"
+
+    def __init__(self, base_url=YAHOO_CHART_URL, workers=DOWNLOAD_WORKERS, timeout=20):
+        self.base_url = base_url.rstrip("/")
+        self.host = self.base_url.split("://", 1)[-1].split("/", 1)[0]
+        self.workers = workers
+        self.timeout = timeout
+
+    def url(self, ticker):
+        return f"{self.base_url}/v8/finance/chart/{ticker}"
+
+    def params(self, interval, period=None, start=None, now=None):
+        now = pd.Timestamp.now(tz="UTC") if now is None else _as_utc(now)
+        begin = _as_utc(start) if start is not None else period_start(period or "12mo", now)
+        begin = begin if begin is not None else pd.Timestamp(0, tz="UTC")
+        return {"period1": int(begin.timestamp()), "period2": int(now.timestamp()),
+                "interval": interval, "includeAdjustedClose": "true", "events": "div,splits"}
+
+    def fetch(self, ticker, interval="1d", period=None, start=None):
+        """Respuesta cruda (status, JSON o None) de un símbolo."""
+        resp = http_client.CLIENT.get(self.url(ticker), params=self.params(interval, period, start),
+                                      headers={"User-Agent": "Mozilla/5.0"}, timeout=self.timeout)
+        try:
+            payload = resp.json()
+        except ValueError:
+            payload = None
+        return resp.status_code, payload
+
+    def _one(self, ticker, interval, period, start):
+        try:
+            status, payload = self.fetch(ticker, interval, period, start)
+        except Exception as e:
+            return None, f"fallo en descarga ({e})"
+        if status >= 500 or status == 429:
+            return None, f"fallo en descarga (HTTP {status})"
+        df, error = parse_chart(payload, interval)
+        if error or status != 200:
+            return None, f"sin datos en la respuesta ({error or f'HTTP {status}'})"
+        if df.empty:
+            return None, "sin datos recientes"
+        return df, None
+
+    def download(self, tickers, interval="1d", period=None, start=None):
+        tickers = list(tickers)
+        if not tickers:
+            return {}, {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(tickers)))) as pool:
+            results = list(pool.map(lambda t: self._one(t, interval, period, start), tickers))
+        frames = {t: df for t, (df, err) in zip(tickers, results) if err is None}
+        failures = {t: err for t, (df, err) in zip(tickers, results) if err is not None}
+        return frames, failures
+
+
+class CacheProvider(DataProvider):
+    """Lee de un directorio de cache local (cualquier backend de data.py); sin red."""
+
+    name = "cache"
+
+    def __init__(self, folder=PROVIDER_CACHE_DIR, fmt=None):
+        from data import get_backend, CsvCache, CACHE_FORMAT
+        self.backends = [get_backend(fmt or CACHE_FORMAT, folder)]
+        if self.backends[0].name != "csv":
+            self.backends.append(CsvCache(folder))
+
+    def _load(self, ticker):
+        for backend in self.backends:
+            df = backend.load(ticker)
+            if df is not None and not df.empty:
+                return df
+        return None
+
+    def download(self, tickers, interval="1d", period=None, start=None):
+        frames, failures = {}, {}
+        for t in tickers:
+            df = window(self._load(t), period, start)
+            if df is None:
+                failures[t] = "sin datos en la respuesta"
+            elif df.empty:
+                failures[t] = "sin datos recientes"
+            else:
+                frames[t] = df
+        return frames, failures
+
+
+class SyntheticProvider(DataProvider):
+    """
+    Velas sintéticas deterministas: cada ticker tiene su propia semilla y una
+    serie fija desde SYNTHETIC_EPOCH, así que las descargas incrementales encajan
+    con lo ya cacheado. `now` fija el "presente" (por defecto, la hora actual).
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed=SYNTHETIC_SEED, epoch=SYNTHETIC_EPOCH, now=None, **kwargs):
+        self.seed = seed
+        self.epoch = epoch
+        self.now = now
+        self.kwargs = kwargs
+        self._series = {}
+
+    def series(self, ticker, interval="1d"):
+        import synthetic
+
+        key = (ticker, interval)
+        if key not in self._series:
+            freq = interval_freq(interval)
+            now = _as_utc(self.now) if self.now is not None else pd.Timestamp.now(tz="UTC")
+            n_bars = len(pd.bdate_range(self.epoch, now.tz_convert(TIMEZONE).tz_localize(None)))
+            if synthetic._is_intraday(freq):
+                n_bars *= len(pd.date_range(f"2000-01-03 {MARKET_OPEN}", f"2000-01-03 {MARKET_CLOSE}",
+                                            freq=freq, inclusive="left"))
+            seed = (zlib.crc32(ticker.encode("utf-8")) + self.seed) % 2 ** 32
+            self._series[key] = synthetic.generate_ohlcv(max(1, n_bars), seed=seed, freq=freq, start=self.epoch,
+                                                         **self.kwargs)
+        return self._series[key]
+
+    def download(self, tickers, interval="1d", period=None, start=None):
+        frames, failures = {}, {}
+        for t in tickers:
+            df = window(self.series(t, interval), period, start, now=self.now or pd.Timestamp.now(tz="UTC"))
+            if df.empty:
+                failures[t] = "sin datos recientes"
+            else:
+                frames[t] = df
+        return frames, failures
+
+
+class ReplayProvider(DataProvider):
+    """
+    Reproduce {ticker: DataFrame} como si fuera el mercado: solo entrega las velas
+    hasta `now`, que se avanza con advance() (p. ej. para probar el modo daemon).
+    """
+
+    name = "replay"
+
+    def __init__(self, frames, now=None):
+        self.frames = frames
+        self.now = pd.Timestamp(now) if now is not None else None
+
+    def advance(self, delta):
+        self.now = self.now + pd.Timedelta(delta)
+        return self.now
+
+    def download(self, tickers, interval="1d", period=None, start=None):
+        frames, failures = {}, {}
+        for t in tickers:
+            df = window(self.frames.get(t), period, start, now=self.now)
+            if df is None:
+                failures[t] = "sin datos en la respuesta"
+            elif df.empty:
+                failures[t] = "sin datos recientes"
+            else:
+                frames[t] = df
+        return frames, failures
+
+
+PROVIDERS = {
+    "yfinance": YFinanceProvider,
+    "yahoo_chart": YahooChartProvider,
+    "cache": CacheProvider,
+    "synthetic": SyntheticProvider,
+}
+
+
+def get_provider(name=DATA_PROVIDER, **kwargs) -> DataProvider:
+    """Instancia el proveedor `name` (ver PROVIDERS; ReplayProvider se crea directamente con sus frames)."""
+    if name not in PROVIDERS:
+        hint = " (ReplayProvider necesita los DataFrames: créalo con providers.ReplayProvider(frames))" \
+            if name == ReplayProvider.name else ""
+        raise ValueError(f"Proveedor de datos desconocido: {name} (opciones: {', '.join(PROVIDERS)}){hint}")
+    return PROVIDERS[name](**kwargs)
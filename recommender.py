@@ -11,30 +11,38 @@ en función de:
 """
 
 import numpy as np
+import indicators as ind
 from positions_state import get_last_action, update_action, save_positions
 
-def decide_action(signal: dict, df, positions_df=None) -> str:
+# Últimos valores que consulta decide_action; el daemon los lee del estado online
+# (streaming.OnlineIndicators) en vez de recalcularlos sobre la ventana en memoria
+INDICATORS = [("ema", "close", 12), ("ema", "close", 26), ("avg_gain", 14), ("avg_loss", 14)]
+
+
+def last_values(df) -> dict:
+    """Último valor de cada indicador de INDICATORS sobre `df` (motor compartido con las estrategias)."""
+    return {key: ind.ENGINE.get(df, *key).iloc[-1] for key in INDICATORS}
+
+
+def decide_action(signal: dict, df, positions_df=None, last=None) -> str:
     """
     Determina la acción a tomar basándose en la señal combinada, RSI y tendencia.
     Ahora incluye estado 'WATCH' para avisos sin ejecutar compra.
+    `last`: {clave: último valor} de INDICATORS ya calculados (p. ej. online); si no, se calculan sobre `df`.
     """
     ticker = signal.get("ticker", "UNKNOWN")
     color = signal.get("color", "red")
     last_action = get_last_action(ticker, positions_df) if positions_df is not None else "NONE"
+    last = last if last is not None else last_values(df)
+    ema_fast, ema_slow, gain, loss = (last[key] for key in INDICATORS)
 
-    # Calcular EMA rápida y lenta
-    df = df.copy()
-    df["ema_fast"] = df["close"].ewm(span=12, adjust=False).mean()
-    df["ema_slow"] = df["close"].ewm(span=26, adjust=False).mean()
-    trend_up = df["ema_fast"].iloc[-1] > df["ema_slow"].iloc[-1]
+    # EMA rápida y lenta (compartidas con las estrategias)
+    trend_up = ema_fast > ema_slow
 
     # RSI aproximado (14 periodos)
-    delta = df["close"].diff()
-    gain = delta.clip(lower=0).rolling(window=14).mean()
-    loss = -delta.clip(upper=0).rolling(window=14).mean()
-    rs = np.where(loss == 0, 0, gain / loss)
+    rs = 0.0 if loss == 0 else np.float64(gain) / np.float64(loss)
     rsi = 100 - (100 / (1 + rs))
-    current_rsi = float(rsi[-1]) if not np.isnan(rsi[-1]) else 50.0
+    current_rsi = float(rsi) if not np.isnan(rsi) else 50.0
 
     print(f"[Recommender] {ticker}: color={color}, trend={'up' if trend_up else 'down'}, RSI={current_rsi:.2f}, last={last_action}")
 
@@ -68,6 +76,32 @@ def decide_action(signal: dict, df, positions_df=None) -> str:
 
     return action
 
+def decide_actions(colors, df) -> np.ndarray:
+    """
+    Versión vectorizada de `decide_action` para todo el histórico de un ticker,
+    sin memoria de posiciones (equivale a last_action = 'NONE' en cada vela).
+    - colors: array con el color final por vela (green/yellow/red)
+    Devuelve un array de acciones (BUY, SHORT, WATCH, NONE).
+    """
+    colors = np.asarray(colors, dtype=object)
+    trend_up = (ind.ema(df, 12) > ind.ema(df, 26)).to_numpy()
+
+    gain, loss = ind.rsi_components(df, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = np.where(loss == 0, 0, gain / loss)
+    rsi = 100 - (100 / (1 + rs))
+    rsi = np.where(np.isnan(rsi), 50.0, rsi)
+
+    green = colors == "green"
+    yellow = colors == "yellow"
+    red = colors == "red"
+
+    action = np.full(len(colors), "NONE", dtype=object)
+    action[green & trend_up & (rsi < 75)] = "BUY"
+    action[red & ~trend_up & (rsi > 30)] = "SHORT"
+    action[(green | yellow) & ~trend_up] = "WATCH"
+    return action
+
 def explain_action(action: str) -> str:
     """
     Devuelve una explicación breve y comprensible del motivo de la acción.
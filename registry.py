@@ -0,0 +1,123 @@
+# registry.py
+# -*- coding: utf-8 -*-
+"""
+🗂️ Registro de estrategias
+Descubre una sola vez los módulos de strategies/*.py, los importa y guarda
+sus funciones junto con los metadatos que cada estrategia declara:
+- MIN_BARS: nº mínimo de velas para poder dar señal
+- INDICATORS: indicadores que consume, como claves del motor de indicators.py
+- TIMESTAMPED: si su señal lleva timestamp (combine_signals solo elige esas)
+- PRIORITY: orden de evaluación (desempata señales con el mismo timestamp)
+"""
+
+import importlib
+import os
+from dataclasses import dataclass, field
+
+import indicators as ind
+
+PACKAGE = "strategies"
+STRATEGIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), PACKAGE)
+
+
+@dataclass(frozen=True)
+class StrategySpec:
+    name: str
+    module_path: str
+    generate_signal: object
+    generate_signals: object = None
+    min_bars: int = 1
+    indicators: tuple = field(default_factory=tuple)
+    timestamped: bool = True
+    priority: int = 1000
+
+    def can_run(self, df) -> bool:
+        """True si el DataFrame tiene velas suficientes para esta estrategia."""
+        return df is not None and len(df) >= self.min_bars
+
+
+_REGISTRY = None
+
+
+def _load(module_path):
+    module = importlib.import_module(module_path)
+    if not hasattr(module, "generate_signal"):
+        return None
+    return StrategySpec(
+        name=module_path.split(".")[-1],
+        module_path=module_path,
+        generate_signal=module.generate_signal,
+        generate_signals=getattr(module, "generate_signals", None),
+        min_bars=int(getattr(module, "MIN_BARS", 1)),
+        indicators=tuple(tuple(i) for i in getattr(module, "INDICATORS", ())),
+        timestamped=bool(getattr(module, "TIMESTAMPED", True)),
+        priority=int(getattr(module, "PRIORITY", 1000)),
+    )
+
+
+def discover(refresh=False) -> list:
+    """Importa (una vez por proceso) todas las estrategias y las devuelve ordenadas por prioridad."""
+    global _REGISTRY
+    if _REGISTRY is not None and not refresh:
+        return _REGISTRY
+    specs = []
+    for fname in sorted(os.listdir(STRATEGIES_DIR)):
+        if not fname.endswith(".py") or fname.startswith("_"):
+            continue
+        spec = _load(f"{PACKAGE}.{fname[:-3]}")
+        if spec is not None:
+            specs.append(spec)
+    _REGISTRY = sorted(specs, key=lambda s: (s.priority, s.name))
+    return _REGISTRY
+
+
+def get_strategies(names=None) -> list:
+    """Estrategias registradas (opcionalmente filtradas por nombre, respetando el orden del registro)."""
+    specs = discover()
+    if names is None:
+        return list(specs)
+    wanted = {n.split(".")[-1] for n in names}
+    return [s for s in specs if s.name in wanted]
+
+
+def get(name) -> StrategySpec:
+    for s in discover():
+        if s.name == name.split(".")[-1]:
+            return s
+    raise KeyError(f"Estrategia no registrada: {name}")
+
+
+def names() -> list:
+    return [s.name for s in discover()]
+
+
+def runnable(df, specs=None) -> list:
+    """Estrategias que pueden ejecutarse con las velas disponibles en `df`."""
+    return [s for s in (specs or discover()) if s.can_run(df)]
+
+
+def indicator_plan(specs=None) -> list:
+    """Lista sin duplicados de los indicadores que necesitan las estrategias indicadas."""
+    plan = []
+    for s in specs or discover():
+        for item in s.indicators:
+            if item not in plan:
+                plan.append(item)
+    return plan
+
+
+def warm(df, specs=None, engine=None) -> None:
+    """Precalcula en el motor de indicadores todo lo que van a pedir las estrategias."""
+    (engine or ind.ENGINE).warm(df, indicator_plan(specs))
+
+
+def min_bars(specs=None) -> int:
+    """Menor nº de velas con el que al menos una estrategia puede dar señal."""
+    specs = specs or discover()
+    return min((s.min_bars for s in specs), default=1)
+
+
+def lookback(specs=None) -> int:
+    """Nº de velas con el que pueden correr todas las estrategias indicadas (el mayor MIN_BARS)."""
+    specs = specs or discover()
+    return max((s.min_bars for s in specs), default=1)
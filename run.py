@@ -4,134 +4,147 @@
 Evita señales incoherentes (por ejemplo, vender sin haber comprado antes).
 """
 
-import pandas as pd
-import importlib
-import time
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
-from data import download_bars
-from notifier import send_telegram_message, format_alert
+from data import download_many, read_universe, derive_many
+from notifier import queue_alert, flush_alerts, format_alert
 from recommender import decide_action, explain_action
-from positions_state import load_positions, save_positions, get_last_action, update_action
-
-# === Estrategias registradas ===
-STRATEGIES = [
-    "strategies.murphy",
-    "strategies.macd_momentum",
-    "strategies.rsi_reversal",
-    "strategies.bollinger_rebound",
-    "strategies.ema_crossover",
-    "strategies.candle_ma_rsi",
-    "strategies.candle_sr_volume",
-    "strategies.candle_boll_rsi",
-    "strategies.adx_trend",
-    "strategies.atr_breakout",
-    "strategies.roc_momentum",
-    "strategies.engulfing"
-]
-
-PAUSE_SEC = 0.35
-
-# === Leer tickers ===
-TICKERS = []
-with open("tickers_ibex.txt", "r", encoding="utf-8") as f:
-    for line in f:
-        t = line.strip()
-        if t and not t.startswith("#"):
-            TICKERS.append(t)
+from positions_state import load_positions
+from panel import Panel, active_tickers
+import registry
+import metrics
+import time
+from config import UNIVERSE_FILE, SHARD_SIZE, PRESCREEN, SCAN_RESULT_FILE
+import prescreen
+import consensus
+from signals import Signal, ScanResult, as_signal
+
+EXECUTORS = ("sequential", "thread", "process")
 
 signals_summary = []
 
-def combine_signals(signals: list) -> dict:
+def combine_signals(signals: list) -> Signal:
     """
-    Combina señales de varias estrategias por mayoría.
+    Combina señales de varias estrategias de un ticker (reglas en consensus.py):
     - Verde si al menos 2 dan green
     - Amarillo si 1 da green o yellow
     - Rojo si ninguna
+    Devuelve una copia de la señal más reciente con el color final (no modifica las de entrada).
     """
-    if not signals:
-        return None
-
-    count_green = sum(1 for s in signals if s and s.get("color") == "green")
-    count_yellow = sum(1 for s in signals if s and s.get("color") == "yellow")
-
-    final_color = "red"
-    if count_green >= 2:
-        final_color = "green"
-    elif count_green == 1 or count_yellow >= 1:
-        final_color = "yellow"
-
-    # Filtrar señales válidas con timestamp
-    valid_signals = [s for s in signals if s and "timestamp" in s]
-    if not valid_signals:
-        return None
-
-    # Convertir todo a Timestamp
-    for s in valid_signals:
-        if not isinstance(s["timestamp"], pd.Timestamp):
-            s["timestamp"] = pd.Timestamp(s["timestamp"])
-
-    latest = max(valid_signals, key=lambda s: s["timestamp"])
-    latest["color"] = final_color
-    return latest
+    return consensus.combine_signals(signals)
 
 
-# === Ejecución principal ===
-print("=" * 60)
-print(" 🤖 IBEX Murphy Adaptive Bot — Inicio de escaneo ")
-print("=" * 60)
-
-# Cargar memoria de posiciones
-positions_df = load_positions()
-
-for ticker in TICKERS:
-    print(f"\n[Info] Escaneando {ticker} ...")
-    df = download_bars(ticker)
-    if df is None or df.empty:
-        print(f"[Advertencia] {ticker}: sin datos recientes, omitido.")
-        continue
-
-    ticker_signals = []
-
-    for strat_path in STRATEGIES:
-        module = importlib.import_module(strat_path)
+def evaluate_ticker(ticker, df):
+    """
+    Ejecuta todas las estrategias sobre un ticker (cálculo local, sin red).
+    Devuelve (ticker, señales, líneas de log, {estrategia: segundos}) para imprimirlas
+    y agregar los tiempos en orden desde el proceso principal.
+    """
+    ticker_signals, log, timings = [], [], {}
+    specs = registry.runnable(df)
+    skipped = [s.name for s in registry.discover() if s not in specs]
+    if skipped:
+        log.append(f"[Info] {ticker}: {len(df)} velas, se omiten {', '.join(skipped)}")
+    t0 = time.perf_counter()
+    registry.warm(df, specs)
+    timings["_indicators"] = time.perf_counter() - t0
+
+    for spec in specs:
+        t0 = time.perf_counter()
         try:
-            signal = module.generate_signal(df)
+            signal = as_signal(spec.generate_signal(df), spec.name, ticker, df["timestamp"].iloc[-1])
             if signal:
-                signal["strategy_name"] = strat_path.split(".")[-1]
                 ticker_signals.append(signal)
-            print(f"[DEBUG] {ticker} - {strat_path.split('.')[-1]}: {signal}")
+            log.append(f"[DEBUG] {ticker} - {spec.name}: {signal}")
         except Exception as e:
-            print(f"[Error] {ticker} - {strat_path}: {e}")
+            log.append(f"[Error] {ticker} - {spec.module_path}: {e}")
+        timings[spec.name] = time.perf_counter() - t0
+    return ticker, ticker_signals, log, timings
+
 
-        time.sleep(PAUSE_SEC)
+def evaluate_universe(tickers, frames, executor="sequential", workers=None):
+    """
+    Evalúa las estrategias de todos los tickers con datos.
+    - executor: 'sequential', 'thread' o 'process'
+    Los resultados se devuelven siempre en el orden de `tickers`.
+    """
+    jobs = [(t, frames[t]) for t in tickers if frames.get(t) is not None and not frames[t].empty]
+    if not jobs:
+        return []
+    names, dfs = zip(*jobs)
+    if executor == "sequential" or len(jobs) == 1:
+        return list(map(evaluate_ticker, names, dfs))
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if executor == "process":
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(evaluate_ticker, names, dfs, chunksize=max(1, len(jobs) // (workers * 4))))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(evaluate_ticker, names, dfs))
+
+
+def decide(result, df, finals=None, last=None):
+    """
+    Consenso y recommender de un ticker, sin tocar el estado ni enviar nada
+    (se puede ejecutar en un worker). `finals` son las señales finales ya calculadas
+    para todo el escaneo (consensus.final_signals); si no, se combina aquí.
+    `last`: últimos valores de recommender.INDICATORS ya calculados (modo daemon).
+    Devuelve (señal final, acción) o (None, None).
+    """
+    ticker, ticker_signals = result[0], result[1]
+    final_signal = finals.get(ticker) if finals is not None else combine_signals(ticker_signals)
+    if not final_signal:
+        return None, None
+    final_signal.ticker = ticker
+    return final_signal, decide_action(final_signal, df, last=last)
 
-    final_signal = combine_signals(ticker_signals)
+
+def handle_result(result, df, positions, decision=None):
+    """
+    Procesa la evaluación de un ticker: consenso, recommender, filtros de
+    coherencia con el estado, actualización de posiciones y alerta en cola.
+    `decision` permite pasar (señal final, acción) ya calculados en un worker.
+    Devuelve la acción registrada, o None si no hubo señal o se descartó.
+    """
+    ticker, ticker_signals, log, timings = result
+    print(f"\n[Info] Escaneando {ticker} ...")
+    print("\n".join(log))
+    metrics.METRICS.merge_timings(timings, "strategy", "strategy")
+    for s in ticker_signals:
+        metrics.inc("signals", color=s.color or "none")
+
+    if decision is None:
+        with metrics.timer("recommender"):
+            decision = decide(result, df)
+    final_signal, action = decision
     if not final_signal:
         print(f"[Info] {ticker}: sin señales relevantes.")
-        continue
+        return None
 
-    final_signal["ticker"] = ticker
-    action = decide_action(final_signal, df)
+    metrics.inc("combined_signals", color=final_signal.color or "none")
+    metrics.inc("actions", action=action)
 
     # Consultar el estado previo del ticker
-    last_action = get_last_action(ticker, positions_df)
+    last_action = positions.last_action(ticker)
 
     # === Filtros de coherencia ===
     if action == "SELL" and last_action not in ["BUY", "HOLD"]:
         print(f"[Filtro] {ticker}: SELL ignorado (no había posición previa).")
-        continue
+        return None
 
     if action == "BUY" and last_action in ["BUY", "HOLD"]:
         print(f"[Filtro] {ticker}: BUY ignorado (ya en posición o seguimiento).")
-        continue
+        return None
 
     if action == "NONE":
         print(f"[Recommender] {ticker} → ninguna acción tomada.")
-        continue
+        return None
 
-    # === Actualizar estado ===
-    positions_df = update_action(ticker, action, positions_df)
-    save_positions(positions_df)
+    # === Actualizar estado (se persiste al final del escaneo) ===
+    with metrics.timer("state_update"):
+        positions.update(ticker, action)
 
     # === Generar mensaje ===
     explanation = explain_action(action)
@@ -142,18 +155,117 @@ for ticker in TICKERS:
         msg = (
             f"<b>{action}</b> en <b>{ticker}</b><br>"
             f"Hora: <code>{final_signal.get('timestamp', 'N/A')}</code><br>"
-            f"Estrategia: <code>{final_signal.get('strategy_name', 'desconocida')}</code>"
+            f"Estrategia: <code>{final_signal.strategy or 'desconocida'}</code>"
         )
 
-    send_telegram_message(f"📊 <b>{action}</b> → {explanation}\n\n{msg}")
-
-print("\n✅ Escaneo finalizado. Resultados enviados a Telegram (si aplicaba).")
-print("=" * 60)
-print(" 🔚 Ejecución completada ")
-print("=" * 60)
-
-
-
-
+    queue_alert(f"📊 <b>{action}</b> → {explanation}\n\n{msg}")
+    return action
+
+
+def scan(args):
+    """Un escaneo completo del universo con las opciones de línea de comandos."""
+    universe = read_universe(args.universe)
+    print("=" * 60)
+    print(" 🤖 IBEX Murphy Adaptive Bot — Inicio de escaneo ")
+    print("=" * 60)
+
+    # Cargar memoria de posiciones
+    with metrics.timer("state_load"):
+        positions = load_positions()
+
+    # Precarga de todo el universo (descargas por lotes + cache)
+    with metrics.timer("download"):
+        frames, failures = download_many(universe)
+    metrics.inc("tickers", len(frames), status="ok")
+    metrics.inc("tickers", len(failures), status="failed")
+    if failures:
+        print(f"[Advertencia] {len(failures)} tickers sin datos tras la descarga por lotes.")
+    # Las estrategias ven STRATEGY_TIMEFRAME, derivado en local de la serie base
+    frames = derive_many(frames)
+
+    tickers = universe
+    panel = None
+    if args.panel:
+        with metrics.timer("panel"):
+            panel = Panel.from_frames({t: frames.get(t) for t in universe})
+    if PRESCREEN:
+        print(f"[Prescreen] Activo: {prescreen.describe()}")
+        tickers, rejected = prescreen.screen(frames, tickers, panel=panel)
+        print(f"[Prescreen] {prescreen.report(rejected, len(universe))}")
+    if args.panel:
+        with metrics.timer("panel"):
+            active = set(active_tickers(panel))
+        total = len(tickers)
+        tickers = [t for t in tickers if t in active]
+        print(f"[Panel] {len(tickers)}/{total} tickers con señales en la última vela")
+
+    for ticker in tickers:
+        if frames.get(ticker) is None or frames[ticker].empty:
+            print(f"[Advertencia] {ticker}: sin datos recientes, omitido.")
+
+    with metrics.timer("evaluate"):
+        results = evaluate_universe(tickers, frames, args.executor, args.workers)
+    table = ScanResult.from_results(results)
+    if SCAN_RESULT_FILE:
+        table.save(SCAN_RESULT_FILE)
+        print(f"[Info] {len(table)} señales de {len(table.tickers)} tickers guardadas en {SCAN_RESULT_FILE}")
+
+    # Consenso de todo el escaneo de una vez (matriz ticker × estrategia)
+    with metrics.timer("consensus"):
+        finals = consensus.final_signals(table)
+    for result in results:
+        df = frames[result[0]]
+        with metrics.timer("recommender"):
+            decision = decide(result, df, finals)
+        handle_result(result, df, positions, decision)
+
+    with metrics.timer("state_commit"):
+        written = positions.commit()
+    with metrics.timer("telegram_flush"):
+        flush_alerts()
+    print(f"[State] {written} posiciones actualizadas en {positions.path}")
+
+    print("\n✅ Escaneo finalizado. Resultados enviados a Telegram (si aplicaba).")
+    print("=" * 60)
+    print(" 🔚 Ejecución completada ")
+    print("=" * 60)
 
 
+# === Ejecución principal ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IBEX Murphy Adaptive Bot")
+    parser.add_argument("--panel", action="store_true",
+                        help="Evaluar primero todo el universo como panel y escanear solo tickers con señal")
+    parser.add_argument("--executor", choices=EXECUTORS, default="thread",
+                        help="Cómo evaluar las estrategias: secuencial, hilos o procesos")
+    parser.add_argument("--workers", type=int, default=None, help="Nº de workers del pool de evaluación")
+    parser.add_argument("--metrics", choices=metrics.MODES, default=None,
+                        help="Instrumentación: off, json o prometheus (por defecto, METRICS del entorno)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Quedarse en marcha durante la sesión y evaluar al cierre de cada vela de INTERVAL")
+    parser.add_argument("--forever", action="store_true", help="Con --daemon, continuar en las sesiones siguientes")
+    parser.add_argument("--universe", default=UNIVERSE_FILE, help="Fichero con la lista de tickers (UNIVERSE_FILE)")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Escanear por fragmentos en un pool de procesos (universos de miles de símbolos)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Tickers por fragmento")
+    parser.add_argument("--resume", action="store_true",
+                        help="Con --sharded, repetir solo los fragmentos pendientes o fallidos del último escaneo")
+    args = parser.parse_args(argv)
+    metrics.configure(args.metrics or metrics.METRICS_MODE)
+
+    if args.daemon:
+        from daemon import LiveScanner
+        LiveScanner(read_universe(args.universe), executor=args.executor,
+                    workers=args.workers).run(forever=args.forever)
+        return
+    with metrics.timer("scan"):
+        if args.sharded:
+            from shards import scan_sharded
+            scan_sharded(read_universe(args.universe), args.shard_size, args.workers, args.resume)
+        else:
+            scan(args)
+    metrics.write()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# shards.py
+# -*- coding: utf-8 -*-
+"""
+🧩 Escaneo por fragmentos para universos grandes (miles de símbolos)
+- divide el universo en fragmentos de SHARD_SIZE tickers
+- cada fragmento se procesa en un worker: descarga (cache + lotes), estrategias,
+  consenso y recommender; devuelve solo resultados ligeros y libera los DataFrames,
+  así que la memoria queda acotada por los fragmentos en vuelo y no por el universo
+- el proceso principal aplica los resultados en el orden del universo (estado,
+  filtros y alertas), sea cual sea el orden en que terminen los workers
+- tras aplicar cada fragmento se guardan posiciones y progreso (SHARD_CHECKPOINT);
+  con --resume solo se repiten los fragmentos pendientes o fallidos
+
+Uso:
+    python run.py --sharded --shard-size 250 --workers 4
+    python run.py --sharded --resume
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import consensus
+import metrics
+import prescreen
+from config import SHARD_SIZE, SHARD_CHECKPOINT, BASE_INTERVAL, STRATEGY_TIMEFRAME, PRESCREEN, SCAN_RESULT_FILE
+from notifier import flush_alerts
+from positions_state import load_positions
+from signals import ScanResult
+
+
+def split(tickers, shard_size=SHARD_SIZE) -> list:
+    """[(id, [tickers])] en el orden del universo."""
+    step = max(1, shard_size)
+    return [(i // step, list(tickers[i:i + step])) for i in range(0, len(tickers), step)]
+
+
+def universe_key(tickers, shard_size) -> str:
+    """
+    Huella del universo, el tamaño de fragmento y los marcos temporales (base y de
+    estrategias): un checkpoint solo vale para el mismo reparto sobre las mismas velas.
+    """
+    text = "\n".join(tickers) + f"\n{shard_size}\n{BASE_INTERVAL}\n{STRATEGY_TIMEFRAME}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """Progreso de un escaneo por fragmentos: fragmentos aplicados y fallidos (JSON atómico)."""
+
+    def __init__(self, key, path=SHARD_CHECKPOINT):
+        self.key = key
+        self.path = path
+        self.done = set()
+        self.failed = {}
+        self.started = datetime.now().isoformat(timespec="seconds")
+
+    @classmethod
+    def load(cls, key, path=SHARD_CHECKPOINT) -> "Checkpoint":
+        ckpt = cls(key, path)
+        if not os.path.exists(path):
+            return ckpt
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            print(f"[Advertencia] Checkpoint ilegible en {path} ({e}), se empieza de cero")
+            return ckpt
+        if data.get("key") != key:
+            print("[Advertencia] El checkpoint es de otro universo o tamaño de fragmento, se empieza de cero")
+            return ckpt
+        ckpt.done = set(data.get("done", []))
+        ckpt.failed = {int(k): v for k, v in data.get("failed", {}).items()}
+        ckpt.started = data.get("started", ckpt.started)
+        return ckpt
+
+    def mark_done(self, shard_id):
+        self.done.add(shard_id)
+        self.failed.pop(shard_id, None)
+
+    def mark_failed(self, shard_id, reason):
+        self.failed[shard_id] = reason
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"key": self.key, "started": self.started, "done": sorted(self.done),
+                       "failed": {str(k): v for k, v in sorted(self.failed.items())}}, fh, indent=1)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ============================================================
+# Worker
+# ============================================================
+
+def scan_shard(shard, record_metrics=False):
+    """
+    Procesa un fragmento completo en el worker. Devuelve (id, [(resultado, decisión)],
+    fallos de descarga, descartes del pre-filtro, métricas del worker); los DataFrames
+    no salen del worker. Las métricas (descarga, pre-filtro, consenso...) van en bruto
+    para sumarlas en el principal con metrics.METRICS.merge.
+    """
+    from data import download_many, derive_many
+    from run import evaluate_ticker, decide
+
+    shard_id, tickers = shard
+    with metrics.isolated(record_metrics) as measured:
+        with metrics.timer("download"):
+            frames, failures = download_many(tickers)
+        frames = derive_many(frames)
+        rejected = {}
+        if PRESCREEN:
+            tickers, rejected = prescreen.screen(frames, tickers, record=False)
+        results = []
+        with metrics.timer("evaluate"):
+            for t in tickers:
+                df = frames.get(t)
+                if df is None or df.empty:
+                    continue
+                results.append(evaluate_ticker(t, df))
+        # Consenso del fragmento entero como operación de matrices
+        with metrics.timer("consensus"):
+            finals = consensus.final_signals(ScanResult.from_results(results))
+        with metrics.timer("recommender"):
+            items = [(result, decide(result, frames.pop(result[0]), finals)) for result in results]
+        frames.clear()
+    return shard_id, items, failures, rejected, measured
+
+
+def _network_failures(failures) -> dict:
+    """Fallos de red (se reintentan con --resume); 'sin datos' no cuenta como fallo del fragmento."""
+    return {t: r for t, r in failures.items() if r.startswith("fallo en descarga")}
+
+
+# ============================================================
+# Proceso principal
+# ============================================================
+
+def scan_sharded(tickers, shard_size=SHARD_SIZE, workers=None, resume=False, checkpoint_path=SHARD_CHECKPOINT):
+    """Escaneo completo por fragmentos. Devuelve el checkpoint final."""
+    from run import handle_result
+
+    shards = split(tickers, shard_size)
+    key = universe_key(tickers, shard_size)
+    ckpt = Checkpoint.load(key, checkpoint_path) if resume else Checkpoint(key, checkpoint_path)
+    pending = [s for s in shards if s[0] not in ckpt.done]
+    workers = workers or os.cpu_count() or 1
+
+    print("=" * 60)
+    print(f" 🧩 Escaneo por fragmentos: {len(tickers)} tickers, {len(shards)} fragmentos de {shard_size}"
+          f" ({len(pending)} pendientes), {workers} workers")
+    print("=" * 60)
+    if PRESCREEN:
+        print(f"[Prescreen] Activo: {prescreen.describe()}")
+
+    positions = load_positions()
+    ready, order, tables = {}, [s[0] for s in pending], []
+    next_pos = 0
+
+    def apply_ready():
+        # Aplica en orden del universo todos los fragmentos consecutivos ya terminados
+        nonlocal next_pos
+        while next_pos < len(order) and order[next_pos] in ready:
+            shard_id = order[next_pos]
+            outcome = ready.pop(shard_id)
+            next_pos += 1
+            if isinstance(outcome, Exception):
+                ckpt.mark_failed(shard_id, f"{type(outcome).__name__}: {outcome}")
+                print(f"[Error] Fragmento {shard_id}: {outcome}")
+                metrics.inc("shards", status="failed")
+            else:
+                _, items, failures, rejected, _ = outcome
+                network = _network_failures(failures)
+                if network:
+                    # No se aplica nada del fragmento: al reanudar se repite entero sin duplicar alertas
+                    ckpt.mark_failed(shard_id, f"{len(network)} tickers sin descargar: {', '.join(sorted(network))}")
+                    print(f"[Error] Fragmento {shard_id}: {len(network)} tickers sin descargar, se reintentará")
+                    metrics.inc("shards", status="failed")
+                else:
+                    prescreen.record_rejections(rejected, len(items))
+                    tables.append(ScanResult.from_results(result for result, _ in items))
+                    for result, decision in items:
+                        handle_result(result, None, positions, decision)
+                    metrics.inc("tickers", len(items), status="ok")
+                    metrics.inc("tickers", len(failures), status="failed")
+                    ckpt.mark_done(shard_id)
+                    metrics.inc("shards", status="ok")
+            positions.commit()
+            ckpt.save()
+
+    # Como mucho 2 fragmentos por worker entre en vuelo y terminados a la espera de
+    # los anteriores: memoria acotada también en el principal
+    queue = list(pending)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while queue or running:
+            while queue and len(running) + len(ready) < workers * 2:
+                shard = queue.pop(0)
+                running[pool.submit(scan_shard, shard, metrics.enabled())] = shard[0]
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                shard_id = running.pop(fut)
+                try:
+                    ready[shard_id] = fut.result()
+                    metrics.METRICS.merge(ready[shard_id][-1])
+                except Exception as e:
+                    ready[shard_id] = e
+            apply_ready()
+
+    flush_alerts()
+    if SCAN_RESULT_FILE:
+        # Solo los fragmentos aplicados en esta ejecución
+        ScanResult.concat(tables).save(SCAN_RESULT_FILE)
+    if ckpt.failed:
+        print(f"[Advertencia] {len(ckpt.failed)} fragmentos fallidos; repite con --resume para reintentarlos:")
+        for shard_id, reason in sorted(ckpt.failed.items()):
+            print(f"  - fragmento {shard_id}: {reason}")
+    else:
+        ckpt.clear()
+        print(f"\n✅ Escaneo por fragmentos completado ({len(shards)} fragmentos).")
+    return ckpt
@@ -0,0 +1,201 @@
+# signals.py
+# -*- coding: utf-8 -*-
+"""
+📶 Señales tipadas y tabla columnar de resultados
+- Signal: registro compacto (dataclass con __slots__) con el mismo esquema para
+  todas las estrategias. Admite lectura tipo dict (signal.get('tp')) para el
+  recommender y las alertas; los campos sin valor (None/NaN) cuentan como ausentes.
+- ScanResult: una fila por ticker × estrategia con columnas tipadas. Es lo que
+  se guarda de cada escaneo (csv o parquet) y sobre lo que se opera por columnas.
+"""
+
+import math
+import os
+from dataclasses import dataclass, field, fields, replace
+
+import numpy as np
+import pandas as pd
+
+# Color por defecto según el lado de la señal
+SIDE_COLORS = {"BUY": "green", "SELL": "red"}
+
+
+def _missing(v) -> bool:
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+
+@dataclass(slots=True)
+class Signal:
+    timestamp: pd.Timestamp
+    signal: str = None                  # BUY / SELL
+    color: str = None                   # green / yellow / red (por defecto, según el lado)
+    entry: float = math.nan
+    tp: float = math.nan
+    sl: float = math.nan
+    shares: int = None
+    reason: str = None
+    risk_per_share: float = math.nan
+    strategy: str = ""
+    ticker: str = ""
+    extra: dict = field(default=None)   # columnas propias de la estrategia (rsi, ema_fast...)
+
+    def __post_init__(self):
+        self.timestamp = pd.Timestamp(self.timestamp) if not _missing(self.timestamp) else None
+        if self.color is None:
+            self.color = SIDE_COLORS.get(self.signal)
+
+    @classmethod
+    def from_dict(cls, data: dict, timestamp=None) -> "Signal":
+        """Señal a partir de un dict suelto; `timestamp` si el dict no lo trae."""
+        names = {f.name for f in fields(cls)} - {"extra"}
+        known = {k: v for k, v in data.items() if k in names}
+        if "strategy_name" in data:
+            known.setdefault("strategy", data["strategy_name"])
+        known.setdefault("timestamp", timestamp)
+        extra = {k: v for k, v in data.items() if k not in names and k != "strategy_name"}
+        return cls(**known, extra=extra or None)
+
+    def get(self, key, default=None):
+        """Lectura tipo dict: campos, 'strategy_name' o columnas extra; sin valor → default."""
+        if key == "strategy_name":
+            key = "strategy"
+        try:
+            value = getattr(self, key) if key in _FIELDS else (self.extra or {})[key]
+        except KeyError:
+            return default
+        return default if _missing(value) else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def replace(self, **changes) -> "Signal":
+        """Copia con los campos cambiados (las señales de las estrategias no se modifican)."""
+        return replace(self, **changes)
+
+    def to_dict(self) -> dict:
+        out = {f: getattr(self, f) for f in _FIELDS if f != "extra"}
+        out.update(self.extra or {})
+        return out
+
+
+_FIELDS = tuple(f.name for f in fields(Signal))
+_ABSENT = object()
+
+
+def as_signal(value, strategy="", ticker="", timestamp=None):
+    """
+    Normaliza la salida de una estrategia: Signal, dict (formato antiguo) o vacío → None.
+    Se anotan estrategia y ticker; `timestamp` se usa si el dict no trae el suyo.
+    """
+    if not value:
+        return None
+    signal = value if isinstance(value, Signal) else Signal.from_dict(value, timestamp)
+    signal.strategy = strategy or signal.strategy
+    signal.ticker = ticker or signal.ticker
+    return signal
+
+
+# ============================================================
+# Tabla de resultados
+# ============================================================
+
+# columna → dtype; los timestamps se guardan en UTC para poder mezclar tickers
+SCHEMA = {
+    "ticker": object,
+    "strategy": object,
+    "timestamp": "datetime64[ns, UTC]",
+    "signal": object,
+    "color": object,
+    "entry": float,
+    "tp": float,
+    "sl": float,
+    "shares": "Int64",
+    "risk_per_share": float,
+    "reason": object,
+}
+
+
+class ScanResult:
+    """Señales de un escaneo: una fila por ticker × estrategia que dio señal."""
+
+    def __init__(self, frame: pd.DataFrame = None, records=None):
+        self.frame = frame if frame is not None else self._build({c: [] for c in SCHEMA})
+        # Objetos Signal originales alineados con las filas (solo en memoria, con sus extras)
+        self.records = records
+
+    @staticmethod
+    def _build(cols) -> pd.DataFrame:
+        cols = dict(cols)
+        cols["timestamp"] = pd.DatetimeIndex(pd.to_datetime(cols["timestamp"], utc=True)).as_unit("ns")
+        return pd.DataFrame(cols).astype({c: t for c, t in SCHEMA.items() if c != "timestamp"})
+
+    @classmethod
+    def from_signals(cls, signals) -> "ScanResult":
+        signals = [s for s in signals if s is not None]
+        return cls(cls._build({c: [getattr(s, c) for s in signals] for c in SCHEMA}), signals)
+
+    @classmethod
+    def from_results(cls, results) -> "ScanResult":
+        """A partir de los resultados de run.evaluate_ticker: (ticker, señales, log, tiempos)."""
+        return cls.from_signals(s for _, ticker_signals, *_ in results for s in ticker_signals)
+
+    @classmethod
+    def concat(cls, tables) -> "ScanResult":
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls()
+        records = None
+        if all(t.records is not None for t in tables):
+            records = [s for t in tables for s in t.records]
+        return cls(pd.concat([t.frame for t in tables], ignore_index=True), records)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def tickers(self) -> list:
+        return list(pd.unique(self.frame["ticker"]))
+
+    def signal(self, row) -> Signal:
+        """Señal de la fila `row` (el objeto original si se conserva)."""
+        if self.records is not None:
+            return self.records[row]
+        data = self.frame.iloc[row].to_dict()
+        data["shares"] = None if pd.isna(data["shares"]) else int(data["shares"])
+        return Signal(**data)
+
+    def signals(self, ticker=None) -> list:
+        """Filas como objetos Signal (de un ticker o de toda la tabla)."""
+        df = self.frame if ticker is None else self.frame[self.frame["ticker"] == ticker]
+        out = []
+        for row in df.itertuples(index=False):
+            data = row._asdict()
+            data["shares"] = None if pd.isna(data["shares"]) else int(data["shares"])
+            out.append(Signal(**data))
+        return out
+
+    def color_counts(self) -> pd.DataFrame:
+        """Nº de señales por ticker y color (ticker × green/yellow/red)."""
+        counts = pd.crosstab(self.frame["ticker"], self.frame["color"])
+        return counts.reindex(columns=["green", "yellow", "red"], fill_value=0)
+
+    def save(self, path):
+        """Guarda la tabla: parquet si la ruta acaba en .parquet (requiere pyarrow), si no CSV."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        if path.endswith(".parquet"):
+            self.frame.to_parquet(tmp, index=False)
+        else:
+            self.frame.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> "ScanResult":
+        if path.endswith(".parquet"):
+            return cls(pd.read_parquet(path))
+        df = pd.read_csv(path)
+        return cls(cls._build({c: df[c].replace({np.nan: None}) if SCHEMA[c] is object else df[c]
+                               for c in SCHEMA}))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades compartidas por las estrategias para construir el resultado
+columnar de `generate_signals(df)` (una fila por vela) y extraer la última
+fila para el `generate_signal(df)` clásico como `signals.Signal`.
+"""
+import numpy as np
+import pandas as pd
+
+from signals import Signal
+
+SIGNAL_COLUMNS = ['timestamp', 'signal', 'color', 'entry', 'tp', 'sl', 'shares', 'reason']
+
+
+def _pick(buy, sell, value_buy, value_sell):
+    """Valor por vela según el lado de la señal (NaN si no hay señal)."""
+    return np.where(buy, value_buy, np.where(sell, value_sell, np.nan))
+
+
+def signal_frame(df, buy, sell, *, tp, sl, reason, entry=None, shares=100, extra=None):
+    """
+    Construye el DataFrame de señales de una estrategia.
+    - buy/sell: máscaras booleanas por vela (BUY tiene prioridad, como en los `if` originales)
+    - tp/sl/reason: tuplas (valor_buy, valor_sell); escalares o arrays
+    - entry: precio de entrada por vela (por defecto el cierre)
+    - extra: columnas adicionales {nombre: array}, se anulan donde no hay señal
+    """
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.asarray(sell, dtype=bool) & ~buy
+    active = buy | sell
+    close = df['close'].to_numpy(dtype=float)
+    entry = close if entry is None else np.asarray(entry, dtype=float)
+
+    shares = np.broadcast_to(np.asarray(shares, dtype=float), active.shape)
+    cols = {
+        'timestamp': df['timestamp'].to_numpy() if 'timestamp' in df.columns else df.index,
+        'signal': np.select([buy, sell], ['BUY', 'SELL'], default=None),
+        'color': np.select([buy, sell], ['green', 'red'], default=None),
+        'entry': np.where(active, entry, np.nan),
+        'tp': _pick(buy, sell, *tp),
+        'sl': _pick(buy, sell, *sl),
+        'shares': pd.array(np.where(active, shares, np.nan), dtype='Int64'),
+        'reason': np.select([buy, sell], list(reason), default=None),
+    }
+    for name, values in (extra or {}).items():
+        cols[name] = np.where(active, np.asarray(values, dtype=float), np.nan)
+    # Un único constructor: mucho más barato que asignar columna a columna
+    out = pd.DataFrame(cols, index=df.index)
+    return out
+
+
+def warmup_mask(n, min_len):
+    """True en las velas donde la historia disponible alcanza `min_len` filas."""
+    return np.arange(n) >= (min_len - 1)
+
+
+def last_signal(signals):
+    """
+    Devuelve la señal de la última vela como `Signal` (mismo esquema en todas
+    las estrategias; las columnas propias van a `extra`), o None si no hay señal.
+    """
+    if signals is None or signals.empty:
+        return None
+    row = signals.iloc[-1]
+    if row['signal'] is None or pd.isna(row['signal']):
+        return None
+    extra = {k: row[k] for k in signals.columns if k not in SIGNAL_COLUMNS and k != 'risk_per_share'}
+    return Signal(
+        timestamp=row['timestamp'],
+        signal=row['signal'],
+        color=row['color'],
+        entry=float(row['entry']),
+        tp=float(row['tp']),
+        sl=float(row['sl']),
+        shares=None if pd.isna(row['shares']) else int(row['shares']),
+        reason=row['reason'],
+        risk_per_share=float(row.get('risk_per_share', np.nan)),
+        extra=extra or None,
+    )
@@ -1,6 +1,27 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
+import indicators as ind
+from strategies._common import signal_frame, last_signal
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 15
+INDICATORS = [("adx", 14), ("di_plus", 14), ("di_minus", 14)]
+TIMESTAMPED = True
+PRIORITY = 90
+
+def generate_signals(df):
+    """
+    Señales vectorizadas sobre todo el histórico (una fila por vela):
+        - BUY si ADX > 25 y +DI > -DI
+        - SELL si ADX > 25 y +DI <= -DI
+    """
+    adx, di_plus, di_minus = ind.adx(df, 14)
+    strong = (adx > 25).to_numpy()
+    up = (di_plus > di_minus).to_numpy()
+    return signal_frame(df, strong & up, strong & ~up,
+                        tp=(np.nan, np.nan), sl=(np.nan, np.nan),
+                        reason=('ADX fuerte y +DI > -DI', 'ADX fuerte y +DI < -DI'))
 
 def generate_signal(df):
     """
@@ -8,29 +29,4 @@ def generate_signal(df):
         - BUY si ADX > 25 y +DI > -DI
         - SELL si ADX > 25 y +DI < -DI
     """
-    df = df.copy()
-    high, low, close = df['high'], df['low'], df['close']
-
-    df['tr'] = np.maximum.reduce([high - low,
-                                  abs(high - close.shift()),
-                                  abs(low - close.shift())])
-    df['dm_plus'] = np.where(high.diff() > low.diff(), np.maximum(high.diff(), 0), 0)
-    df['dm_minus'] = np.where(low.diff() > high.diff(), np.maximum(low.diff(), 0), 0)
-
-    tr14 = df['tr'].rolling(14).sum()
-    plus14 = df['dm_plus'].rolling(14).sum()
-    minus14 = df['dm_minus'].rolling(14).sum()
-
-    df['di_plus'] = 100 * plus14 / tr14
-    df['di_minus'] = 100 * minus14 / tr14
-    df['adx'] = 100 * abs(df['di_plus'] - df['di_minus']) / (df['di_plus'] + df['di_minus'])
-
-    latest = df.iloc[-1]
-    signal = {}
-    if latest['adx'] > 25:
-        if latest['di_plus'] > latest['di_minus']:
-            signal = {'signal': 'BUY', 'reason': 'ADX fuerte y +DI > -DI', 'color': 'green'}
-        else:
-            signal = {'signal': 'SELL', 'reason': 'ADX fuerte y +DI < -DI', 'color': 'red'}
-    return signal
-
+    return last_signal(generate_signals(df))
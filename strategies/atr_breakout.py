@@ -1,60 +1,51 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
+import indicators as ind
+from candles import Candles
+from strategies._common import signal_frame, last_signal, warmup_mask
 
 ATR_LEN = 14  # Periodo de ATR
 
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = ATR_LEN + 1
+INDICATORS = [("atr", ATR_LEN), ("candle_body",), ("candle_range",)]
+TIMESTAMPED = True
+PRIORITY = 100
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada de ATR Breakout sobre todo el histórico.
+    """
+    atr = ind.atr(df, ATR_LEN).to_numpy()
+    prev_atr = ind.atr(df, ATR_LEN).shift().to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+
+    # Condiciones de ruptura alcista / bajista respecto a la vela previa
+    breakout_up = close > df['high'].shift().to_numpy(dtype=float) + prev_atr
+    breakout_down = close < df['low'].shift().to_numpy(dtype=float) - prev_atr
+
+    # Vela decisiva: cuerpo > 70% del rango
+    strong = Candles.from_frame(df).strong(0.7) & warmup_mask(len(df), MIN_BARS)
+
+    return signal_frame(df, strong & breakout_up, strong & breakout_down,
+                        tp=(close + atr * 2, close - atr * 2),
+                        sl=(close - atr * 1.5, close + atr * 1.5),
+                        reason=('Ruptura alcista con ATR', 'Ruptura bajista con ATR'))
+
 def generate_signal(df: pd.DataFrame):
     """
     Estrategia ATR Breakout:
     Detecta rupturas basadas en ATR y rango de velas recientes.
     """
-    df = df.copy()
-    
-    # Calcular ATR
-    df['high_low'] = df['high'] - df['low']
-    df['high_prevclose'] = abs(df['high'] - df['close'].shift())
-    df['low_prevclose'] = abs(df['low'] - df['close'].shift())
-    df['tr'] = df[['high_low', 'high_prevclose', 'low_prevclose']].max(axis=1)
-    df['atr'] = df['tr'].rolling(ATR_LEN).mean()
-
-    if len(df) < ATR_LEN + 1:
+    if len(df) < MIN_BARS:
         return None  # datos insuficientes
 
-    last = df.iloc[-1]
-    prev = df.iloc[-2]
-
-    # Condiciones de ruptura alcista
-    breakout_up = last['close'] > prev['high'] + prev['atr']
-    # Condiciones de ruptura bajista
-    breakout_down = last['close'] < prev['low'] - prev['atr']
-
-    # Vela decisiva: cuerpo > 70% del rango
-    body = abs(last['close'] - last['open'])
-    range_ = last['high'] - last['low']
-    strong_candle = range_ > 0 and body / range_ > 0.7
-
-    if strong_candle and breakout_up:
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.signal == 'BUY':
         print("[ATR Breakout] Ruptura alcista detectada ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] + last['atr'] * 2,
-            'sl': last['close'] - last['atr'] * 1.5,
-            'reason': 'Ruptura alcista con ATR',
-            'shares': 100
-        }
-
-    if strong_candle and breakout_down:
+    else:
         print("[ATR Breakout] Ruptura bajista detectada ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] - last['atr'] * 2,
-            'sl': last['close'] + last['atr'] * 1.5,
-            'reason': 'Ruptura bajista con ATR',
-            'shares': 100
-        }
-
-    return None
-
+    return signal
@@ -1,5 +1,30 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
+import indicators as ind
+from strategies._common import signal_frame, last_signal
+
+BB_LEN = 20
+BB_STD = 2
+
+# === Metadatos para el registro de estrategias ===
+def _min_bars():
+    return BB_LEN
+
+MIN_BARS = _min_bars()
+INDICATORS = [("sma", "close", BB_LEN), ("std", "close", BB_LEN)]
+TIMESTAMPED = True
+PRIORITY = 40
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada del rebote/corrección en Bandas de Bollinger.
+    """
+    sma, upper, lower = ind.bollinger(df, BB_LEN, BB_STD)
+    close = df['close'].to_numpy(dtype=float)
+    sma = sma.to_numpy()
+    return signal_frame(df, close < lower.to_numpy(), close > upper.to_numpy(),
+                        tp=(sma, sma), sl=(close * 0.97, close * 1.03),
+                        reason=('Rebote en banda inferior', 'Corrección desde banda superior'))
 
 def generate_signal(df: pd.DataFrame):
     """
@@ -7,35 +32,11 @@ def generate_signal(df: pd.DataFrame):
         - BUY si precio toca la banda inferior
         - SELL si precio toca la banda superior
     """
-    df['sma'] = df['close'].rolling(20).mean()
-    df['std'] = df['close'].rolling(20).std()
-    df['upper'] = df['sma'] + 2 * df['std']
-    df['lower'] = df['sma'] - 2 * df['std']
-    last = df.iloc[-1]
-
-    if last['close'] < last['lower']:
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.color == 'green':
         print("[Bollinger] Rebote en banda inferior ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['sma'],
-            'sl': last['close'] * 0.97,
-            'reason': 'Rebote en banda inferior',
-            'shares': 100,
-            'color': 'green'
-        }
-
-    if last['close'] > last['upper']:
+    else:
         print("[Bollinger] Corrección desde banda superior ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['sma'],
-            'sl': last['close'] * 1.03,
-            'reason': 'Corrección desde banda superior',
-            'shares': 100,
-            'color': 'red'
-        }
-
-    return None
-
+    return signal
@@ -1,6 +1,32 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
+import indicators as ind
+from candles import Candles
+from strategies._common import signal_frame, last_signal
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 20
+INDICATORS = [("sma", "close", 20), ("std", "close", 20), ("rsi", 14), ("candle_body",), ("candle_range",)]
+TIMESTAMPED = True
+PRIORITY = 80
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada de Velas fuertes + Bandas de Bollinger + RSI.
+    """
+    sma, upper, lower = ind.bollinger(df, 20, 2)
+    rsi = ind.rsi(df, 14).to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+    sma = sma.to_numpy()
+    strong = Candles.from_frame(df).strong(0.6)
+
+    # Rebote en banda inferior con RSI bajo / corrección en banda superior con RSI alto
+    buy = strong & (close < lower.to_numpy()) & (rsi < 30)
+    sell = strong & (close > upper.to_numpy()) & (rsi > 70)
+    return signal_frame(df, buy, sell,
+                        tp=(sma, sma), sl=(close * 0.97, close * 1.03),
+                        reason=('Rebote en banda inferior con RSI<30', 'Corrección en banda superior con RSI>70'))
 
 def generate_signal(df: pd.DataFrame):
     """
@@ -8,51 +34,11 @@ def generate_signal(df: pd.DataFrame):
         - BUY si vela fuerte toca banda inferior y RSI < 30
         - SELL si vela fuerte toca banda superior y RSI > 70
     """
-    df = df.copy()
-    df['sma'] = df['close'].rolling(20).mean()
-    df['std'] = df['close'].rolling(20).std()
-    df['upper'] = df['sma'] + 2 * df['std']
-    df['lower'] = df['sma'] - 2 * df['std']
-
-    # RSI 14 periodos
-    delta = df['close'].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
-    rs = avg_gain / avg_loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-
-    last = df.iloc[-1]
-    body = abs(last['close'] - last['open'])
-    range_ = last['high'] - last['low']
-    strong_candle = range_ > 0 and body / range_ > 0.6
-
-    # Rebote en banda inferior con RSI bajo
-    if strong_candle and last['close'] < last['lower'] and last['rsi'] < 30:
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.color == 'green':
         print("[Candle+Boll+RSI] Rebote técnico detectado ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['sma'],
-            'sl': last['close'] * 0.97,
-            'reason': 'Rebote en banda inferior con RSI<30',
-            'shares': 100,
-            'color': 'green'
-        }
-
-    # Corrección en banda superior con RSI alto
-    if strong_candle and last['close'] > last['upper'] and last['rsi'] > 70:
+    else:
         print("[Candle+Boll+RSI] Corrección probable ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['sma'],
-            'sl': last['close'] * 1.03,
-            'reason': 'Corrección en banda superior con RSI>70',
-            'shares': 100,
-            'color': 'red'
-        }
-
-    return None
-
+    return signal
@@ -1,6 +1,37 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
+import indicators as ind
+from candles import Candles
+from strategies._common import signal_frame, last_signal
+
+EMA_FAST = 10
+EMA_SLOW = 20
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 15
+INDICATORS = [("ema", "close", EMA_FAST), ("ema", "close", EMA_SLOW), ("rsi", 14), ("candle_body",), ("candle_range",)]
+TIMESTAMPED = True
+PRIORITY = 60
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada del cruce de EMAs con vela decisiva y RSI moderado.
+    """
+    ema_fast = ind.ema(df, EMA_FAST)
+    ema_slow = ind.ema(df, EMA_SLOW)
+    rsi = ind.rsi(df, 14).to_numpy()
+    fast, slow = ema_fast.to_numpy(), ema_slow.to_numpy()
+    fast_prev, slow_prev = ema_fast.shift().to_numpy(), ema_slow.shift().to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+
+    # Patrón de vela: cuerpo mayor a 70% del rango → vela decisiva
+    strong = Candles.from_frame(df).strong(0.7)
+    buy = strong & (fast_prev < slow_prev) & (fast > slow) & (rsi > 40)
+    sell = strong & (fast_prev > slow_prev) & (fast < slow) & (rsi < 60)
+    return signal_frame(df, buy, sell,
+                        tp=(close * 1.02, close * 0.98), sl=(close * 0.98, close * 1.02),
+                        reason=('Cruce de EMA con vela fuerte y RSI>40', 'Cruce de EMA con vela fuerte y RSI<60'))
 
 def generate_signal(df: pd.DataFrame):
     """
@@ -9,45 +40,11 @@ def generate_signal(df: pd.DataFrame):
     - Vela decisiva (cuerpo > 70% del rango)
     - RSI moderado
     """
-    df = df.copy()
-    df['ema_fast'] = df['close'].ewm(span=10, adjust=False).mean()
-    df['ema_slow'] = df['close'].ewm(span=20, adjust=False).mean()
-    df['delta'] = df['close'].diff()
-    df['gain'] = np.where(df['delta'] > 0, df['delta'], 0)
-    df['loss'] = np.where(df['delta'] < 0, -df['delta'], 0)
-    df['rsi'] = 100 - (100 / (1 + pd.Series(df['gain']).rolling(14).mean() / pd.Series(df['loss']).rolling(14).mean()))
-
-    last, prev = df.iloc[-1], df.iloc[-2]
-
-    # Patrón de vela: cuerpo mayor a 70% del rango → vela decisiva
-    body = abs(last['close'] - last['open'])
-    range_ = last['high'] - last['low']
-    strong_candle = range_ > 0 and body / range_ > 0.7
-
-    # Cruce alcista con RSI moderado y vela fuerte
-    if strong_candle and prev['ema_fast'] < prev['ema_slow'] and last['ema_fast'] > last['ema_slow'] and last['rsi'] > 40:
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.color == 'green':
         print("[Candle+MA+RSI] Señal de COMPRA detectada ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 1.02,
-            'sl': last['close'] * 0.98,
-            'reason': 'Cruce de EMA con vela fuerte y RSI>40',
-            'shares': 100,
-            'color': 'green'
-        }
-
-    # Cruce bajista con RSI alto y vela fuerte
-    if strong_candle and prev['ema_fast'] > prev['ema_slow'] and last['ema_fast'] < last['ema_slow'] and last['rsi'] < 60:
+    else:
         print("[Candle+MA+RSI] Señal de VENTA detectada ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 0.98,
-            'sl': last['close'] * 1.02,
-            'reason': 'Cruce de EMA con vela fuerte y RSI<60',
-            'shares': 100,
-            'color': 'red'
-        }
-
-    return None
+    return signal
@@ -1,5 +1,35 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
+import indicators as ind
+from candles import Candles
+from strategies._common import signal_frame, last_signal
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 20
+INDICATORS = [("sma", "volume", 20), ("rolling_max", "high", 20, 0), ("rolling_min", "low", 20, 0),
+              ("candle_body",), ("candle_range",)]
+TIMESTAMPED = True
+PRIORITY = 70
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada de la ruptura de soporte/resistencia con vela y volumen.
+    """
+    vol_avg = ind.sma(df, 20, col='volume').to_numpy()
+    max20 = ind.rolling_max(df, 20, col='high').to_numpy()
+    min20 = ind.rolling_min(df, 20, col='low').to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+
+    # Vela decisiva: cuerpo grande y volumen alto
+    strong = Candles.from_frame(df).strong(0.7)
+    vol_ok = df['volume'].to_numpy(dtype=float) > 1.5 * vol_avg
+
+    buy = strong & (close > max20 * 0.999) & vol_ok
+    sell = strong & (close < min20 * 1.001) & vol_ok
+    return signal_frame(df, buy, sell,
+                        tp=(close * 1.015, close * 0.985), sl=(close * 0.985, close * 1.015),
+                        reason=('Ruptura de resistencia con volumen y vela fuerte',
+                                'Ruptura de soporte con volumen y vela fuerte'))
 
 def generate_signal(df: pd.DataFrame):
     """
@@ -8,44 +38,11 @@ def generate_signal(df: pd.DataFrame):
     - Vela decisiva (cuerpo grande)
     - Confirmación de volumen
     """
-    df = df.copy()
-    df['vol_avg'] = df['volume'].rolling(20).mean()
-    df['max20'] = df['high'].rolling(20).max()
-    df['min20'] = df['low'].rolling(20).min()
-
-    last = df.iloc[-1]
-
-    # Vela decisiva: cuerpo grande y volumen alto
-    body = abs(last['close'] - last['open'])
-    range_ = last['high'] - last['low']
-    strong_candle = range_ > 0 and body / range_ > 0.7
-    vol_ok = last['volume'] > 1.5 * last['vol_avg']
-
-    # Ruptura de resistencia con confirmación de volumen
-    if strong_candle and last['close'] > last['max20'] * 0.999 and vol_ok:
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.color == 'green':
         print("[Candle+SR+Vol] Ruptura alcista confirmada ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 1.015,
-            'sl': last['close'] * 0.985,
-            'reason': 'Ruptura de resistencia con volumen y vela fuerte',
-            'shares': 100,
-            'color': 'green'
-        }
-
-    # Ruptura bajista de soporte con volumen
-    if strong_candle and last['close'] < last['min20'] * 1.001 and vol_ok:
+    else:
         print("[Candle+SR+Vol] Ruptura bajista confirmada ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 0.985,
-            'sl': last['close'] * 1.015,
-            'reason': 'Ruptura de soporte con volumen y vela fuerte',
-            'shares': 100,
-            'color': 'red'
-        }
-
-    return None
-
+    return signal
@@ -1,5 +1,32 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
+import indicators as ind
+from strategies._common import signal_frame, last_signal
+
+EMA_FAST = 10
+EMA_SLOW = 30
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 2
+INDICATORS = [("ema", "close", EMA_FAST), ("ema", "close", EMA_SLOW)]
+TIMESTAMPED = True
+PRIORITY = 50
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada del cruce de EMAs (10/30) sobre todo el histórico.
+    """
+    ema_fast = ind.ema(df, EMA_FAST)
+    ema_slow = ind.ema(df, EMA_SLOW)
+    fast, slow = ema_fast.to_numpy(), ema_slow.to_numpy()
+    fast_prev, slow_prev = ema_fast.shift().to_numpy(), ema_slow.shift().to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+
+    buy = (fast_prev < slow_prev) & (fast > slow)
+    sell = (fast_prev > slow_prev) & (fast < slow)
+    return signal_frame(df, buy, sell,
+                        tp=(close * 1.02, close * 0.98), sl=(close * 0.98, close * 1.02),
+                        reason=('Cruce alcista de EMAs', 'Cruce bajista de EMAs'))
 
 def generate_signal(df: pd.DataFrame):
     """
@@ -7,36 +34,11 @@ def generate_signal(df: pd.DataFrame):
     - Cruce alcista → señal BUY
     - Cruce bajista → señal SELL
     """
-    df = df.copy()
-    df['ema_fast'] = df['close'].ewm(span=10, adjust=False).mean()
-    df['ema_slow'] = df['close'].ewm(span=30, adjust=False).mean()
-    last, prev = df.iloc[-1], df.iloc[-2]
-
-    # Cruce alcista
-    if prev['ema_fast'] < prev['ema_slow'] and last['ema_fast'] > last['ema_slow']:
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.color == 'green':
         print("[EMA] Cruce alcista ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 1.02,
-            'sl': last['close'] * 0.98,
-            'reason': 'Cruce alcista de EMAs',
-            'shares': 100,
-            'color': 'green'
-        }
-
-    # Cruce bajista
-    if prev['ema_fast'] > prev['ema_slow'] and last['ema_fast'] < last['ema_slow']:
+    else:
         print("[EMA] Cruce bajista ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 0.98,
-            'sl': last['close'] * 1.02,
-            'reason': 'Cruce bajista de EMAs',
-            'shares': 100,
-            'color': 'red'
-        }
-
-    return None
-
+    return signal
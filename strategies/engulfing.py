@@ -1,5 +1,26 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
+import numpy as np
+from candles import Candles
+from strategies._common import signal_frame, last_signal
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 2
+INDICATORS = []
+TIMESTAMPED = True
+PRIORITY = 120
+
+def generate_signals(df):
+    """
+    Versión vectorizada del patrón Engulfing sobre todo el histórico.
+    """
+    # Bullish / Bearish Engulfing
+    candles = Candles.from_frame(df)
+    bull = candles.bullish_engulfing()
+    bear = candles.bearish_engulfing()
+    return signal_frame(df, bull, bear,
+                        tp=(np.nan, np.nan), sl=(np.nan, np.nan),
+                        reason=('Bullish Engulfing', 'Bearish Engulfing'))
 
 def generate_signal(df):
     """
@@ -7,19 +28,6 @@ def generate_signal(df):
         - BUY si Bullish Engulfing
         - SELL si Bearish Engulfing
     """
-    df = df.copy()
-    signal = {}
     if len(df) < 2:
-        return signal
-
-    last = df.iloc[-1]
-    prev = df.iloc[-2]
-
-    # Bullish Engulfing
-    if last['close'] > last['open'] and prev['close'] < prev['open'] and last['close'] > prev['open'] and last['open'] < prev['close']:
-        signal = {'signal': 'BUY', 'reason': 'Bullish Engulfing', 'color': 'green'}
-    # Bearish Engulfing
-    elif last['close'] < last['open'] and prev['close'] > prev['open'] and last['open'] > prev['close'] and last['close'] < prev['open']:
-        signal = {'signal': 'SELL', 'reason': 'Bearish Engulfing', 'color': 'red'}
-    return signal
-
+        return None
+    return last_signal(generate_signals(df))
@@ -1,5 +1,32 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
+import indicators as ind
+from strategies._common import signal_frame, last_signal, warmup_mask
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 35
+INDICATORS = [("macd", 12, 26), ("macd_signal", 12, 26, 9)]
+TIMESTAMPED = True
+PRIORITY = 20
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada de los cruces MACD(12, 26, 9) sobre todo el histórico.
+    """
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp')
+
+    macd, macd_signal = ind.macd(df, 12, 26, 9)
+    m, s = macd.to_numpy(), macd_signal.to_numpy()
+    m_prev, s_prev = macd.shift().to_numpy(), macd_signal.shift().to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+
+    ready = warmup_mask(len(df), MIN_BARS)
+    buy = ready & (m_prev < s_prev) & (m > s)
+    sell = ready & (m_prev > s_prev) & (m < s)
+    return signal_frame(df, buy, sell,
+                        tp=(close * 1.02, close * 0.98), sl=(close * 0.98, close * 1.02),
+                        reason=('Cruce alcista de MACD', 'Cruce bajista de MACD'))
 
 def generate_signal(df: pd.DataFrame):
     """
@@ -7,43 +34,14 @@ def generate_signal(df: pd.DataFrame):
     - Cruce alcista → señal BUY
     - Cruce bajista → señal SELL
     """
-    df = df.sort_values('timestamp')
-    df['ema_12'] = df['close'].ewm(span=12, adjust=False).mean()
-    df['ema_26'] = df['close'].ewm(span=26, adjust=False).mean()
-    df['macd'] = df['ema_12'] - df['ema_26']
-    df['signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-
-    if len(df) < 35:
+    if len(df) < MIN_BARS:
         return None
 
-    last, prev = df.iloc[-1], df.iloc[-2]
-
-    # Cruce alcista
-    if prev['macd'] < prev['signal'] and last['macd'] > last['signal']:
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.color == 'green':
         print("[MACD] Cruce alcista detectado ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 1.02,
-            'sl': last['close'] * 0.98,
-            'reason': 'Cruce alcista de MACD',
-            'shares': 100,
-            'color': 'green'
-        }
-
-    # Cruce bajista
-    if prev['macd'] > prev['signal'] and last['macd'] < last['signal']:
+    else:
         print("[MACD] Cruce bajista detectado ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 0.98,
-            'sl': last['close'] * 1.02,
-            'reason': 'Cruce bajista de MACD',
-            'shares': 100,
-            'color': 'red'
-        }
-
-    return None
-
-
+    return signal
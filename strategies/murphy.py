@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
+import indicators as ind
+from strategies._common import signal_frame, last_signal, warmup_mask
 
 EMA_FAST = 12
 EMA_SLOW = 26
@@ -13,53 +15,66 @@ ATR_LEN = 14
 CAPITAL_TOTAL = 10000
 RIESGO_POR_OPERACION = 0.01
 
-def generate_signal(df: pd.DataFrame):
+# === Metadatos para el registro de estrategias ===
+def _min_bars():
+    return max(EMA_SLOW*2, VOL_AVG_LEN+HIGH_BREAK_LEN+RSI_LEN+ATR_LEN)
+
+MIN_BARS = _min_bars()
+INDICATORS = [("ema", "close", EMA_FAST), ("ema", "close", EMA_SLOW), ("rsi", RSI_LEN),
+              ("sma", "volume", VOL_AVG_LEN), ("rolling_max", "high", HIGH_BREAK_LEN, 1), ("range_mean", ATR_LEN)]
+TIMESTAMPED = True
+PRIORITY = 10
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada de Murphy: una fila por vela con entrada, TP, SL,
+    nº de acciones y riesgo por acción donde se cumplen las condiciones.
+    """
     if df is None or df.empty:
         return None
 
-    df = df[['timestamp','open','high','low','close','volume']].copy()
-    df['ema_fast'] = df['close'].ewm(span=EMA_FAST, adjust=False).mean()
-    df['ema_slow'] = df['close'].ewm(span=EMA_SLOW, adjust=False).mean()
-    delta = df['close'].diff()
-    gain = np.where(delta>0, delta,0)
-    loss = np.where(delta<0, -delta,0)
-    avg_gain = pd.Series(gain).rolling(window=RSI_LEN).mean()
-    avg_loss = pd.Series(loss).rolling(window=RSI_LEN).mean()
-    rs = avg_gain/avg_loss
-    df['rsi'] = 100-(100/(1+rs))
-    df['vol_avg'] = df['volume'].rolling(window=VOL_AVG_LEN).mean()
-    df['max_high_lookback'] = df['high'].shift(1).rolling(window=HIGH_BREAK_LEN).max()
-    df['atr'] = (df['high']-df['low']).rolling(window=ATR_LEN).mean()
+    ema_fast = ind.ema(df, EMA_FAST).to_numpy()
+    ema_slow = ind.ema(df, EMA_SLOW).to_numpy()
+    rsi = ind.rsi(df, RSI_LEN).to_numpy()
+    vol_avg = ind.sma(df, VOL_AVG_LEN, col='volume').to_numpy()
+    max_high_lookback = ind.rolling_max(df, HIGH_BREAK_LEN, col='high', shift=1).to_numpy()
+    atr = ind.range_mean(df, ATR_LEN).to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+
+    trend_up = ema_fast>ema_slow
+    breakout = df['high'].to_numpy(dtype=float)>max_high_lookback
+    vol_ok = df['volume'].to_numpy(dtype=float)>vol_avg
+    rsi_ok = (RSI_MIN<rsi)&(rsi<RSI_MAX)
+    buy = warmup_mask(len(df), MIN_BARS) & trend_up & breakout & vol_ok & rsi_ok
+
+    stop_loss = close-1.5*atr
+    take_profit = close+2*atr
+    riesgo_por_accion = close-stop_loss
+    capital_riesgo = CAPITAL_TOTAL*RIESGO_POR_OPERACION
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.trunc(capital_riesgo/riesgo_por_accion)
+    buy &= np.isfinite(shares)
 
-    min_len = max(EMA_SLOW*2, VOL_AVG_LEN+HIGH_BREAK_LEN+RSI_LEN+ATR_LEN)
-    if len(df)<min_len:
+    no_sell = np.zeros(len(df), dtype=bool)
+    return signal_frame(df, buy, no_sell,
+                        entry=close.round(3),
+                        tp=(take_profit.round(3), np.nan),
+                        sl=(stop_loss.round(3), np.nan),
+                        reason=('Cruce de medias + ruptura con volumen y RSI válido', None),
+                        shares=np.where(buy, shares, np.nan),
+                        extra={'rsi': rsi.round(2),
+                               'ema_fast': ema_fast.round(3),
+                               'ema_slow': ema_slow.round(3),
+                               'risk_per_share': riesgo_por_accion.round(3)})
+
+def generate_signal(df: pd.DataFrame):
+    if df is None or df.empty:
         return None
 
-    last = df.iloc[-1]
-    trend_up = last['ema_fast']>last['ema_slow']
-    breakout = last['high']>last['max_high_lookback']
-    vol_ok = last['volume']>last['vol_avg']
-    rsi_ok = RSI_MIN<last['rsi']<RSI_MAX
+    if len(df)<MIN_BARS:
+        return None
 
-    if trend_up and breakout and vol_ok and rsi_ok:
-        entry_price = last['close']
-        atr = last['atr']
-        stop_loss = entry_price-1.5*atr
-        take_profit = entry_price+2*atr
-        riesgo_por_accion = entry_price-stop_loss
-        capital_riesgo = CAPITAL_TOTAL*RIESGO_POR_OPERACION
-        shares = int(capital_riesgo/ riesgo_por_accion)
+    signal = last_signal(generate_signals(df))
+    if signal is not None:
         print("[Murphy] Condiciones cumplidas → COMPRA ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': round(entry_price,3),
-            'tp': round(take_profit,3),
-            'sl': round(stop_loss,3),
-            'rsi': round(last['rsi'],2),
-            'ema_fast': round(last['ema_fast'],3),
-            'ema_slow': round(last['ema_slow'],3),
-            'reason':'Cruce de medias + ruptura con volumen y RSI válido',
-            'shares':shares,
-            'risk_per_share':round(riesgo_por_accion,3)
-        }
-    return None
+    return signal
@@ -1,6 +1,26 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
+import indicators as ind
+from strategies._common import signal_frame, last_signal
+
+# === Metadatos para el registro de estrategias ===
+MIN_BARS = 7
+INDICATORS = [("roc", "close", 5)]
+TIMESTAMPED = True
+PRIORITY = 110
+
+def generate_signals(df):
+    """
+    Versión vectorizada del ROC(5) sobre todo el histórico.
+    """
+    roc = ind.roc(df, 5)
+    latest, prev = roc.to_numpy(), roc.shift().to_numpy()
+    buy = (latest > 0) & (latest > prev)
+    sell = (latest < 0) & (latest < prev)
+    return signal_frame(df, buy, sell,
+                        tp=(np.nan, np.nan), sl=(np.nan, np.nan),
+                        reason=('ROC positivo y en aumento', 'ROC negativo y en descenso'))
 
 def generate_signal(df):
     """
@@ -8,14 +28,4 @@ def generate_signal(df):
         - BUY si ROC positivo y creciente
         - SELL si ROC negativo y decreciente
     """
-    df = df.copy()
-    df['roc'] = df['close'].pct_change(periods=5) * 100
-    latest = df.iloc[-1]
-    prev = df.iloc[-2]
-
-    signal = {}
-    if latest['roc'] > 0 and latest['roc'] > prev['roc']:
-        signal = {'signal': 'BUY', 'reason': 'ROC positivo y en aumento', 'color': 'green'}
-    elif latest['roc'] < 0 and latest['roc'] < prev['roc']:
-        signal = {'signal': 'SELL', 'reason': 'ROC negativo y en descenso', 'color': 'red'}
-    return signal
+    return last_signal(generate_signals(df))
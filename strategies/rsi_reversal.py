@@ -1,37 +1,38 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
+import indicators as ind
+from strategies._common import signal_frame, last_signal
 
-def generate_signal(df: pd.DataFrame):
-    delta = df['close'].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
-    rs = avg_gain / avg_loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-    last = df.iloc[-1]
+RSI_LEN = 14
+RSI_LOW = 30
+RSI_HIGH = 70
 
-    if last['rsi'] < 30:
-        print("[RSI] Sobreventa detectada → posible rebote ✅")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 1.03,
-            'sl': last['close'] * 0.97,
-            'reason': 'RSI < 30 (sobreventa)',
-            'shares': 100
-        }
+# === Metadatos para el registro de estrategias ===
+def _min_bars():
+    return RSI_LEN + 1
 
-    if last['rsi'] > 70:
-        print("[RSI] Sobrecompra detectada → posible corrección ⚠️")
-        return {
-            'timestamp': last['timestamp'],
-            'entry': last['close'],
-            'tp': last['close'] * 0.97,
-            'sl': last['close'] * 1.03,
-            'reason': 'RSI > 70 (sobrecompra)',
-            'shares': 100
-        }
+MIN_BARS = _min_bars()
+INDICATORS = [("rsi", RSI_LEN)]
+TIMESTAMPED = True
+PRIORITY = 30
+
+def generate_signals(df: pd.DataFrame):
+    """
+    Versión vectorizada de la reversión por RSI sobre todo el histórico.
+    """
+    rsi = ind.rsi(df, RSI_LEN).to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+    return signal_frame(df, rsi < RSI_LOW, rsi > RSI_HIGH,
+                        tp=(close * 1.03, close * 0.97), sl=(close * 0.97, close * 1.03),
+                        reason=(f'RSI < {RSI_LOW} (sobreventa)', f'RSI > {RSI_HIGH} (sobrecompra)'))
 
-    return None
+def generate_signal(df: pd.DataFrame):
+    signal = last_signal(generate_signals(df))
+    if signal is None:
+        return None
+    if signal.signal == 'BUY':
+        print("[RSI] Sobreventa detectada → posible rebote ✅")
+    else:
+        print("[RSI] Sobrecompra detectada → posible corrección ⚠️")
+    return signal
@@ -2,45 +2,33 @@
 """
 Selecciona estrategias con probabilidad proporcional a su rendimiento.
 Si no hay histórico, rota de forma equitativa.
+Las estrategias disponibles salen del registro (registry.py).
 """
 import random
-import importlib
 import itertools
+import registry
 from strategy_performance import get_strategy_scores
 
-STRATEGIES = [
-    "strategies.murphy",
-    "strategies.macd_momentum",
-    "strategies.rsi_reversal",
-    "strategies.bollinger_rebound",
-    "strategies.ema_crossover",
-    "strategies.candle_ma_rsi",
-    "strategies.candle_sr_volume",
-    "strategies.candle_boll_rsi"
-]
-
-
-_cycle = itertools.cycle(STRATEGIES)
+_cycle = None
 
 
 def get_next_strategy():
     """Devuelve una estrategia ponderada por rendimiento."""
+    global _cycle
+    specs = registry.get_strategies()
     scores = get_strategy_scores()
 
     if not scores:
         # Sin datos aún: rotación simple
-        module_name = next(_cycle)
-        module = importlib.import_module(module_name)
-        return module.generate_signal, module_name.split(".")[-1]
+        if _cycle is None:
+            _cycle = itertools.cycle(specs)
+        spec = next(_cycle)
+        return spec.generate_signal, spec.name
 
     # Crea lista ponderada de estrategias según score
-    weights = []
-    for s in STRATEGIES:
-        base_name = s.split(".")[-1]
-        weights.append(scores.get(base_name, 0.5))  # valor neutro 0.5 si no hay datos
+    weights = [scores.get(s.name, 0.5) for s in specs]  # valor neutro 0.5 si no hay datos
 
     # Selección ponderada
-    module_name = random.choices(STRATEGIES, weights=weights, k=1)[0]
-    module = importlib.import_module(module_name)
-    print(f"[Adaptive] Seleccionada estrategia '{module_name.split('.')[-1]}' con peso {scores.get(module_name.split('.')[-1], 0.5):.2f}")
-    return module.generate_signal, module_name.split(".")[-1]
+    spec = random.choices(specs, weights=weights, k=1)[0]
+    print(f"[Adaptive] Seleccionada estrategia '{spec.name}' con peso {scores.get(spec.name, 0.5):.2f}")
+    return spec.generate_signal, spec.name
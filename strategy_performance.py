@@ -3,16 +3,229 @@
 Registro y análisis del rendimiento de estrategias.
 Guarda los resultados de cada operación en logs/strategy_stats.csv
 y calcula su efectividad.
+
+Las estadísticas se mantienen de forma incremental (O(1) por operación):
+- recuentos, media de éxito y media/varianza del PnL (Welford)
+- variantes con decaimiento exponencial (semivida en nº de operaciones)
+- ventanas de las últimas N operaciones y de los últimos N días
+El agregado se guarda en logs/strategy_scores.json y se reconstruye desde
+el CSV si falta o no corresponde al log actual.
 """
+import bisect
+import json
+import math
 import os
-import pandas as pd
+import tempfile
+from collections import deque
 from datetime import datetime
 
+import pandas as pd
+
+from config import SCORE_HALFLIFE, SCORE_WINDOW_TRADES, SCORE_WINDOW_DAYS
+
 LOG_FILE = "logs/strategy_stats.csv"
+SNAPSHOT_FILE = "logs/strategy_scores.json"
 
 os.makedirs("logs", exist_ok=True)
 
 
+def _epoch(ts) -> float:
+    """Segundos desde epoch (las fechas sin zona se interpretan en hora local, como datetime.now())."""
+    try:
+        return pd.Timestamp(ts).to_pydatetime().timestamp()
+    except (TypeError, ValueError):
+        return datetime.now().timestamp()
+
+
+class StrategyStats:
+    """Estadísticas acumuladas de una estrategia, actualizables en O(1)."""
+
+    def __init__(self, halflife=SCORE_HALFLIFE, window_trades=SCORE_WINDOW_TRADES,
+                 window_days=SCORE_WINDOW_DAYS):
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.window_days = window_days
+        self.n = 0
+        self.success_mean = 0.0
+        self.pnl_mean = 0.0
+        self.pnl_m2 = 0.0
+        self.ew_success = None
+        self.ew_pnl = None
+        self.ew_pnl_var = 0.0
+        # Ventanas: (epoch, success, pnl) con sumas corrientes
+        self.recent = deque(maxlen=window_trades)
+        self.recent_sum = [0.0, 0.0]
+        self.daily = deque()
+        self.daily_sum = [0.0, 0.0]
+
+    def update(self, ts, success, pnl):
+        success, pnl, ts = float(success), float(pnl), float(ts)
+        # Welford
+        self.n += 1
+        self.success_mean += (success - self.success_mean) / self.n
+        delta = pnl - self.pnl_mean
+        self.pnl_mean += delta / self.n
+        self.pnl_m2 += delta * (pnl - self.pnl_mean)
+        # Medias exponenciales (adjust=False)
+        if self.ew_success is None:
+            self.ew_success, self.ew_pnl = success, pnl
+        else:
+            a = self.alpha
+            diff = pnl - self.ew_pnl
+            self.ew_success += a * (success - self.ew_success)
+            self.ew_pnl += a * diff
+            self.ew_pnl_var = (1 - a) * (self.ew_pnl_var + a * diff * diff)
+        # Últimas N operaciones
+        if len(self.recent) == self.recent.maxlen:
+            _, s_old, p_old = self.recent[0]
+            self.recent_sum[0] -= s_old
+            self.recent_sum[1] -= p_old
+        self.recent.append((ts, success, pnl))
+        self.recent_sum[0] += success
+        self.recent_sum[1] += pnl
+        # Últimos N días: la ventana se mantiene ordenada por fecha aunque las
+        # operaciones lleguen desordenadas (un backtest las registra por ticker)
+        item = (ts, success, pnl)
+        if not self.daily or ts >= self.daily[-1][0]:
+            self.daily.append(item)
+        else:
+            self.daily.insert(bisect.bisect_right(self.daily, ts, key=lambda x: x[0]), item)
+        self.daily_sum[0] += success
+        self.daily_sum[1] += pnl
+        self._expire(self.daily[-1][0])
+
+    def _expire(self, now):
+        """Saca de la ventana diaria las operaciones anteriores a now - window_days."""
+        limit = now - self.window_days * 86400
+        while self.daily and self.daily[0][0] < limit:
+            _, s_old, p_old = self.daily.popleft()
+            self.daily_sum[0] -= s_old
+            self.daily_sum[1] -= p_old
+        if not self.daily:
+            self.daily_sum = [0.0, 0.0]
+
+    @property
+    def pnl_var(self):
+        return self.pnl_m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def summary(self, mode="all", now=None):
+        """(n, éxito medio, pnl medio) según la ventana: all, ewm, trades o days."""
+        if mode == "all":
+            return self.n, self.success_mean, self.pnl_mean
+        if mode == "ewm":
+            return self.n, self.ew_success, self.ew_pnl
+        if mode == "trades":
+            n = len(self.recent)
+            sums = self.recent_sum
+        elif mode == "days":
+            self._expire(datetime.now().timestamp() if now is None else now)
+            n = len(self.daily)
+            sums = self.daily_sum
+        else:
+            raise ValueError(f"Ventana desconocida: {mode}")
+        if n == 0:
+            return 0, None, None
+        return n, sums[0] / n, sums[1] / n
+
+    def to_dict(self):
+        return {
+            "n": self.n, "success_mean": self.success_mean, "pnl_mean": self.pnl_mean,
+            "pnl_m2": self.pnl_m2, "ew_success": self.ew_success, "ew_pnl": self.ew_pnl,
+            "ew_pnl_var": self.ew_pnl_var, "recent": list(self.recent), "daily": list(self.daily),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls()
+        for k in ("n", "success_mean", "pnl_mean", "pnl_m2", "ew_success", "ew_pnl", "ew_pnl_var"):
+            setattr(s, k, d[k])
+        s.recent.extend(tuple(x) for x in d["recent"])
+        s.daily.extend(sorted(tuple(x) for x in d["daily"]))
+        s.recent_sum = [sum(x[1] for x in s.recent), sum(x[2] for x in s.recent)]
+        s.daily_sum = [sum(x[1] for x in s.daily), sum(x[2] for x in s.daily)]
+        return s
+
+
+class ScoreBoard:
+    """
+    Agregado de todas las estrategias. `log_size` es el tamaño del CSV que
+    refleja; si no coincide con el fichero actual, se reconstruye.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.log_size = 0
+
+    def update(self, strategy, ts, success, pnl):
+        if strategy not in self.stats:
+            self.stats[strategy] = StrategyStats()
+        self.stats[strategy].update(_epoch(ts), success, pnl)
+
+    @classmethod
+    def rebuild(cls, log_file=LOG_FILE):
+        """Recalcula el agregado leyendo el log completo (una sola pasada)."""
+        board = cls()
+        if os.path.exists(log_file):
+            df = pd.read_csv(log_file)
+            if not df.empty:
+                success = df["success"].astype(str).str.lower().isin(["true", "1", "1.0"])
+                for strategy, ts, ok, pnl in zip(df["strategy"], df["timestamp"], success, df["pnl"]):
+                    board.update(strategy, ts, ok, 0.0 if pd.isna(pnl) else pnl)
+            board.log_size = os.path.getsize(log_file)
+        return board
+
+    def save(self, path=SNAPSHOT_FILE):
+        data = {"log_size": self.log_size, "stats": {k: v.to_dict() for k, v in self.stats.items()}}
+        fd, tmp = tempfile.mkstemp(prefix=".scores_", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, "w") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_FILE):
+        with open(path) as fh:
+            data = json.load(fh)
+        board = cls()
+        board.log_size = data["log_size"]
+        board.stats = {k: StrategyStats.from_dict(v) for k, v in data["stats"].items()}
+        return board
+
+
+_BOARD = None
+
+
+def _log_size():
+    return os.path.getsize(LOG_FILE) if os.path.exists(LOG_FILE) else 0
+
+
+def get_scoreboard() -> ScoreBoard:
+    """Agregado en memoria; se carga del snapshot o se reconstruye si el log cambió por fuera."""
+    global _BOARD
+    size = _log_size()
+    if _BOARD is not None and _BOARD.log_size == size:
+        return _BOARD
+    board = None
+    if os.path.exists(SNAPSHOT_FILE):
+        try:
+            board = ScoreBoard.load()
+        except (OSError, ValueError, KeyError, TypeError):
+            board = None
+    if board is None or board.log_size != size:
+        board = ScoreBoard.rebuild()
+        board.save()
+    _BOARD = board
+    return _BOARD
+
+
+def _append(df):
+    header = not os.path.exists(LOG_FILE)
+    board = get_scoreboard()
+    df.to_csv(LOG_FILE, mode='a', index=False, header=header)
+    for strategy, ts, ok, pnl in zip(df["strategy"], df["timestamp"], df["success"], df["pnl"]):
+        board.update(strategy, ts, bool(ok), 0.0 if pd.isna(pnl) else pnl)
+    board.log_size = _log_size()
+    board.save()
+
+
 def log_result(strategy_name, success, pnl):
     """Registra el resultado de una operación."""
     df = pd.DataFrame([{
@@ -21,31 +234,43 @@ def log_result(strategy_name, success, pnl):
         "success": success,
         "pnl": pnl
     }])
-    header = not os.path.exists(LOG_FILE)
-    df.to_csv(LOG_FILE, mode='a', index=False, header=header)
-
+    _append(df)
 
-def get_strategy_scores():
-    """Calcula la tasa de éxito y el PnL promedio de cada estrategia."""
-    if not os.path.exists(LOG_FILE):
-        return {}
 
-    df = pd.read_csv(LOG_FILE)
-    if df.empty:
-        return {}
+def log_results(results: pd.DataFrame):
+    """
+    Registra en bloque varias operaciones (p. ej. las de un backtest), en orden cronológico.
+    `results` debe tener las columnas timestamp, strategy, success y pnl.
+    """
+    if results is None or results.empty:
+        return
+    results = results[["timestamp", "strategy", "success", "pnl"]]
+    _append(results.iloc[pd.to_datetime(results["timestamp"]).argsort(kind="stable")])
 
-    summary = df.groupby("strategy").agg({
-        "success": "mean",
-        "pnl": "mean",
-        "timestamp": "count"
-    }).rename(columns={"timestamp": "n_ops"})
 
+def get_strategy_scores(window="all", last_n=None):
+    """
+    Calcula la puntuación de cada estrategia a partir de su tasa de éxito y PnL medio.
+    - window: "all" (histórico), "ewm" (decaimiento exponencial),
+      "trades" (últimas SCORE_WINDOW_TRADES operaciones) o "days" (últimos SCORE_WINDOW_DAYS días)
+    - last_n: con window="trades", limita a las últimas `last_n` (≤ SCORE_WINDOW_TRADES)
+    """
+    board = get_scoreboard()
     scores = {}
-    for name, row in summary.iterrows():
+    for name, st in board.stats.items():
+        if window == "trades" and last_n is not None:
+            tail = list(st.recent)[-last_n:]
+            n = len(tail)
+            success = sum(x[1] for x in tail) / n if n else None
+            pnl = sum(x[2] for x in tail) / n if n else None
+        else:
+            n, success, pnl = st.summary(window)
+        if not n or success is None or math.isnan(pnl):
+            continue
         # Fórmula de puntuación ponderada
         # (éxito * 0.7 + pnl_norm * 0.3)
-        pnl_norm = (row["pnl"] + 1) / 2  # normaliza -1→0, +1→1
-        score = (row["success"] * 0.7 + pnl_norm * 0.3)
+        pnl_norm = (pnl + 1) / 2  # normaliza -1→0, +1→1
+        score = (success * 0.7 + pnl_norm * 0.3)
         scores[name] = round(score, 3)
 
     return scores
@@ -0,0 +1,641 @@
+# streaming.py
+# -*- coding: utf-8 -*-
+"""
+🌊 Indicadores en streaming (online)
+Versiones incrementales de los indicadores de indicators.py: cada vela nueva
+cuesta O(1) y el estado por ticker es pequeño y serializable (JSON), así que
+sobrevive entre ejecuciones. Reproducen los resultados por lotes de pandas:
+- EMA (adjust=False), MACD + señal
+- RSI con medias simples (variante del proyecto) o de Wilder
+- media/desviación móvil (Welford con altas y bajas en la ventana)
+- máximo/mínimo móvil con colas monótonas (con desplazamiento opcional)
+- TR, ATR (media simple del TR), media del rango high-low
+- +DM/-DM, +DI/-DI y ADX tal como los calcula indicators.py
+- ROC y media de volumen
+Las claves de indicador son las mismas que usa IndicatorEngine, p. ej.
+("ema", "close", 12), ("rsi", 14) o ("rolling_max", "high", 20, 1).
+"""
+
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+NAN = float("nan")
+RESYNC_EVERY = 1000  # recálculo exacto periódico de las sumas móviles (evita deriva)
+
+
+def _isnan(x):
+    return x is None or x != x
+
+
+# ============================================================
+# Serialización genérica
+# ============================================================
+
+class Online:
+    """Base: serializa los atributos del objeto (colas → listas, NaN → None)."""
+
+    _deques = ()
+    _children = ()
+
+    def to_dict(self) -> dict:
+        state = {}
+        for k, v in self.__dict__.items():
+            if k in self._children:
+                state[k] = v.to_dict() if v is not None else None
+            elif isinstance(v, deque):
+                state[k] = [list(x) if isinstance(x, tuple) else (None if _isnan(x) else x) for x in v]
+            elif isinstance(v, float) and math.isnan(v):
+                state[k] = None
+            else:
+                state[k] = v
+        return {"type": type(self).__name__, "state": state}
+
+    @classmethod
+    def from_dict(cls, data):
+        klass = _TYPES[data["type"]]
+        obj = klass.__new__(klass)
+        for k, v in data["state"].items():
+            if k in klass._children:
+                v = Online.from_dict(v) if v is not None else None
+            elif k in klass._deques:
+                maxlen = data["state"].get("window") if k == "buf" else None
+                v = deque((tuple(x) if isinstance(x, list) else (NAN if x is None else x) for x in v), maxlen=maxlen)
+            elif v is None and k not in ("prev", "prev_high", "prev_low", "prev_close"):
+                v = NAN
+            setattr(obj, k, v)
+        return obj
+
+
+# ============================================================
+# Indicadores básicos
+# ============================================================
+
+class EMA(Online):
+    """EMA con adjust=False; arranca en el primer valor válido."""
+
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.min_periods = min_periods
+        self.n = 0
+        self.mean = NAN
+
+    def update(self, x):
+        if not _isnan(x):
+            self.n += 1
+            self.mean = x if self.n == 1 else self.mean + self.alpha * (x - self.mean)
+        return self.value
+
+    @property
+    def value(self):
+        return self.mean if self.n >= max(1, self.min_periods) else NAN
+
+
+class RollingStats(Online):
+    """
+    Media y desviación típica (ddof=1) de las últimas `window` observaciones,
+    con Welford de altas y bajas. NaN mientras la ventana no esté completa o
+    contenga algún NaN (como rolling(window) con min_periods=window).
+    """
+
+    _deques = ("buf",)
+
+    def __init__(self, window):
+        self.window = window
+        self.buf = deque(maxlen=window)
+        self.nans = 0
+        self.k = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def _add(self, x):
+        self.k += 1
+        d = x - self.mean
+        self.mean += d / self.k
+        self.m2 += d * (x - self.mean)
+
+    def _remove(self, y):
+        self.k -= 1
+        if self.k == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        d = y - self.mean
+        self.mean -= d / self.k
+        self.m2 -= d * (y - self.mean)
+
+    def _resync(self):
+        vals = [v for v in self.buf if not _isnan(v)]
+        self.k = len(vals)
+        self.mean = math.fsum(vals) / self.k if vals else 0.0
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in vals) if vals else 0.0
+
+    def update(self, x):
+        if len(self.buf) == self.window:
+            old = self.buf[0]
+            if _isnan(old):
+                self.nans -= 1
+            else:
+                self._remove(old)
+        self.buf.append(NAN if _isnan(x) else x)
+        if _isnan(x):
+            self.nans += 1
+        else:
+            self._add(x)
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self._resync()
+        return self.value
+
+    @property
+    def ready(self):
+        return len(self.buf) == self.window and self.nans == 0
+
+    @property
+    def value(self):
+        return self.mean if self.ready else NAN
+
+    @property
+    def sum(self):
+        return self.mean * self.window if self.ready else NAN
+
+    @property
+    def std(self):
+        if not self.ready or self.window < 2:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (self.window - 1))
+
+
+class RollingExtreme(Online):
+    """
+    Máximo (o mínimo) de las últimas `window` observaciones con una cola
+    monótona; `shift` desplaza la serie como series.shift(shift).rolling(window).
+    """
+
+    _deques = ("pending", "dq", "nan_idx")
+
+    def __init__(self, window, shift=0, mode="max"):
+        self.window = window
+        self.shift = shift
+        self.mode = mode
+        self.pending = deque()
+        self.dq = deque()
+        self.nan_idx = deque()
+        self.i = -1
+
+    def _push(self, x):
+        self.i += 1
+        limit = self.i - self.window
+        while self.dq and self.dq[0][0] <= limit:
+            self.dq.popleft()
+        while self.nan_idx and self.nan_idx[0] <= limit:
+            self.nan_idx.popleft()
+        if _isnan(x):
+            self.nan_idx.append(self.i)
+            return
+        if self.mode == "max":
+            while self.dq and self.dq[-1][1] <= x:
+                self.dq.pop()
+        else:
+            while self.dq and self.dq[-1][1] >= x:
+                self.dq.pop()
+        self.dq.append((self.i, x))
+
+    def update(self, x):
+        if self.shift:
+            self.pending.append(x)
+            self._push(self.pending.popleft() if len(self.pending) > self.shift else NAN)
+        else:
+            self._push(x)
+        return self.value
+
+    @property
+    def value(self):
+        if self.i + 1 < self.window or self.nan_idx or not self.dq:
+            return NAN
+        return self.dq[0][1]
+
+
+class Lag(Online):
+    """Valor de hace `periods` observaciones y cambio porcentual (ROC)."""
+
+    _deques = ("buf",)
+
+    def __init__(self, periods):
+        self.window = periods + 1
+        self.buf = deque(maxlen=periods + 1)
+
+    def update(self, x):
+        self.buf.append(NAN if _isnan(x) else x)
+        return self.value
+
+    @property
+    def value(self):
+        if len(self.buf) < self.window or _isnan(self.buf[0]) or _isnan(self.buf[-1]):
+            return NAN
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float((np.float64(self.buf[-1]) / np.float64(self.buf[0]) - 1) * 100)
+
+
+# ============================================================
+# Indicadores compuestos (reciben la vela completa)
+# ============================================================
+
+class RSI(Online):
+    """
+    RSI a partir de las medias de ganancias y pérdidas.
+    - wilder=False: medias simples de `length` velas (la variante de indicators.rsi)
+    - wilder=True: medias exponenciales alpha=1/length (Wilder)
+    """
+
+    _children = ("gain", "loss")
+
+    def __init__(self, length=14, wilder=False):
+        self.length = length
+        self.wilder = wilder
+        self.prev = None
+        if wilder:
+            self.gain = EMA(alpha=1.0 / length, min_periods=length)
+            self.loss = EMA(alpha=1.0 / length, min_periods=length)
+        else:
+            self.gain = RollingStats(length)
+            self.loss = RollingStats(length)
+
+    def update(self, close):
+        d = NAN if self.prev is None or _isnan(close) else close - self.prev
+        self.prev = close
+        self.gain.update(NAN if _isnan(d) else max(d, 0.0))
+        self.loss.update(NAN if _isnan(d) else max(-d, 0.0))
+        return self.value
+
+    @property
+    def avg_gain(self):
+        return self.gain.value
+
+    @property
+    def avg_loss(self):
+        return self.loss.value
+
+    @property
+    def value(self):
+        g, l = self.avg_gain, self.avg_loss
+        if _isnan(g) or _isnan(l):
+            return NAN
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = np.float64(g) / np.float64(l)
+        return float(100 - 100 / (1 + rs))
+
+
+class TrueRange(Online):
+    """
+    Rango verdadero: max(h-l, |h-c_prev|, |l-c_prev|). Con skipna se ignoran las
+    partes NaN (como indicators.atr); sin él, NaN si falta alguna (indicators.true_range).
+    """
+
+    skipna = True
+
+    def __init__(self, skipna=True):
+        self.skipna = skipna
+        self.prev_close = None
+        self.tr = NAN
+
+    def update(self, high, low, close):
+        prev = NAN if self.prev_close is None else self.prev_close
+        parts = [high - low, abs(high - prev), abs(low - prev)]
+        if self.skipna:
+            parts = [p for p in parts if not _isnan(p)]
+            self.tr = max(parts) if parts else NAN
+        else:
+            self.tr = NAN if any(_isnan(p) for p in parts) else max(parts)
+        self.prev_close = close
+        return self.tr
+
+    @property
+    def value(self):
+        return self.tr
+
+
+class ATR(Online):
+    """ATR como media simple del rango verdadero (como indicators.atr)."""
+
+    _children = ("tr", "mean")
+
+    def __init__(self, length=14):
+        self.tr = TrueRange()
+        self.mean = RollingStats(length)
+
+    def update(self, high, low, close):
+        return self.mean.update(self.tr.update(high, low, close))
+
+    @property
+    def value(self):
+        return self.mean.value
+
+
+class DMI(Online):
+    """
+    +DM/-DM, +DI/-DI y ADX con las fórmulas de indicators.py:
+    DI = 100·Σ DM / Σ TR en `length` velas; ADX = 100·|DI+ − DI−| / (DI+ + DI−).
+    """
+
+    _children = ("tr", "sum_tr", "sum_plus", "sum_minus")
+
+    def __init__(self, length=14):
+        self.prev_high = None
+        self.prev_low = None
+        self.dm_plus = 0.0
+        self.dm_minus = 0.0
+        self.tr = TrueRange(skipna=False)
+        self.sum_tr = RollingStats(length)
+        self.sum_plus = RollingStats(length)
+        self.sum_minus = RollingStats(length)
+
+    def update(self, high, low, close):
+        if self.prev_high is None:
+            self.dm_plus = self.dm_minus = 0.0
+        else:
+            up, down = high - self.prev_high, low - self.prev_low
+            self.dm_plus = max(up, 0.0) if up > down else 0.0
+            self.dm_minus = max(down, 0.0) if down > up else 0.0
+        self.prev_high, self.prev_low = high, low
+        self.sum_tr.update(self.tr.update(high, low, close))
+        self.sum_plus.update(self.dm_plus)
+        self.sum_minus.update(self.dm_minus)
+        return self.adx
+
+    def _di(self, sums):
+        s, t = sums.sum, self.sum_tr.sum
+        if _isnan(s) or _isnan(t):
+            return NAN
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(100 * np.float64(s) / np.float64(t))
+
+    @property
+    def di_plus(self):
+        return self._di(self.sum_plus)
+
+    @property
+    def di_minus(self):
+        return self._di(self.sum_minus)
+
+    @property
+    def adx(self):
+        p, m = self.di_plus, self.di_minus
+        if _isnan(p) or _isnan(m):
+            return NAN
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(100 * abs(p - m) / np.float64(p + m))
+
+    @property
+    def value(self):
+        return self.adx
+
+
+class MACD(Online):
+    """MACD (EMA rápida − EMA lenta) y su línea de señal (EMA del MACD)."""
+
+    _children = ("fast", "slow", "sig")
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.sig = EMA(signal)
+
+    def update(self, close):
+        self.fast.update(close)
+        self.slow.update(close)
+        self.sig.update(self.macd)
+        return self.macd
+
+    @property
+    def macd(self):
+        return self.fast.value - self.slow.value
+
+    @property
+    def signal(self):
+        return self.sig.value
+
+    @property
+    def value(self):
+        return self.macd
+
+
+_TYPES = {c.__name__: c for c in (EMA, RollingStats, RollingExtreme, Lag, RSI, TrueRange, ATR, DMI, MACD)}
+
+
+# ============================================================
+# Conjunto de indicadores de un ticker
+# ============================================================
+
+def _base(key):
+    """
+    Traduce una clave del motor de indicadores a (clave del objeto online,
+    constructor, cómo alimentarlo, atributo a leer). Varias claves comparten objeto
+    (p. ej. sma y std de la misma ventana, o RSI y sus medias).
+    """
+    name, params = key[0], tuple(key[1:])
+    if name == "ema":
+        col, span = params
+        return ("ema", col, span), lambda: EMA(span), col, "value"
+    if name in ("sma", "std"):
+        col, window = params
+        return ("stats", col, window), lambda: RollingStats(window), col, "value" if name == "sma" else "std"
+    if name in ("rolling_max", "rolling_min"):
+        col, window = params[:2]
+        shift = params[2] if len(params) > 2 else 0
+        mode = name[-3:]
+        return (name, col, window, shift), lambda: RollingExtreme(window, shift, mode), col, "value"
+    if name in ("rsi", "avg_gain", "avg_loss", "rsi_wilder"):
+        (length,) = params
+        wilder = name == "rsi_wilder"
+        attr = {"rsi": "value", "rsi_wilder": "value"}.get(name, name)
+        return ("rsi", length, wilder), lambda: RSI(length, wilder), "close", attr
+    if name == "true_range":
+        return ("true_range",), lambda: TrueRange(skipna=False), "hlc", "value"
+    if name == "atr":
+        (length,) = params
+        return ("atr", length), lambda: ATR(length), "hlc", "value"
+    if name == "range_mean":
+        (length,) = params
+        return ("range_mean", length), lambda: RollingStats(length), "range", "value"
+    if name in ("macd", "macd_signal"):
+        fast, slow = params[:2]
+        signal = params[2] if len(params) > 2 else 9
+        return ("macd", fast, slow, signal), lambda: MACD(fast, slow, signal), "close", \
+            "macd" if name == "macd" else "signal"
+    if name == "roc":
+        col, periods = params
+        return ("roc", col, periods), lambda: Lag(periods), col, "value"
+    if name in ("dm_plus", "dm_minus"):
+        return ("dmi", 14), lambda: DMI(14), "hlc", name
+    if name in ("di_plus", "di_minus", "adx"):
+        (length,) = params
+        return ("dmi", length), lambda: DMI(length), "hlc", name
+    raise KeyError(f"Indicador sin versión online: {key}")
+
+
+def supported(key) -> bool:
+    try:
+        _base(tuple(key))
+        return True
+    except (KeyError, ValueError):
+        return False
+
+
+class OnlineIndicators:
+    """
+    Estado online de un ticker para una lista de claves de indicador.
+    update(vela) cuesta O(1) y devuelve {clave: último valor}.
+    """
+
+    def __init__(self, keys=()):
+        self.keys = [tuple(k) for k in keys]
+        self.objects = {}
+        self.routes = {}
+        self.last_timestamp = None
+        for key in self.keys:
+            base, factory, feed, attr = _base(key)
+            if base not in self.objects:
+                self.objects[base] = (factory(), feed)
+            self.routes[key] = (base, attr)
+
+    def update(self, bar) -> dict:
+        """`bar`: mapping con open/high/low/close/volume (y opcionalmente timestamp)."""
+        high, low, close = float(bar["high"]), float(bar["low"]), float(bar["close"])
+        for obj, feed in self.objects.values():
+            if feed == "hlc":
+                obj.update(high, low, close)
+            elif feed == "range":
+                obj.update(high - low)
+            else:
+                obj.update(float(bar[feed]))
+        if "timestamp" in bar:
+            self.last_timestamp = str(bar["timestamp"])
+        return self.values()
+
+    def value(self, key):
+        base, attr = self.routes[tuple(key)]
+        return getattr(self.objects[base][0], attr)
+
+    def values(self) -> dict:
+        return {k: self.value(k) for k in self.keys}
+
+    def update_frame(self, df, since=None) -> dict:
+        """
+        Alimenta las velas de `df` (solo las posteriores a `since`, si se indica;
+        `since` es el timestamp en texto, comparable mientras no cambie la zona horaria).
+        """
+        rows = df
+        if since is not None:
+            rows = df[df["timestamp"].astype(str) > since] if "timestamp" in df.columns else df
+        cols = [c for c in ("timestamp", "open", "high", "low", "close", "volume") if c in rows.columns]
+        for values in zip(*(rows[c].to_numpy() for c in cols)):
+            self.update(dict(zip(cols, values)))
+        return self.values()
+
+    @classmethod
+    def from_frame(cls, keys, df) -> "OnlineIndicators":
+        state = cls(keys)
+        state.update_frame(df)
+        return state
+
+    def to_dict(self) -> dict:
+        return {
+            "keys": [list(k) for k in self.keys],
+            "last_timestamp": self.last_timestamp,
+            "objects": [[list(base), feed, obj.to_dict()] for base, (obj, feed) in self.objects.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "OnlineIndicators":
+        state = cls.__new__(cls)
+        state.keys = [tuple(k) for k in data["keys"]]
+        state.last_timestamp = data["last_timestamp"]
+        state.objects = {tuple(base): (Online.from_dict(obj), feed) for base, feed, obj in data["objects"]}
+        state.routes = {}
+        for key in state.keys:
+            base, _, _, attr = _base(key)
+            state.routes[key] = (base, attr)
+        return state
+
+
+def save_states(states: dict, path) -> None:
+    """Guarda {ticker: OnlineIndicators} en JSON (escritura atómica)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump({t: s.to_dict() for t, s in states.items()}, fh)
+    os.replace(tmp, path)
+
+
+def load_states(path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as fh:
+            return {t: OnlineIndicators.from_dict(d) for t, d in json.load(fh).items()}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"[Advertencia] Estado de indicadores no válido en {path} ({e}), se recalcula")
+        return {}
+
+
+# ============================================================
+# Verificación frente a indicators.py
+# ============================================================
+
+def compare_with_batch(df, keys, rtol=1e-9, atol=1e-9) -> dict:
+    """
+    Recorre `df` vela a vela y compara cada clave con la serie por lotes del
+    motor de indicadores. Devuelve {clave: máxima diferencia absoluta}.
+    """
+    from indicators import IndicatorEngine
+
+    engine = IndicatorEngine()
+    state = OnlineIndicators(keys)
+    online = {k: np.empty(len(df)) for k in state.keys}
+    cols = ["open", "high", "low", "close", "volume"]
+    for i, values in enumerate(zip(*(df[c].to_numpy(dtype=float) for c in cols))):
+        state.update(dict(zip(cols, values)))
+        for k in state.keys:
+            online[k][i] = state.value(k)
+    report = {}
+    for k in state.keys:
+        batch = _batch_series(engine, df, k)
+        a, b = online[k], batch
+        both_nan = np.isnan(a) & np.isnan(b)
+        same_inf = np.isinf(a) & np.isinf(b) & (np.sign(a) == np.sign(b))
+        diff = np.where(both_nan | same_inf, 0.0, np.abs(a - b))
+        ok = np.isclose(a, b, rtol=rtol, atol=atol) | both_nan | same_inf
+        report[k] = {"max_abs": float(np.nanmax(np.where(np.isnan(diff), np.inf, diff))) if len(diff) else 0.0,
+                     "ok": bool(ok.all())}
+    return report
+
+
+def _batch_series(engine, df, key):
+    if key[0] == "rsi_wilder":
+        d = df["close"].diff()
+        g = d.clip(lower=0).ewm(alpha=1 / key[1], min_periods=key[1], adjust=False).mean()
+        l = (-d.clip(upper=0)).ewm(alpha=1 / key[1], min_periods=key[1], adjust=False).mean()
+        return (100 - 100 / (1 + g / l)).to_numpy(dtype=float)
+    return engine.get(df, key[0], *key[1:]).to_numpy(dtype=float)
+
+
+ALL_KEYS = [
+    ("ema", "close", 12), ("ema", "close", 26), ("sma", "close", 20), ("std", "close", 20),
+    ("sma", "volume", 20), ("rolling_max", "high", 20, 0), ("rolling_max", "high", 20, 1),
+    ("rolling_min", "low", 20, 0), ("rsi", 14), ("avg_gain", 14), ("avg_loss", 14), ("rsi_wilder", 14),
+    ("true_range",), ("atr", 14), ("range_mean", 14), ("macd", 12, 26), ("macd_signal", 12, 26, 9),
+    ("roc", "close", 5), ("dm_plus",), ("dm_minus",), ("di_plus", 14), ("di_minus", 14), ("adx", 14),
+]
+
+
+if __name__ == "__main__":
+    import synthetic
+
+    df = synthetic.generate_ohlcv(2000, seed=1)
+    report = compare_with_batch(df, ALL_KEYS)
+    for key, r in report.items():
+        print(f"{'✅' if r['ok'] else '❌'} {str(key):<34} máx |Δ| = {r['max_abs']:.2e}")
@@ -0,0 +1,100 @@
+# synthetic.py
+# -*- coding: utf-8 -*-
+"""
+🧪 Generador determinista de OHLCV sintético
+Produce velas reproducibles (misma semilla → mismos datos) para benchmarks,
+backtests offline y pruebas sin red:
+- nº de velas y de tickers configurable
+- velas diarias o intradía dentro de la sesión MARKET_OPEN–MARKET_CLOSE
+- regímenes de volatilidad (cadena de Markov entre (volatilidad, deriva))
+- gaps de apertura y huecos de datos (velas que faltan)
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import TIMEZONE, MARKET_OPEN, MARKET_CLOSE
+
+# (volatilidad por vela, deriva por vela)
+DEFAULT_REGIMES = ((0.004, 0.0002), (0.012, -0.0003), (0.025, 0.0))
+
+
+def _is_intraday(freq) -> bool:
+    try:
+        return pd.Timedelta(freq) < pd.Timedelta(days=1)
+    except ValueError:
+        return False
+
+
+def make_index(n_bars, freq="1D", start="2024-01-02", tz=TIMEZONE,
+               session=(MARKET_OPEN, MARKET_CLOSE)) -> pd.DatetimeIndex:
+    """
+    Timestamps de `n_bars` velas hábiles. Las frecuencias intradía solo
+    generan velas dentro de la sesión (hora local de `tz`).
+    """
+    if not _is_intraday(freq):
+        return pd.bdate_range(start, periods=n_bars, tz=tz)
+    day = pd.date_range(f"2000-01-03 {session[0]}", f"2000-01-03 {session[1]}", freq=freq, inclusive="left")
+    offsets = day - day[0].normalize()
+    n_days = -(-n_bars // len(offsets))
+    days = pd.bdate_range(start, periods=n_days)
+    stamps = (days.to_numpy()[:, None] + offsets.to_numpy()[None, :]).ravel()[:n_bars]
+    return pd.DatetimeIndex(stamps).tz_localize(tz)
+
+
+def generate_ohlcv(n_bars=500, seed=0, freq="1D", start="2024-01-02", start_price=None,
+                   regimes=DEFAULT_REGIMES, switch_prob=0.02, gap_prob=0.05, gap_size=0.02,
+                   missing=0.0, tz=TIMEZONE) -> pd.DataFrame:
+    """
+    OHLCV sintético de un ticker con columnas timestamp/open/high/low/close/volume.
+    - regimes/switch_prob: regímenes de volatilidad y probabilidad de cambiar en cada vela
+    - gap_prob/gap_size: probabilidad y tamaño (desv. típica) de los gaps de apertura de sesión
+    - missing: fracción de velas eliminadas al azar (huecos en los datos)
+    """
+    rng = np.random.default_rng(seed)
+    index = make_index(n_bars, freq, start, tz)
+    n = len(index)
+    regimes = np.asarray(regimes, dtype=float)
+
+    # Cadena de Markov de regímenes
+    switches = rng.random(n) < switch_prob
+    jumps = rng.integers(1, len(regimes), n) if len(regimes) > 1 else np.zeros(n, int)
+    state = np.cumsum(np.where(switches, jumps, 0)) % len(regimes)
+    sigma, drift = regimes[state, 0], regimes[state, 1]
+
+    # Gaps al abrir cada sesión (o en cualquier vela si son diarias)
+    new_session = np.ones(n, bool)
+    if _is_intraday(freq):
+        dates = index.normalize()
+        new_session[1:] = dates[1:] != dates[:-1]
+    gaps = np.where(new_session & (rng.random(n) < gap_prob), rng.normal(0, gap_size, n), 0.0)
+
+    start_price = start_price if start_price is not None else float(rng.uniform(2, 60))
+    returns = drift + sigma * rng.standard_normal(n)
+    close = start_price * np.exp(np.cumsum(returns + gaps))
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1] * np.exp(gaps[1:] + sigma[1:] * 0.3 * rng.standard_normal(n - 1))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, sigma * 0.6)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, sigma * 0.6)))
+    base_volume = rng.uniform(5e4, 5e6)
+    volume = np.round(base_volume * rng.lognormal(0, 0.4, n) * (sigma / regimes[:, 0].min()) ** 0.5)
+
+    df = pd.DataFrame({"timestamp": index, "open": open_, "high": high, "low": low,
+                       "close": close, "volume": volume})
+    if missing > 0:
+        keep = rng.random(n) >= missing
+        keep[0] = True
+        df = df[keep].reset_index(drop=True)
+    return df
+
+
+def ticker_names(n_tickers, suffix=".MC") -> list:
+    return [f"SYN{i:04d}{suffix}" for i in range(n_tickers)]
+
+
+def generate_universe(n_tickers=35, n_bars=500, seed=0, **kwargs) -> dict:
+    """{ticker: OHLCV} con una semilla independiente y reproducible por ticker."""
+    seeds = np.random.SeedSequence(seed).spawn(n_tickers)
+    return {t: generate_ohlcv(n_bars, seed=np.random.default_rng(s).integers(2 ** 32), **kwargs)
+            for t, s in zip(ticker_names(n_tickers), seeds)}
@@ -1,30 +1,31 @@
-import yfinance as yf
-import pandas as pd
+# -*- coding: utf-8 -*-
+"""
+Prueba rápida de descarga a través del proveedor de datos configurado.
+Uso: python test_data.py [TICKER] [PROVEEDOR]   (por defecto CABK.MC y DATA_PROVIDER)
+"""
+import sys
 
-print("[Info] Probando descarga de CABK.MC...")
+import providers
+from config import DATA_PROVIDER
 
-# Descargamos los datos directamente
-df = yf.download("CABK.MC", period="1mo", interval="1d", progress=True)
+ticker = sys.argv[1] if len(sys.argv) > 1 else "CABK.MC"
+name = sys.argv[2] if len(sys.argv) > 2 else DATA_PROVIDER
+provider = providers.get_provider(name)
 
-print("\n[Debug] Columnas del DataFrame:")
-print(df.columns)
+print(f"[Info] Probando descarga de {ticker} con el proveedor '{provider.name}'...")
 
-print("\n[Debug] Primeras filas:")
-print(df.head())
+frames, failures = provider.download([ticker], interval="1d", period="1mo")
+df = frames.get(ticker)
 
-# Aplanamos columnas si es MultiIndex
-if isinstance(df.columns, pd.MultiIndex):
-    df.columns = [f"{a}_{b}".strip().lower() for a, b in df.columns]
-else:
-    df.columns = [c.lower() for c in df.columns]
+if df is None or df.empty:
+    print(f"[Error] Sin datos para {ticker}: {failures.get(ticker, 'respuesta vacía')}")
+    sys.exit(1)
 
-print("\n[Debug] Columnas después de aplanar:")
-print(df.columns)
+print("\n[Debug] Columnas del DataFrame (ya normalizadas):")
+print(list(df.columns))
 
-df["timestamp"] = df.index
-df = df.reset_index(drop=True)
-cols = ["timestamp", "open", "high", "low", "close", "volume"]
-df = df[[c for c in cols if c in df.columns]]
+print("\n[Debug] Tipos:")
+print(df.dtypes)
 
 print("\n[Resultado final]:")
 print(df.tail(5))